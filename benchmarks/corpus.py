@@ -0,0 +1,187 @@
+"""Deterministic synthetic Java repositories for the benchmarks.
+
+The same spec and seed always produce byte-identical files, so timings from
+different commits are measured on the same input.
+"""
+import hashlib
+import json
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Files per package directory
+FILES_PER_PACKAGE = 200
+
+_NOUNS = ["Film", "Actor", "Customer", "Rental", "Payment", "Store", "Staff", "Address", "City", "Country",
+          "Category", "Language", "Inventory", "Order", "Invoice", "Account", "Report", "Session", "Token"]
+_VERBS = ["find", "load", "save", "update", "delete", "compute", "validate", "resolve", "merge", "apply"]
+_TYPES = ["int", "long", "String", "boolean", "double", "List<String>", "Map<String, Integer>"]
+
+
+@dataclass
+class CorpusSpec:
+    files: int = 1000
+    methods_per_class: int = 8  # Class size
+    statements_per_method: int = 6
+    nesting: int = 1  # Depth of nested (static inner) classes per top-level class
+    comment_density: float = 0.3  # Probability of a Javadoc/line comment per member and statement
+    string_density: float = 0.2  # Probability of a string literal per statement, some holding braces or "//"
+    entity_ratio: float = 0.3  # Share of files that are JPA-style entities with getter/setter boilerplate
+    seed: int = 42
+
+    def digest(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# Presets spanning the supported range, 10 to 100k files
+PRESETS = {
+    "tiny": CorpusSpec(files=10),
+    "small": CorpusSpec(files=1000),
+    "medium": CorpusSpec(files=10_000),
+    "large": CorpusSpec(files=100_000),
+}
+
+
+class _JavaWriter:
+    def __init__(self, spec: CorpusSpec, rng: random.Random):
+        self.spec = spec
+        self.rng = rng
+        self.lines = []
+
+    def emit(self, depth: int, text: str):
+        self.lines.append("    " * depth + text)
+
+    def maybe_comment(self, depth: int, text: str, javadoc: bool = False):
+        if self.rng.random() >= self.spec.comment_density:
+            return
+        if javadoc:
+            self.emit(depth, "/**")
+            self.emit(depth, f" * {text}. Braces in comments {{ }} must not confuse the splitter.")
+            self.emit(depth, " */")
+        else:
+            self.emit(depth, f"// {text} }} {{")
+
+    def literal(self) -> str:
+        return self.rng.choice([
+            '"plain text"', '"{ not a block }"', '"// not a comment"', '"/* nor this */"',
+            '"escaped \\" quote {"', "String.valueOf('{')", '"""\n        text block }\n        """',
+        ])
+
+    def statement(self, depth: int, i: int):
+        self.maybe_comment(depth, f"step {i}")
+        if self.rng.random() < self.spec.string_density:
+            self.emit(depth, f"String s{i} = {self.literal()};")
+        elif i % 3 == 0:
+            self.emit(depth, f"if (count > {i}) {{")
+            self.emit(depth + 1, f"count += {i};")
+            self.emit(depth, "}")
+        else:
+            self.emit(depth, f"count = count * {i + 1} + {self.rng.randint(0, 99)};")
+
+    def method(self, depth: int, name: str):
+        return_type = self.rng.choice(_TYPES)
+        self.maybe_comment(depth, f"{name} does its work", javadoc=True)
+        self.emit(depth, f"public {return_type} {name}(int count, String label) {{")
+        for i in range(self.spec.statements_per_method):
+            self.statement(depth + 1, i)
+        default = {"int": "count", "long": "count", "boolean": "count > 0", "double": "count / 2.0"}
+        self.emit(depth + 1, f"return {default.get(return_type, 'null')};")
+        self.emit(depth, "}")
+
+    def service_class(self, depth: int, name: str, level: int):
+        self.maybe_comment(depth, f"{name} service", javadoc=True)
+        static = "static " if level else ""
+        self.emit(depth, f"public {static}class {name} {{")
+        self.emit(depth + 1, f"private final Map<String, Integer> cache{level} = new HashMap<>();")
+        for m in range(self.spec.methods_per_class):
+            verb = _VERBS[m % len(_VERBS)]
+            self.method(depth + 1, f"{verb}{self.rng.choice(_NOUNS)}{m}")
+        if level < self.spec.nesting:
+            self.service_class(depth + 1, f"{name}Inner{level + 1}", level + 1)
+        self.emit(depth, "}")
+
+    def entity_class(self, name: str):
+        fields = [(self.rng.choice(["Long", "String", "Integer", "Double"]), f"{n.lower()}{i}")
+                  for i, n in enumerate(self.rng.sample(_NOUNS, min(len(_NOUNS), self.spec.methods_per_class)))]
+        self.emit(0, "@Entity")
+        self.emit(0, f'@Table(name = "{name.lower()}")')
+        self.emit(0, f"public class {name} implements Serializable {{")
+        self.emit(1, "@Id")
+        self.emit(1, "@GeneratedValue(strategy = GenerationType.IDENTITY)")
+        self.emit(1, "private Long id;")
+        for field_type, field in fields:
+            self.maybe_comment(1, f"column {field}")
+            self.emit(1, f'@Column(name = "{field}")')
+            self.emit(1, f"private {field_type} {field};")
+        for field_type, field in fields:
+            accessor = field[0].upper() + field[1:]
+            self.emit(1, f"public {field_type} get{accessor}() {{ return {field}; }}")
+            self.emit(1, f"public void set{accessor}({field_type} {field}) {{ this.{field} = {field}; }}")
+        self.emit(1, "@Override")
+        self.emit(1, "public boolean equals(Object o) {")
+        self.emit(2, "if (this == o) return true;")
+        self.emit(2, f"if (!(o instanceof {name})) return false;")
+        self.emit(2, f"return id != null && id.equals((({name}) o).id);")
+        self.emit(1, "}")
+        self.emit(0, "}")
+
+
+def render_file(spec: CorpusSpec, index: int) -> tuple:
+    """(relative path, source) of file `index`; each file has its own seeded RNG"""
+    rng = random.Random(f"{spec.seed}:{index}")
+    package = f"com.example.bench.p{index // FILES_PER_PACKAGE}"
+    entity = rng.random() < spec.entity_ratio
+    name = f"{rng.choice(_NOUNS)}{'Entity' if entity else 'Service'}{index}"
+    writer = _JavaWriter(spec, rng)
+    writer.emit(0, f"package {package};")
+    writer.emit(0, "")
+    imports = ["java.util.*", "java.io.Serializable"] + (["javax.persistence.*"] if entity else [])
+    for imp in imports:
+        writer.emit(0, f"import {imp};")
+    writer.emit(0, "")
+    if entity:
+        writer.entity_class(name)
+    else:
+        writer.service_class(0, name, 0)
+    path = Path("src", "main", "java", *package.split("."), f"{name}.java")
+    return path, "\n".join(writer.lines) + "\n"
+
+
+def generate_corpus(spec: CorpusSpec, root) -> dict:
+    """Write the corpus below `root` unless an identical one is already there; returns its stats"""
+    root = Path(root)
+    marker = root / ".corpus.json"
+    if marker.exists():
+        stats = json.loads(marker.read_text())
+        if stats.get("digest") == spec.digest():
+            return stats
+    total_bytes = 0
+    for index in range(spec.files):
+        path, source = render_file(spec, index)
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = source.encode("utf-8")
+        target.write_bytes(data)
+        total_bytes += len(data)
+    stats = {"digest": spec.digest(), "spec": asdict(spec), "files": spec.files, "bytes": total_bytes}
+    marker.write_text(json.dumps(stats))
+    return stats
+
+
+def iter_sources(spec: CorpusSpec):
+    """Generate sources in memory, for benchmarks that do not need files on disk"""
+    for index in range(spec.files):
+        yield render_file(spec, index)[1]
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic Java repository")
+    parser.add_argument("root")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--files", type=int, help="Override the preset's file count (10 to 100000)")
+    args = parser.parse_args()
+    spec = PRESETS[args.preset]
+    if args.files:
+        spec = CorpusSpec(**dict(asdict(spec), files=args.files))
+    print(json.dumps(generate_corpus(spec, args.root)))
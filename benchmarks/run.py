@@ -0,0 +1,234 @@
+"""Benchmark harness: splitter throughput, file discovery and the end-to-end pipeline.
+
+Each case runs in its own child process so its peak RSS is its own. Results
+are compared against benchmarks/baselines.json; a metric that is worse than
+its baseline by more than its threshold is a regression and the harness
+exits non-zero. So does a case with no baseline at all, unless
+--allow-missing-baseline is given, so an unguarded case is never mistaken
+for a passing one.
+
+    python -m benchmarks.run --preset small
+    python -m benchmarks.run --preset medium --cases splitter discovery
+    python -m benchmarks.run --preset small --update-baseline
+    python -m benchmarks.run --preset tiny --allow-missing-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmarks.corpus import PRESETS, CorpusSpec, generate_corpus, iter_sources
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+CASES = ("splitter", "discovery", "pipeline")
+
+# Metric -> (better direction, tolerated relative change before it counts as a regression)
+THRESHOLDS = {
+    "mb_per_s": ("higher", 0.15),
+    "classes_per_s": ("higher", 0.15),
+    "files_per_s": ("higher", 0.15),
+    "seconds": ("lower", 0.20),
+    "peak_rss_mb": ("lower", 0.25),
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set of this process and its (parsing pool) children; ru_maxrss is in KiB on Linux"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+
+def bench_splitter(spec: CorpusSpec, workdir: Path, args) -> dict:
+    from src.code_processor import CodeProcessor
+    processor = CodeProcessor(logging.getLogger("JavaCodeAnalyzer"), None)
+    sources = list(iter_sources(spec))
+    size = sum(len(s.encode("utf-8")) for s in sources)
+    best, classes = None, 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        classes = sum(len(processor.split_into_classes(code)) for code in sources)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": round(best, 4),
+        "mb_per_s": round(size / 1e6 / best, 2),
+        "classes_per_s": round(classes / best, 1),
+    }
+
+
+def bench_discovery(spec: CorpusSpec, workdir: Path, args) -> dict:
+    from src.data_loader import DataLoader
+    root = workdir / f"corpus-{spec.digest()}"
+    generate_corpus(spec, root)
+    loader = DataLoader(logging.getLogger("JavaCodeAnalyzer"), None)
+    best, found = None, 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        found = len(loader.list_code_files(str(root), [".java"]))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    if found != spec.files:
+        raise RuntimeError(f"Discovery found {found} of {spec.files} files")
+    return {"seconds": round(best, 4), "files_per_s": round(found / best, 1)}
+
+
+def bench_pipeline(spec: CorpusSpec, workdir: Path, args) -> dict:
+    """Full run_analysis on a local git repo of the corpus against the fake LLM backend"""
+    from git import Repo
+    root = workdir / f"corpus-{spec.digest()}"
+    generate_corpus(spec, root)
+    if not (root / ".git").exists():
+        repo = Repo.init(root)
+        repo.git.add("-A")
+        repo.git.commit("-m", "Synthetic corpus", "--no-gpg-sign",
+                        env={**os.environ, "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@localhost",
+                             "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"})
+
+    # A fresh run directory: clone, outputs, logs and caches all start empty
+    run_dir = workdir / f"run-{spec.digest()}"
+    shutil.rmtree(run_dir, ignore_errors=True)
+    run_dir.mkdir(parents=True)
+    os.chdir(run_dir)
+
+    from config.config import app_config, eval_config, llm_config
+    llm_config.backend = "fake"
+    llm_config.fake_latency_ms = args.fake_latency_ms
+    llm_config.fake_error_rate = 0
+    llm_config.fake_rate_limit_rate = 0
+    app_config.codebase_repo = str(root)
+    app_config.log_level = "WARNING"
+    app_config.incremental = False
+    app_config.cache_enabled = False
+    app_config.journal_enabled = False
+    app_config.store_enabled = False
+    eval_config.enable_evaluation = False
+
+    from src.main import CodebaseAnalyzer
+    from utils.metrics import metrics
+    start = time.perf_counter()
+    asyncio.run(CodebaseAnalyzer().run_analysis())
+    elapsed = time.perf_counter() - start
+    classes = metrics.counters.get(("classes_found_total", ()), 0)
+    return {
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(spec.files / elapsed, 1),
+        "classes_per_s": round(classes / elapsed, 1),
+    }
+
+
+BENCHMARKS = {"splitter": bench_splitter, "discovery": bench_discovery, "pipeline": bench_pipeline}
+
+
+def spec_for(args) -> CorpusSpec:
+    spec = PRESETS[args.preset]
+    overrides = {k: v for k, v in (("files", args.files), ("seed", args.seed)) if v is not None}
+    return CorpusSpec(**dict(asdict(spec), **overrides))
+
+
+def run_child(args) -> int:
+    """Run one case in this process and print its result as the last stdout line"""
+    spec = spec_for(args)
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    result = BENCHMARKS[args.child](spec, workdir, args)
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+    return 0
+
+
+def run_case(case: str, args) -> dict:
+    command = [sys.executable, "-m", "benchmarks.run", "--child", case, "--preset", args.preset,
+               "--workdir", args.workdir, "--repeat", str(args.repeat),
+               "--fake-latency-ms", str(args.fake_latency_ms)]
+    if args.files is not None:
+        command += ["--files", str(args.files)]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    repo_root = Path(__file__).resolve().parent.parent
+    proc = subprocess.run(command, cwd=repo_root, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONPATH": str(repo_root)})
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(key: str, result: dict, baselines: dict) -> list:
+    """Regression messages for `result` against the stored baseline of `key`"""
+    baseline = baselines.get(key)
+    if not baseline:
+        return []
+    regressions = []
+    for metric, (direction, tolerance) in THRESHOLDS.items():
+        if metric not in result or not baseline.get(metric):
+            continue
+        change = (result[metric] - baseline[metric]) / baseline[metric]
+        worse = -change if direction == "higher" else change
+        if worse > tolerance:
+            regressions.append(f"{key} {metric}: {result[metric]} vs baseline {baseline[metric]} "
+                               f"({change:+.1%}, threshold {tolerance:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--files", type=int, help="Override the preset's file count (10 to 100000)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of the in-process cases; the best counts")
+    parser.add_argument("--fake-latency-ms", type=float, default=20, help="Median latency of the fake LLM")
+    parser.add_argument("--workdir", default="benchmarks/.work", help="Corpora and pipeline run directories")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Only warn about cases that have no baseline instead of failing")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return run_child(args)
+
+    baseline_path = Path(args.baseline)
+    baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    results, regressions, missing, failed = {}, [], [], False
+    for case in args.cases:
+        key = f"{args.preset}{'' if args.files is None else f'-{args.files}'}/{case}"
+        result = run_case(case, args)
+        results[key] = result
+        if "error" in result:
+            failed = True
+            print(f"{key:<28} ERROR {result['error']}")
+            continue
+        print(f"{key:<28} " + "  ".join(f"{k}={v}" for k, v in result.items()))
+        if key not in baselines:
+            missing.append(key)
+        regressions += compare(key, result, baselines)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.update_baseline:
+        baselines.update({k: v for k, v in results.items() if "error" not in v})
+        baseline_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline updated: {baseline_path}")
+        return 1 if failed else 0
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    for key in missing:
+        print(f"NO BASELINE {key}: not compared; record one with --update-baseline")
+    if missing and not args.allow_missing_baseline:
+        return 1
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
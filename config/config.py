@@ -1,14 +1,32 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 
 @dataclass
 class LLMConfig:
+    backend: str = os.getenv("LLM_BACKEND", "cohere")  # "cohere" or "fake" (offline stand-in for load tests)
     model_name: str = "command-r-plus"
     api_key: str = os.getenv("COHERE_API_KEY", "QPc13bRgD2Bzrs*********************")
     temperature: float = 0.7
     max_tokens: int = 2048
     max_retries: int = 3
     timeout: int = 60
+    requests_per_minute: int = 0  # Provider rate limits; 0 disables the bucket
+    tokens_per_minute: int = 0
+    min_concurrency: int = 1
+    max_concurrency: int = 32  # Upper bound for the adaptive in-flight call limit
+    target_latency: float = 15.0  # Seconds; faster calls let the concurrency limit grow
+    retry_base_delay: float = 1.0  # Seconds; backoff is a random delay up to base * 2**attempt
+    retry_max_delay: float = 60.0
+    retry_budget_ratio: float = 0.2  # Retries allowed per first attempt across the run
+    retry_budget_min: int = 10
+    breaker_failure_threshold: int = 5  # Consecutive overload/network failures that pause dispatch
+    breaker_cooldown: float = 30.0  # Seconds before a probe call is let through
+    # Fake backend behavior: log-normal latency around the median, injected failure rates
+    fake_latency_ms: float = 800.0
+    fake_latency_sigma: float = 0.5
+    fake_error_rate: float = 0.0
+    fake_rate_limit_rate: float = 0.0
+    fake_seed: int = 0
 @dataclass
 class EvalConfig:
     enable_evaluation: bool = False
@@ -18,6 +36,16 @@ class EvalConfig:
   
     evaluation_output_path = "output/evaluation_result.csv"
     metrics = ["answer_correctness", "context_precision", "context_recall", "faithfulness"]
+    embedding_model: str = "embed-english-v3.0"
+    embedding_cache_enabled: bool = True
+    embedding_cache_dir: str = "cache/embeddings"  # Memory-mapped vectors + row index, one pair per model
+    lexical_prescore: bool = True  # Decide clear pairs locally; only the uncertain band goes to RAGAS
+    lexical_accept: float = 0.8  # Mean of token F1 and ROUGE-L at or above which a pair with matching names/signatures is right
+    lexical_reject: float = 0.15  # Score at or below which a pair is wrong
+    score_cache_enabled: bool = True
+    score_cache_path: str = "cache/evaluation_scores.sqlite"  # Per-pair metric scores, reused while the pair is unchanged
+    stream_workers: int = 2  # Concurrent scoring batches during a run, separate from the analysis LLM budget
+    stream_batch_size: int = 32  # Max pairs per scoring batch
 
     
     def __post_init__(self):
@@ -31,12 +59,50 @@ class AppConfig:
     codebase_repo: str = "https://github.com/janjakovacevic/SakilaProject"
     output_json: str = "outputs/javacode_analysis.json"
     project_name: str = "SakilaProject"
-    chunk_size: int = 3000
-    chunk_overlap: int = 200
-    max_concurrent: int = 5  # Increased concurrency limit
+    chunk_size: int = 1500  # Max estimated tokens of code per LLM request; larger classes are split by member
+    chunk_overlap: int = 200  # Tokens of class header/field context repeated in every split part
+    max_concurrent: int = 5  # Initial in-flight LLM call limit, adapted at runtime
+    max_classes_in_flight: int = 64  # Classes dispatched to the LLM stage at once, costliest first
+    latency_history_path: str = "cache/latency_history.json"  # Per-class latencies used to order the next run
+    schedule_window: int = 512  # Parsed classes buffered for dispatch; longest-first holds within it, 0 for no limit
+    deadline_seconds: float = 0  # Wall-clock budget for a run (--deadline); 0 means none
+    parse_workers: int = os.cpu_count() or 1  # Processes for reading/splitting files; <= 1 uses a thread
+    parse_batch_size: int = 64  # Files per parsing task, amortizes inter-process overhead
     log_level: str = "DEBUG"
     log_file: str = "logs/analysis.log"
     timestamp_format: str = "%Y%m%d_%H%M%S" 
+    clone_mode: str = "full"  # "full" or "blobless" (depth 1, no checkout, sources read from git objects)
+    clone_ref: str = ""  # Branch or tag to analyze; empty means the remote default branch
+    # gitignore-style patterns pruned during file discovery (in addition to .gitignore files)
+    exclude_globs: list = field(default_factory=lambda: [
+        ".git/", "target/", "build/", "out/", "node_modules/", ".gradle/", ".idea/",
+        "generated-sources/", "generated-test-sources/", "generated/"
+    ])
+    respect_gitignore: bool = True
+    incremental: bool = False  # Re-analyze only files changed since the last recorded commit
+    pack_requests: bool = True  # Pack several small classes into one LLM request
+    pack_class_max_tokens: int = 400  # Classes at or below this size are eligible for packing
+    pack_max_tokens: int = 2000  # Code token budget of one packed request
+    pack_max_classes: int = 8
+    pack_linger_ms: int = 50  # How long a partial pack waits for more classes
+    dedup_enabled: bool = True  # Analyze near-duplicate classes once and adapt the result by renaming
+    dedup_threshold: float = 0.9  # Jaccard similarity of identifier-normalized shingles
+    dedup_max_representatives: int = 20000  # Representatives kept for matching, oldest dropped first; 0 for no limit
+    stream_output: bool = True  # Append each component to an NDJSON stream as soon as it completes
+    stream_batch_size: int = 50  # Components buffered per write
+    stream_fsync_interval: float = 5.0  # Seconds between fsyncs of the stream
+    finalize_stream: bool = True  # Build the aggregated JSON output from the stream at the end of the run
+    journal_enabled: bool = True  # Journal completed files so an interrupted run can be resumed
+    journal_path: str = "cache/run_journal.sqlite"
+    store_enabled: bool = False  # Also index each run into a queryable SQLite store (see src/query_store.py)
+    store_path: str = "outputs/analysis_store.sqlite"
+    graph_enabled: bool = True  # Resolve class dependencies into a graph written next to the output
+    metrics_enabled: bool = True  # Per-stage spans, counters and latency histograms, written as <output>_<run>.metrics.json
+    metrics_prometheus_path: str = "outputs/metrics/javacode_analyzer.prom"  # Textfile for node_exporter's textfile collector
+    cache_enabled: bool = True
+    cache_path: str = "cache/analysis_cache.sqlite"
+    cache_max_size_mb: int = 256
+    cache_max_age_days: int = 30
 
 # Initialize configuration
 llm_config = LLMConfig()
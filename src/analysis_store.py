@@ -0,0 +1,237 @@
+import json
+import os
+import re
+import sqlite3
+from pathlib import PurePath
+from typing import Iterable, List, Optional
+
+# Directories a package path starts below, most specific first (Maven/Gradle layout, then plain src/)
+_SOURCE_ROOTS = ("java", "src")
+_PACKAGE_SEGMENT = re.compile(r"^[A-Za-z_$][\w$]*$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_pk INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(project_id),
+    run_id TEXT NOT NULL,
+    commit_sha TEXT,
+    analysis_date TEXT,
+    project_overview TEXT,
+    UNIQUE (project_id, run_id)
+);
+CREATE TABLE IF NOT EXISTS classes (
+    class_pk INTEGER PRIMARY KEY,
+    run_pk INTEGER NOT NULL REFERENCES runs(run_pk),
+    class_name TEXT NOT NULL,
+    package TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    overview TEXT,
+    complexity TEXT
+);
+CREATE TABLE IF NOT EXISTS methods (
+    class_pk INTEGER NOT NULL REFERENCES classes(class_pk),
+    name TEXT NOT NULL,
+    signature TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    class_pk INTEGER NOT NULL REFERENCES classes(class_pk),
+    target TEXT NOT NULL,
+    target_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classes_run_name ON classes(run_pk, class_name);
+CREATE INDEX IF NOT EXISTS idx_classes_name ON classes(class_name);
+CREATE INDEX IF NOT EXISTS idx_classes_source ON classes(source_file);
+CREATE INDEX IF NOT EXISTS idx_classes_package ON classes(package, complexity);
+CREATE INDEX IF NOT EXISTS idx_classes_complexity ON classes(complexity);
+CREATE INDEX IF NOT EXISTS idx_methods_class ON methods(class_pk);
+CREATE INDEX IF NOT EXISTS idx_methods_name ON methods(name);
+CREATE INDEX IF NOT EXISTS idx_dependencies_class ON dependencies(class_pk);
+CREATE INDEX IF NOT EXISTS idx_dependencies_target ON dependencies(target);
+CREATE INDEX IF NOT EXISTS idx_dependencies_target_name ON dependencies(target_name);
+CREATE VIRTUAL TABLE IF NOT EXISTS class_text USING fts5(class_name, overview, methods);
+"""
+
+def package_of(source_file: str) -> str:
+    """Package of a class guessed from its path below the source root (e.g. src/main/java/com/x/Foo.java -> com.x).
+
+    Only used for components of outputs that predate the recorded `package`.
+    """
+    parts = PurePath(source_file).parts[:-1]
+    for root in _SOURCE_ROOTS:
+        if root in parts:
+            segments = parts[len(parts) - parts[::-1].index(root):]
+            if all(_PACKAGE_SEGMENT.match(s) for s in segments):
+                return ".".join(segments)
+    return ""
+
+
+class AnalysisStore:
+    """Indexed SQLite store of analysis runs across projects.
+
+    Runs are normalized into projects, runs, classes, methods and
+    dependencies tables, indexed by class name, source file, package,
+    complexity and dependency target, with an FTS5 index over class names,
+    overviews and method descriptions. Dependencies are the class's imports
+    plus the classes of its own package it references, which Java uses
+    without an import.
+    """
+
+    def __init__(self, logger, exception_handler, path: str):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        # Type names each class of the run being written references, resolved once the run is complete
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS class_references (class_pk INTEGER NOT NULL, name TEXT NOT NULL)")
+        self.conn.commit()
+
+    def write_run(self, run_id: str, header: dict, components: Iterable[dict], batch_size: int = 500) -> int:
+        """Store one run, replacing an earlier copy of the same run. Returns the class count."""
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO projects (name) VALUES (?)", (header.get("project", ""),))
+            project_id = self.conn.execute(
+                "SELECT project_id FROM projects WHERE name = ?", (header.get("project", ""),)
+            ).fetchone()[0]
+            self._delete_run(project_id, run_id)
+            run_pk = self.conn.execute(
+                "INSERT INTO runs (project_id, run_id, commit_sha, analysis_date, project_overview) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (project_id, run_id, header.get("commit_sha"), header.get("analysis_date"),
+                 json.dumps(header.get("project_overview", {})))
+            ).lastrowid
+
+            count = 0
+            batch = []
+            for component in components:
+                batch.append(component)
+                if len(batch) >= batch_size:
+                    count += self._insert_classes(run_pk, batch)
+                    batch = []
+            count += self._insert_classes(run_pk, batch)
+            self._insert_package_dependencies(run_pk)
+        self.logger.info(f"Stored {count} classes of run {run_id} in {self.path}")
+        return count
+
+    def _delete_run(self, project_id: int, run_id: str):
+        row = self.conn.execute(
+            "SELECT run_pk FROM runs WHERE project_id = ? AND run_id = ?", (project_id, run_id)
+        ).fetchone()
+        if not row:
+            return
+        class_pks = "SELECT class_pk FROM classes WHERE run_pk = ?"
+        for table in ("methods", "dependencies"):
+            self.conn.execute(f"DELETE FROM {table} WHERE class_pk IN ({class_pks})", row)
+        self.conn.execute(f"DELETE FROM class_text WHERE rowid IN ({class_pks})", row)
+        self.conn.execute("DELETE FROM classes WHERE run_pk = ?", row)
+        self.conn.execute("DELETE FROM runs WHERE run_pk = ?", row)
+
+    def _insert_classes(self, run_pk: int, components: List[dict]) -> int:
+        methods, dependencies, texts, references = [], [], [], []
+        for c in components:
+            source_file = c.get("source_file", "")
+            package = c["package"] if "package" in c else package_of(source_file)
+            class_pk = self.conn.execute(
+                "INSERT INTO classes (run_pk, class_name, package, source_file, overview, complexity) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_pk, c.get("class_name", ""), package, source_file,
+                 c.get("overview", ""), str(c.get("complexity", "")).lower())
+            ).lastrowid
+            references.extend((class_pk, name) for name in c.get("references", []))
+            class_methods = c.get("methods", [])
+            methods.extend(
+                (class_pk, m.get("name", ""), m.get("signature", ""), m.get("description", ""))
+                for m in class_methods
+            )
+            dependencies.extend((class_pk, d, d.rsplit(".", 1)[-1]) for d in c.get("dependencies", []))
+            texts.append((class_pk, c.get("class_name", ""), c.get("overview", ""),
+                          " ".join(f"{m.get('name', '')} {m.get('description', '')}" for m in class_methods)))
+        self.conn.executemany("INSERT INTO methods VALUES (?, ?, ?, ?)", methods)
+        self.conn.executemany("INSERT INTO dependencies VALUES (?, ?, ?)", dependencies)
+        self.conn.executemany("INSERT INTO class_text (rowid, class_name, overview, methods) VALUES (?, ?, ?, ?)", texts)
+        self.conn.executemany("INSERT INTO class_references VALUES (?, ?)", references)
+        return len(components)
+
+    def _insert_package_dependencies(self, run_pk: int):
+        """Add a dependency for each referenced class of the same package that is not shadowed by an import"""
+        self.conn.execute(
+            "INSERT INTO dependencies (class_pk, target, target_name) "
+            "SELECT DISTINCT c.class_pk, CASE t.package WHEN '' THEN t.class_name "
+            "ELSE t.package || '.' || t.class_name END, t.class_name "
+            "FROM class_references r JOIN classes c ON c.class_pk = r.class_pk "
+            "JOIN classes t ON t.run_pk = c.run_pk AND t.package = c.package AND t.class_name = r.name "
+            "WHERE c.run_pk = ? AND t.class_pk != c.class_pk AND NOT EXISTS ("
+            "SELECT 1 FROM dependencies d WHERE d.class_pk = c.class_pk AND d.target_name = r.name)",
+            (run_pk,)
+        )
+        self.conn.execute("DELETE FROM class_references")
+
+    def _run_filter(self, project: Optional[str], all_runs: bool):
+        """SQL condition on classes.run_pk: the latest run of each (or the given) project unless all_runs"""
+        conditions, params = [], []
+        if project:
+            conditions.append("r.project_id = (SELECT project_id FROM projects WHERE name = ?)")
+            params.append(project)
+        if not all_runs:
+            conditions.append("r.run_pk = (SELECT MAX(r2.run_pk) FROM runs r2 WHERE r2.project_id = r.project_id)")
+        where = " AND ".join(conditions) or "1"
+        return f"c.run_pk IN (SELECT r.run_pk FROM runs r WHERE {where})", params
+
+    def _select_classes(self, condition: str, params: list, project: Optional[str], all_runs: bool) -> List[dict]:
+        run_condition, run_params = self._run_filter(project, all_runs)
+        rows = self.conn.execute(
+            "SELECT p.name, r.run_id, c.class_name, c.package, c.complexity, c.source_file "
+            "FROM classes c JOIN runs r ON r.run_pk = c.run_pk JOIN projects p ON p.project_id = r.project_id "
+            f"WHERE {condition} AND {run_condition} ORDER BY p.name, r.run_id, c.package, c.class_name",
+            params + run_params
+        )
+        keys = ("project", "run_id", "class_name", "package", "complexity", "source_file")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def dependents(self, target: str, project: str = None, all_runs: bool = False) -> List[dict]:
+        """Classes depending on `target`, given as a simple or fully qualified name"""
+        column = "target" if "." in target else "target_name"
+        return self._select_classes(
+            f"c.class_pk IN (SELECT class_pk FROM dependencies WHERE {column} = ?)", [target], project, all_runs
+        )
+
+    def classes(self, name: str = None, package: str = None, complexity: str = None,
+                project: str = None, all_runs: bool = False) -> List[dict]:
+        """Classes filtered by name, package (including subpackages) and complexity"""
+        conditions, params = ["1"], []
+        if name:
+            conditions.append("c.class_name = ?")
+            params.append(name)
+        if package:
+            conditions.append("(c.package = ? OR c.package LIKE ?)")
+            params += [package, package + ".%"]
+        if complexity:
+            conditions.append("c.complexity = ?")
+            params.append(complexity.lower())
+        return self._select_classes(" AND ".join(conditions), params, project, all_runs)
+
+    def search(self, query: str, project: str = None, all_runs: bool = False) -> List[dict]:
+        """Full-text search over class names, overviews and method descriptions"""
+        return self._select_classes(
+            "c.class_pk IN (SELECT rowid FROM class_text WHERE class_text MATCH ?)", [query], project, all_runs
+        )
+
+    def runs(self) -> List[dict]:
+        rows = self.conn.execute(
+            "SELECT p.name, r.run_id, r.commit_sha, r.analysis_date, COUNT(c.class_pk) "
+            "FROM runs r JOIN projects p ON p.project_id = r.project_id "
+            "LEFT JOIN classes c ON c.run_pk = r.run_pk GROUP BY r.run_pk ORDER BY p.name, r.run_id"
+        )
+        keys = ("project", "run_id", "commit_sha", "analysis_date", "classes")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        self.conn.close()
@@ -1,60 +1,139 @@
 import re
+from typing import List, Tuple
+
+from config.config import app_config
+from src.java_lexer import (
+    JavaScan, extract_imports, member_ranges, method_signatures, render_span, scan_java
+)
+
+# Rough BPE-style estimate: punctuation is one token, identifiers and numbers
+# cost one token per ~6 characters.
+_TOKEN_PATTERN = re.compile(r'\w{1,6}|[^\w\s]')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
 
 class CodeProcessor:
     def __init__(self, logger, exception_handler):
         self.logger = logger
         self.exception_handler = exception_handler
 
-    def split_into_classes(self, code: str) -> list:
-        """Split Java code into class-level chunks with better parsing"""
-        # Remove block comments
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        # Remove line comments
-        code = re.sub(r'//.*', '', code)
-        
-        # Pattern to detect class/interface/enum/record declarations
-        class_pattern = re.compile(
-            r'^\s*(public\s+|protected\s+|private\s+|abstract\s+|final\s+|static\s+)*'
-            r'(class|interface|enum|record)\s+(\w+)'
-        )
-        
-        chunks = []
-        current_chunk = []
-        brace_count = 0
-        in_class = False
-        
-        for line in code.splitlines():
-            stripped = line.strip()
-            if not stripped:
-                continue
-                
-            # Check for class declaration
-            class_match = class_pattern.match(stripped)
-            if class_match and not in_class:
-                if current_chunk:
-                    chunks.append('\n'.join(current_chunk))
-                    current_chunk = []
-                current_chunk.append(line)
-                in_class = True
-                brace_count = 0
-                self.logger.debug(f"Found class: {class_match.group(3)}")
-            elif in_class:
-                current_chunk.append(line)
-            
-            # Track braces
-            if in_class:
-                brace_count += line.count('{')
-                brace_count -= line.count('}')
-                
-                # End of class when braces balance
-                if brace_count <= 0:
-                    chunks.append('\n'.join(current_chunk))
-                    current_chunk = []
-                    in_class = False
-                    brace_count = 0
-        
-        # Add any remaining content
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
-        
-        return chunks
\ No newline at end of file
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return len(_TOKEN_PATTERN.findall(text))
+
+    def scan(self, code: str) -> JavaScan:
+        """Locate every class/interface/enum/record/annotation type in one pass"""
+        return scan_java(code)
+
+    def extract_imports(self, code: str) -> List[str]:
+        """Imported names of a whole source file, e.g. `java.util.List`"""
+        return extract_imports(code)[1]
+
+    def extract_package_imports(self, code: str) -> Tuple[str, List[str]]:
+        """Package name and imported names of a whole source file"""
+        return extract_imports(code)
+
+    def type_references(self, chunk: str) -> List[str]:
+        """Capitalized identifiers (type names by convention) used in a class chunk, outside literals"""
+        return sorted({name for name in _IDENTIFIER.findall(self.scan(chunk).masked) if name[0].isupper()})
+
+    def extract_structure(self, chunk: str, imports: List[str] = None) -> dict:
+        """Static skeleton of one class chunk in the JavaClassAnalysis shape.
+
+        class_name, method names/signatures and dependencies come straight
+        from the source; overview, method descriptions and complexity are left
+        for the LLM to fill in. Dependencies are the file's imports that the
+        chunk actually references (wildcard imports are always kept).
+        """
+        scan = self.scan(chunk)
+        if not scan.spans:
+            return {"class_name": "Unknown", "overview": "", "methods": [],
+                    "dependencies": [], "complexity": "unknown"}
+
+        identifiers = set(_IDENTIFIER.findall(scan.masked))
+        dependencies = []
+        for name in imports or []:
+            simple = name.rsplit(".", 1)[-1]
+            if simple == "*" or simple in identifiers:
+                dependencies.append(name)
+
+        return {
+            "class_name": scan.spans[0].name,
+            "overview": "",
+            "methods": [
+                {"name": m.name, "signature": m.signature, "description": ""}
+                for m in method_signatures(chunk, scan, 0)
+            ],
+            "dependencies": dependencies,
+            "complexity": "unknown",
+        }
+
+    def split_into_classes(self, code: str, scan: JavaScan = None) -> list:
+        """Split Java code into one chunk per type declaration.
+
+        Nested types get their own chunk and appear in their parent only as a
+        `{ ... }` stub, so no code is sent to the LLM twice. Chunks follow the
+        order of `scan.spans`; pass `scan` when the caller already has it.
+        """
+        scan = scan or self.scan(code)
+        return [render_span(code, scan, index) for index in range(len(scan.spans))]
+
+    def split_to_token_budget(self, chunk: str, max_tokens: int = None,
+                              context_tokens: int = None) -> List[str]:
+        """Split an oversized class chunk at member boundaries.
+
+        Each part repeats the class declaration plus as many field declarations
+        as fit in `context_tokens` (app_config.chunk_overlap), followed by whole
+        members up to `max_tokens` (app_config.chunk_size). A chunk already
+        within budget is returned unchanged as a single part.
+        """
+        max_tokens = max_tokens or app_config.chunk_size
+        context_tokens = app_config.chunk_overlap if context_tokens is None else context_tokens
+        if self.estimate_tokens(chunk) <= max_tokens:
+            return [chunk]
+
+        scan = self.scan(chunk)
+        if not scan.spans:
+            return [chunk]
+        span = scan.spans[0]
+        members = member_ranges(scan, 0)
+        if len(members) < 2:
+            self.logger.warning(f"Class {span.name} exceeds token budget but has no member boundaries to split on")
+            return [chunk]
+
+        header = chunk[span.start:span.body_start + 1]
+        fields = []
+        field_tokens = 0
+        for start, end in members:
+            text = scan.masked[start:end]
+            if text.rstrip().endswith(";") and "{" not in text and "(" not in text.split("=")[0]:
+                tokens = self.estimate_tokens(chunk[start:end])
+                if field_tokens + tokens > context_tokens:
+                    break
+                fields.append((start, end))
+                field_tokens += tokens
+        context = "\n".join([header] + ["    " + chunk[s:e].strip() for s, e in fields])
+        members = [m for m in members if m not in fields]
+
+        # Reserve the part marker (with the largest possible part numbers) and the closing brace
+        marker = f"// Part {len(members)} of {len(members)} of {span.name}"
+        budget = max(1, max_tokens - self.estimate_tokens(f"{marker}\n{context}\n}}"))
+        groups, current, current_tokens = [], [], 0
+        for start, end in members:
+            text = chunk[start:end].strip()
+            tokens = self.estimate_tokens(text)
+            if current and current_tokens + tokens > budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+            if tokens > budget:
+                self.logger.warning(f"Member of {span.name} alone exceeds the token budget ({tokens} tokens)")
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+
+        self.logger.debug(f"Split {span.name} into {len(groups)} parts of <= {max_tokens} tokens")
+        return [
+            f"// Part {i} of {len(groups)} of {span.name}\n{context}\n    "
+            + "\n    ".join(group) + "\n}"
+            for i, group in enumerate(groups, 1)
+        ]
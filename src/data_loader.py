@@ -1,56 +1,301 @@
+import os
+import re
+import subprocess
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 from utils.logger import Logger
 from utils.exception_handler import ExceptionHandler
 from dataclasses import dataclass
+from config.config import app_config
+from utils.metrics import metrics
+
+OVERVIEW_CANDIDATES = [
+    "README.md", "readme.md", "README.txt", "readme.txt",
+    "OVERVIEW.md", "DESCRIPTION.md", "ABOUT.md"
+]
+
+class IgnoreRules:
+    """Minimal .gitignore-style matcher.
+
+    Patterns follow gitignore semantics: `!` negates, a trailing `/` matches
+    directories only, a leading or inner `/` anchors the pattern to the
+    directory that declared it, and `*`, `?` and `**` are supported. The last
+    matching rule wins.
+    """
+
+    def __init__(self, rules=()):
+        # (base, regex, negate, dir_only) with base a posix path relative to the walk root
+        self.rules = tuple(rules)
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        regex, i = "", 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+            elif pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+            elif pattern[i] == "*":
+                regex += "[^/]*"
+                i += 1
+            elif pattern[i] == "?":
+                regex += "[^/]"
+                i += 1
+            elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+                close = pattern.index("]", i + 1)
+                regex += "[" + pattern[i + 1:close].replace("!", "^", 1) + "]"
+                i = close + 1
+            else:
+                regex += re.escape(pattern[i])
+                i += 1
+        return regex
+
+    def extend(self, base: str, lines: Iterable[str]) -> "IgnoreRules":
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            body = self._translate(line.lstrip("/"))
+            prefix = "^" if anchored else "^(?:.*/)?"
+            rules.append((base, re.compile(prefix + body + "$"), negate, dir_only))
+        return IgnoreRules(rules)
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for base, regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                candidate = rel_path[len(base) + 1:]
+            else:
+                candidate = rel_path
+            if regex.match(candidate):
+                ignored = not negate
+        return ignored
+
 
 class DataLoader:
-    def __init__(self, logger, exception_handler):
+    # Files can be read directly by path, e.g. from a parsing worker process
+    reads_from_disk = True
+
+    def __init__(self, logger, exception_handler, exclude_globs: Optional[List[str]] = None,
+                 respect_gitignore: Optional[bool] = None):
         self.logger = logger
         self.exception_handler = exception_handler
+        self.exclude_globs = app_config.exclude_globs if exclude_globs is None else exclude_globs
+        self.respect_gitignore = app_config.respect_gitignore if respect_gitignore is None else respect_gitignore
+
+    def walk_files(self, base_dir: str) -> Iterator[Path]:
+        """Single-pass, pruned scandir walk yielding every non-ignored file"""
+        root_rules = IgnoreRules().extend("", self.exclude_globs)
+        stack = [(base_dir, "", root_rules)]
+        while stack:
+            dir_path, rel_dir, rules = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError as ex:
+                self.logger.warning(f"Cannot scan {dir_path}: {ex}")
+                continue
+
+            if self.respect_gitignore:
+                for entry in entries:
+                    if entry.name == ".gitignore" and entry.is_file():
+                        with open(entry.path, encoding="utf-8", errors="ignore") as f:
+                            rules = rules.extend(rel_dir, f)
+                        break
+
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if rules.is_ignored(rel_path, is_dir):
+                    continue
+                if is_dir:
+                    subdirs.append((entry.path, rel_path, rules))
+                elif entry.is_file():
+                    yield Path(entry.path)
+            # Reverse so directories are visited in listing order
+            stack.extend(reversed(subdirs))
+
+    def iter_code_files(self, base_dir: str, extensions: List[str]) -> Iterator[Path]:
+        """Yield files matching any of `extensions` as soon as they are found"""
+        suffixes = tuple(extensions)
+        # Walk time only, excluding the time the consumer holds each yielded file
+        walk_seconds, found = 0.0, 0
+        start = time.monotonic()
+        try:
+            for f in self.walk_files(base_dir):
+                if f.name.endswith(suffixes):
+                    walk_seconds += time.monotonic() - start
+                    found += 1
+                    yield f
+                    start = time.monotonic()
+        except Exception as ex:
+            self.logger.error(f"Exception in iter_code_files: {ex}")
+        finally:
+            walk_seconds += time.monotonic() - start
+            metrics.observe("discovery_seconds", walk_seconds)
+            metrics.count("files_discovered_total", found)
+
+    def list_code_files(self, base_dir: str, extensions: List[str]) -> List[Path]:
+        files = list(self.iter_code_files(base_dir, extensions))
+        self.logger.info(f"Found {len(files)} code files")
+        return files
+
+    def read_file(self, file_path: Path) -> str:
+        try:
+            text = file_path.read_text(encoding="utf-8", errors="ignore")
+            metrics.count("bytes_read_total", len(text))
+            return text
+        except Exception as ex:
+            self.exception_handler.handle(ex, f"read_file: {file_path}")
+            return ""
+
+    def find_project_overview_file(self, base_dir: str) -> Optional[Path]:
+        try:
+            base_path = Path(base_dir)
+            for fname in OVERVIEW_CANDIDATES:
+                candidate = base_path / fname
+                if candidate.exists():
+                    return candidate
+                    
+            # Fallback to any markdown file with "readme" in name, else a main
+            # class under src/, both found in the same walk
+            src_dir = base_path / "src"
+            main_class = None
+            for f in self.walk_files(base_dir):
+                name = f.name.lower()
+                if "readme" in name and f.suffix.lower() in ['.md', '.txt']:
+                    return f
+                if main_class is None and f.suffix == ".java" and "main" in name and src_dir in f.parents:
+                    main_class = f
+            return main_class
+        except Exception as ex:
+            self.logger.error(f"Exception in find_project_overview_file: {ex}")
+        return None
+
+class GitObjectDataLoader(DataLoader):
+    """DataLoader backend that reads sources from the git object store.
+
+    Works on a no-checkout (blobless) clone: paths are listed from the tree of
+    `ref` and file contents are streamed from blobs, so only the files that
+    are actually analyzed are ever downloaded. Paths keep the same
+    `<base_dir>/<repo path>` shape as the working-tree loader.
+    """
+    reads_from_disk = False
+
+    def __init__(self, logger, exception_handler, ref: str = "HEAD"):
+        super().__init__(logger, exception_handler)
+        self.ref = ref
+        self.repo = None
+        self.blobs = {}
+        # GitPython is not thread-safe: the repo's persistent `git cat-file`
+        # process is shared, and parse batches read from worker threads
+        self.lock = threading.Lock()
+
+    def _index_tree(self, base_dir: str):
+        # Imported here so the working-tree loader does not need GitPython
+        from git import Repo
+        from git.db import GitCmdObjectDB
+
+        with self.lock:
+            if self.repo is not None and Path(self.repo.git_dir).parent == Path(base_dir).resolve():
+                return
+            # GitCmdObjectDB goes through `git cat-file`, which lazily fetches missing blobs
+            self.repo = Repo(base_dir, odbt=GitCmdObjectDB)
+            base_path = Path(base_dir)
+            self.blobs = {
+                base_path / item.path: item
+                for item in self.repo.commit(self.ref).tree.traverse()
+                if item.type == "blob"
+            }
+
+    def prefetch(self, paths: List[Path]):
+        """Download the blobs for `paths` in a single fetch instead of one round-trip each"""
+        oids = [self.blobs[p].hexsha for p in paths if p in self.blobs]
+        if not oids:
+            return
+        try:
+            subprocess.run(
+                ["git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin",
+                 "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+                 "--filter=blob:none", "--stdin"],
+                cwd=self.repo.working_tree_dir or self.repo.git_dir,
+                input="\n".join(oids), text=True, capture_output=True, check=True
+            )
+            self.logger.info(f"Prefetched {len(oids)} blobs")
+        except Exception as ex:
+            # Blobs are still fetched lazily on read
+            self.logger.warning(f"Blob prefetch failed: {ex}")
+
+    def iter_code_files(self, base_dir: str, extensions: List[str]) -> Iterator[Path]:
+        yield from self.list_code_files(base_dir, extensions)
 
     def list_code_files(self, base_dir: str, extensions: List[str]) -> List[Path]:
         files = []
         try:
+            self._index_tree(base_dir)
+            suffixes = tuple(extensions)
             base_path = Path(base_dir)
-            for ext in extensions:
-                files.extend(list(base_path.rglob(f"*{ext}")))
+            rules = IgnoreRules().extend("", self.exclude_globs)
+            files = [
+                p for p in self.blobs
+                if p.name.endswith(suffixes) and not self._excluded(rules, p.relative_to(base_path))
+            ]
             self.logger.info(f"Found {len(files)} code files")
+            self.prefetch(files)
         except Exception as ex:
-            self.exception_handler.handle(ex, "list_code_files")
+            self.logger.error(f"Exception in list_code_files: {ex}")
         return files
 
+    @staticmethod
+    def _excluded(rules: IgnoreRules, rel_path: Path) -> bool:
+        parts = rel_path.parts
+        prefixes = ["/".join(parts[:i]) for i in range(1, len(parts))]
+        return (any(rules.is_ignored(d, True) for d in prefixes)
+                or rules.is_ignored("/".join(parts), False))
+
     def read_file(self, file_path: Path) -> str:
         try:
-            return file_path.read_text(encoding="utf-8", errors="ignore")
+            blob = self.blobs[Path(file_path)]
+            with self.lock:
+                data = blob.data_stream.read()
+            text = data.decode("utf-8", errors="ignore")
+            metrics.count("bytes_read_total", len(text))
+            return text
         except Exception as ex:
-            self.exception_handler.handle(ex, f"read_file: {file_path}")
+            self.logger.error(f"Exception in read_file: {file_path}: {ex}")
             return ""
 
     def find_project_overview_file(self, base_dir: str) -> Optional[Path]:
-        candidates = [
-            "README.md", "readme.md", "README.txt", "readme.txt",
-            "OVERVIEW.md", "DESCRIPTION.md", "ABOUT.md"
-        ]
-        
         try:
+            self._index_tree(base_dir)
             base_path = Path(base_dir)
-            for fname in candidates:
+            for fname in OVERVIEW_CANDIDATES:
                 candidate = base_path / fname
-                if candidate.exists():
+                if candidate in self.blobs:
                     return candidate
-                    
-            # Fallback to any markdown file with "readme" in name
-            for f in base_path.rglob("*readme*.*"):
-                if f.suffix.lower() in ['.md', '.txt']:
+            for f in self.blobs:
+                if "readme" in f.name.lower() and f.suffix.lower() in ['.md', '.txt']:
                     return f
-                    
-            # Final fallback: main class in source root
             src_dir = base_path / "src"
-            if src_dir.exists():
-                for f in src_dir.rglob("*.java"):
-                    if "main" in f.name.lower():
-                        return f
+            for f in self.blobs:
+                if src_dir in f.parents and f.suffix == ".java" and "main" in f.name.lower():
+                    return f
         except Exception as ex:
-            self.exception_handler.handle(ex, "find_project_overview_file")
-        return None
\ No newline at end of file
+            self.logger.error(f"Exception in find_project_overview_file: {ex}")
+        return None
@@ -0,0 +1,219 @@
+import difflib
+import re
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN = re.compile(r'[A-Za-z_$][\w$]*|\d[\w.]*|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|\S')
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+
+_JAVA_KEYWORDS = frozenset("""
+    abstract assert boolean break byte case catch char class const continue default do double else
+    enum extends final finally float for goto if implements import instanceof int interface long
+    native new package private protected public record return short static strictfp super switch
+    synchronized this throw throws transient try void volatile while var yield true false null
+""".split())
+
+SHINGLE_SIZE = 5
+NUM_BINS = 64  # Signature length; a multiple of ROWS_PER_BAND
+ROWS_PER_BAND = 4
+
+
+def tokenize(code: str) -> Tuple[List[str], List[str]]:
+    """Return (raw tokens, normalized tokens) of a class chunk.
+
+    Normalization maps every identifier to "I" and every literal to "L", so
+    classes that differ only in names, field types and constants produce the
+    same stream. Keywords, punctuation and annotation names are kept.
+    """
+    raw = _TOKEN.findall(code)
+    normalized = []
+    previous = ""
+    for token in raw:
+        if token in _JAVA_KEYWORDS or previous == "@":
+            normalized.append(token)
+        elif _IDENTIFIER.fullmatch(token):
+            normalized.append("I")
+        elif token[0] in "\"'" or token[0].isdigit():
+            normalized.append("L")
+        else:
+            normalized.append(token)
+        previous = token
+    return raw, normalized
+
+def shingles(normalized: List[str]) -> set:
+    if len(normalized) <= SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(normalized).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(normalized[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+def _tokens(code: str) -> Tuple[List[str], List[str], set]:
+    raw, normalized = tokenize(code)
+    return raw, normalized, shingles(normalized)
+
+def minhash_signature(code: str) -> List[int]:
+    """One-permutation MinHash of the normalized shingles of a class.
+
+    Each shingle hash is assigned to one of NUM_BINS bins by its low bits and
+    each bin keeps its minimum, so a signature costs one hash per shingle.
+    Empty bins borrow the next non-empty bin's value (densification) so
+    similar classes still agree bin for bin.
+    """
+    signature = [None] * NUM_BINS
+    for h in shingles(tokenize(code)[1]):
+        index, value = h % NUM_BINS, h // NUM_BINS
+        if signature[index] is None or value < signature[index]:
+            signature[index] = value
+    filled = [i for i, v in enumerate(signature) if v is not None]
+    if not filled:
+        return [0] * NUM_BINS
+    for i in range(NUM_BINS):
+        if signature[i] is None:
+            # Offset by the distance borrowed over so borrowed values stay distinguishable
+            j = next((k for k in filled if k > i), filled[0])
+            signature[i] = signature[j] + ((j - i) % NUM_BINS) * (1 << 27)
+    return signature
+
+
+class Deduplicator:
+    """Groups near-duplicate classes so only one per group is sent to the LLM.
+
+    Classes are added one at a time as they are parsed. Candidates come from
+    LSH banding of the MinHash signatures of the representatives indexed so
+    far; a candidate joins a representative's group only if the exact Jaccard
+    similarity of their normalized shingles reaches `threshold`, an identifier
+    mapping can be aligned between the two and every method maps onto a
+    method of the representative. Otherwise it becomes a representative
+    itself. The index keeps at most `max_representatives` (oldest dropped
+    first) so memory stays bounded. The representative's analysis is adapted
+    to each member by renaming (see `adapt_analysis`).
+    """
+
+    def __init__(self, logger, exception_handler, threshold: float = 0.9, max_representatives: int = 0):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.threshold = threshold
+        self.max_representatives = max_representatives  # 0 for no limit
+        self.buckets = defaultdict(list)  # (band start, band values) -> representative indices
+        self.representatives = OrderedDict()  # index -> code, bands, skeleton, tokens, analysis
+        self.duplicates = 0
+
+    def add(self, item, skeleton: dict) -> Optional[Tuple[int, Dict[str, str]]]:
+        """Return (representative index, rep->member name mapping) if `item` is a near-duplicate.
+
+        Otherwise `item` is indexed as a representative and None is returned.
+        `item` needs `index`, `parts` and `signature`; only single-part classes
+        with a signature take part. `skeleton` is its static skeleton, used to
+        check that methods line up.
+        """
+        if not item.signature or len(item.parts) != 1:
+            return None
+        bands = [(start, tuple(item.signature[start:start + ROWS_PER_BAND])) for start in range(0, NUM_BINS, ROWS_PER_BAND)]
+        tokens = None
+        checked = set()
+        for band in bands:
+            for rep_index in self.buckets.get(band, ()):
+                if rep_index in checked:
+                    continue
+                checked.add(rep_index)
+                rep = self.representatives[rep_index]
+                tokens = tokens or _tokens(item.parts[0])
+                rep["tokens"] = rep["tokens"] or _tokens(rep["code"])
+                mapping = self.match(rep["tokens"], tokens, rep["skeleton"], skeleton)
+                if mapping is not None:
+                    self.duplicates += 1
+                    return rep_index, mapping
+
+        self.representatives[item.index] = {
+            "code": item.parts[0], "bands": bands, "skeleton": skeleton, "tokens": tokens, "analysis": None
+        }
+        for band in bands:
+            self.buckets[band].append(item.index)
+        if self.max_representatives and len(self.representatives) > self.max_representatives:
+            old_index, old = self.representatives.popitem(last=False)
+            for band in old["bands"]:
+                self.buckets[band].remove(old_index)
+                if not self.buckets[band]:
+                    del self.buckets[band]
+        return None
+
+    def record_analysis(self, index: int, analysis: dict):
+        """Keep a representative's analysis for members that are added after it completed"""
+        if index in self.representatives:
+            self.representatives[index]["analysis"] = analysis
+
+    def analysis_of(self, index: int) -> Optional[dict]:
+        rep = self.representatives.get(index)
+        return rep["analysis"] if rep else None
+
+    def match(self, rep_tokens, member_tokens, rep_skeleton: dict, member_skeleton: dict) -> Optional[Dict[str, str]]:
+        """Return the rep->member identifier mapping if the two classes are near-duplicates"""
+        rep_raw, rep_norm, rep_shingles = rep_tokens
+        member_raw, member_norm, member_shingles = member_tokens
+        union = len(rep_shingles | member_shingles)
+        if not union or len(rep_shingles & member_shingles) / union < self.threshold:
+            return None
+        if len(rep_skeleton["methods"]) != len(member_skeleton["methods"]):
+            return None
+
+        mapping, conflicts = {}, set()
+        matcher = difflib.SequenceMatcher(None, rep_norm, member_norm, autojunk=False)
+        for block in matcher.get_matching_blocks():
+            for offset in range(block.size):
+                rep_token = rep_raw[block.a + offset]
+                member_token = member_raw[block.b + offset]
+                if rep_norm[block.a + offset] != "I":
+                    continue
+                if mapping.setdefault(rep_token, member_token) != member_token:
+                    conflicts.add(rep_token)
+        for name in conflicts:
+            del mapping[name]
+
+        # Every method must land on a method of the representative
+        rep_methods = {m["name"] for m in rep_skeleton["methods"]}
+        inverse = {member: rep for rep, member in mapping.items()}
+        for method in member_skeleton["methods"]:
+            if inverse.get(method["name"], method["name"]) not in rep_methods:
+                return None
+        if mapping.get(rep_skeleton["class_name"]) != member_skeleton["class_name"]:
+            return None
+        return {rep: member for rep, member in mapping.items() if rep != member}
+
+
+def _rename_pattern(mapping: Dict[str, str]):
+    """Regex matching the mapped names (and their lower-first forms) as whole words or plurals"""
+    variants = {}
+    for old, new in mapping.items():
+        variants[old] = new
+        lowered_old = old[:1].lower() + old[1:]
+        if lowered_old not in mapping:
+            variants.setdefault(lowered_old, new[:1].lower() + new[1:])
+    if not variants:
+        return None, variants
+    names = sorted(variants, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")(?=(?:e?s)?\b)"), variants
+
+def adapt_analysis(rep_analysis: dict, member_skeleton: dict, mapping: Dict[str, str]) -> dict:
+    """Reuse a representative's prose for a near-duplicate member.
+
+    Names, signatures and dependencies come from the member's own skeleton;
+    the overview, method descriptions and complexity are the representative's
+    with its class, method and field names replaced by the member's.
+    """
+    pattern, variants = _rename_pattern(mapping)
+
+    def rename(text: str) -> str:
+        return pattern.sub(lambda m: variants[m.group(1)], text) if pattern and text else text
+
+    descriptions = {m["name"]: m.get("description", "") for m in rep_analysis.get("methods", [])}
+    inverse = {member: rep for rep, member in mapping.items()}
+    result = dict(member_skeleton)
+    result["overview"] = rename(rep_analysis.get("overview", ""))
+    result["complexity"] = rep_analysis.get("complexity", "unknown")
+    result["methods"] = [
+        dict(m, description=rename(descriptions.get(inverse.get(m["name"], m["name"]), "")))
+        for m in member_skeleton["methods"]
+    ]
+    return result
@@ -0,0 +1,234 @@
+import json
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import List
+
+
+class DependencyGraphBuilder:
+    """Resolves the type names each class references to classes of the repo.
+
+    A name resolves, in Java's order, to an explicit single-type import, a
+    type nested in the same file, a type of the same package, or a type of a
+    wildcard-imported package. Names that resolve to nothing in the repo
+    (JDK and library types) are dropped.
+    """
+
+    def __init__(self, logger, exception_handler):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.classes = []  # (fqn, package, file, imports, refs)
+
+    def add_file(self, source_file: str, package: str, imports: List[str],
+                 class_names: List[str], class_refs: List[List[str]]):
+        prefix = f"{package}." if package else ""
+        for name, refs in zip(class_names, class_refs):
+            self.classes.append((prefix + name, package, source_file, imports, refs))
+
+    def build(self) -> "DependencyGraph":
+        by_fqn = {}
+        by_package = defaultdict(dict)  # package -> simple or nested (Outer.Inner) name -> fqn
+        by_file = defaultdict(dict)     # file -> simple name -> fqn, for nested types
+        for fqn, package, source_file, _, _ in self.classes:
+            by_fqn.setdefault(fqn, len(by_fqn))
+            local = fqn[len(package) + 1:] if package else fqn
+            by_package[package].setdefault(local, fqn)
+            by_file[source_file].setdefault(local.rsplit(".", 1)[-1], fqn)
+
+        edges = set()
+        unresolved = 0
+        for fqn, package, source_file, imports, refs in self.classes:
+            explicit, wildcards = {}, []
+            for name in imports:
+                if name.startswith("static "):
+                    continue
+                if name.endswith(".*"):
+                    wildcards.append(name[:-2])
+                else:
+                    explicit[name.rsplit(".", 1)[-1]] = name
+            source = by_fqn[fqn]
+            for ref in refs:
+                target = None
+                if ref in explicit:
+                    target = explicit[ref] if explicit[ref] in by_fqn else None
+                else:
+                    target = by_file[source_file].get(ref) or by_package[package].get(ref)
+                    if target is None:
+                        target = next((by_package[w][ref] for w in wildcards if ref in by_package.get(w, {})), None)
+                if target is None:
+                    unresolved += 1
+                elif by_fqn[target] != source:
+                    edges.add((source, by_fqn[target]))
+
+        nodes = list(by_fqn)
+        self.logger.info(f"Dependency graph: {len(nodes)} classes, {len(edges)} edges, "
+                         f"{unresolved} references outside the repo")
+        return DependencyGraph.from_edges(nodes, edges)
+
+
+def _csr(node_count: int, edges, reverse: bool = False):
+    """Offsets/targets arrays: neighbours of node i are targets[offsets[i]:offsets[i + 1]]"""
+    counts = [0] * (node_count + 1)
+    for a, b in edges:
+        counts[(b if reverse else a) + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+    offsets = array("i", counts)
+    targets = array("i", bytes(4 * len(edges)))
+    cursor = list(counts[:-1])
+    for a, b in sorted(edges):
+        src, dst = (b, a) if reverse else (a, b)
+        targets[cursor[src]] = dst
+        cursor[src] += 1
+    return offsets, targets
+
+
+class DependencyGraph:
+    """Class dependency graph in compressed sparse row form.
+
+    `forward` lists the classes each class depends on and `reverse` the
+    classes depending on it, so both directions are O(degree) slices. Also
+    carries fan-in/fan-out, strongly connected components (dependency
+    cycles) and topological layers (layer 0 depends on nothing in the repo).
+    """
+
+    def __init__(self, nodes: List[str], forward, reverse):
+        self.nodes = nodes
+        self.index = {name: i for i, name in enumerate(nodes)}
+        self.forward = forward
+        self.reverse = reverse
+        self.scc = None
+        self.layers = None
+
+    @classmethod
+    def from_edges(cls, nodes: List[str], edges) -> "DependencyGraph":
+        graph = cls(nodes, _csr(len(nodes), edges), _csr(len(nodes), edges, reverse=True))
+        graph.scc = graph.strongly_connected_components()
+        graph.layers = graph.topological_layers()
+        return graph
+
+    def _neighbours(self, csr, i: int):
+        offsets, targets = csr
+        return targets[offsets[i]:offsets[i + 1]]
+
+    def dependencies(self, name: str) -> List[str]:
+        return [self.nodes[j] for j in self._neighbours(self.forward, self.index[name])]
+
+    def dependents(self, name: str) -> List[str]:
+        return [self.nodes[j] for j in self._neighbours(self.reverse, self.index[name])]
+
+    def impacted(self, name: str) -> List[str]:
+        """Every class that depends on `name` directly or transitively"""
+        start = self.index[name]
+        seen, stack = {start}, [start]
+        while stack:
+            for j in self._neighbours(self.reverse, stack.pop()):
+                if j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        seen.discard(start)
+        return sorted(self.nodes[j] for j in seen)
+
+    def fan_out(self, i: int) -> int:
+        return self.forward[0][i + 1] - self.forward[0][i]
+
+    def fan_in(self, i: int) -> int:
+        return self.reverse[0][i + 1] - self.reverse[0][i]
+
+    def strongly_connected_components(self) -> List[int]:
+        """Component id per node (iterative Tarjan)"""
+        n = len(self.nodes)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        component = [-1] * n
+        offsets, targets = self.forward
+        stack, counter, components = [], 0, 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                v, edge = work.pop()
+                if edge == 0:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = True
+                if offsets[v] + edge < offsets[v + 1]:
+                    w = targets[offsets[v] + edge]
+                    work.append((v, edge + 1))
+                    if index[w] == -1:
+                        work.append((w, 0))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                    continue
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = components
+                        if w == v:
+                            break
+                    components += 1
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+        return component
+
+    def topological_layers(self) -> List[int]:
+        """Layer per node: 0 for classes with no in-repo dependencies, else 1 + the deepest dependency.
+
+        Computed on the component DAG, so all classes of a cycle share a layer.
+        """
+        n = len(self.nodes)
+        component_count = max(self.scc, default=-1) + 1
+        pending = [0] * component_count  # Outgoing edges to other components not yet layered
+        dependents = defaultdict(list)
+        for v in range(n):
+            for w in self._neighbours(self.forward, v):
+                if self.scc[v] != self.scc[w]:
+                    pending[self.scc[v]] += 1
+                    dependents[self.scc[w]].append(self.scc[v])
+        layer = [0] * component_count
+        ready = [c for c in range(component_count) if pending[c] == 0]
+        while ready:
+            c = ready.pop()
+            for d in dependents[c]:
+                layer[d] = max(layer[d], layer[c] + 1)
+                pending[d] -= 1
+                if pending[d] == 0:
+                    ready.append(d)
+        return [layer[self.scc[v]] for v in range(n)]
+
+    def to_dict(self) -> dict:
+        cycles = defaultdict(list)
+        for v, c in enumerate(self.scc):
+            cycles[c].append(self.nodes[v])
+        return {
+            "nodes": self.nodes,
+            "forward": {"offsets": self.forward[0].tolist(), "targets": self.forward[1].tolist()},
+            "reverse": {"offsets": self.reverse[0].tolist(), "targets": self.reverse[1].tolist()},
+            "fan_in": [self.fan_in(i) for i in range(len(self.nodes))],
+            "fan_out": [self.fan_out(i) for i in range(len(self.nodes))],
+            "scc": self.scc,
+            "layers": self.layers,
+            "cycles": sorted(sorted(members) for members in cycles.values() if len(members) > 1),
+        }
+
+    def write(self, path: Path):
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path) -> "DependencyGraph":
+        with Path(path).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        graph = cls(
+            data["nodes"],
+            (array("i", data["forward"]["offsets"]), array("i", data["forward"]["targets"])),
+            (array("i", data["reverse"]["offsets"]), array("i", data["reverse"]["targets"]))
+        )
+        graph.scc = data["scc"]
+        graph.layers = data["layers"]
+        return graph
@@ -2,8 +2,10 @@ import json
 import os
 import sys
 import asyncio
+import logging
 from datetime import datetime
 from pathlib import Path
+import pandas as pd
 from datasets import Dataset
 from ragas import evaluate
 from ragas.metrics import (
@@ -15,8 +17,14 @@ from ragas.metrics import (
 from langchain_cohere import ChatCohere
 from langchain.embeddings import CohereEmbeddings
 from config.config import eval_config, llm_config
+from utils.embedding_cache import CachedEmbeddings
+from utils.score_cache import ScoreCache
+from src.lexical_scoring import LexicalScorer
 import re
 
+RAGAS_COLUMNS = ("question", "answer", "ground_truth", "contexts")
+PAIR_COLUMNS = RAGAS_COLUMNS + ("name_match", "gold_signature", "pred_signature")
+
 
 class RagasEvaluator:
     def __init__(self):
@@ -30,6 +38,16 @@ class RagasEvaluator:
             "faithfulness": faithfulness
         }
 
+        self.lexical_scorer = LexicalScorer(
+            logging.getLogger("JavaCodeAnalyzer"), None, eval_config.lexical_accept, eval_config.lexical_reject
+        )
+
+        self.score_cache = None
+        if eval_config.score_cache_enabled:
+            self.score_cache = ScoreCache(logging.getLogger("JavaCodeAnalyzer"), None, eval_config.score_cache_path)
+        # Everything besides the pair itself that determines a score
+        self.judge_model = f"{llm_config.model_name}@{llm_config.temperature}|{eval_config.embedding_model}"
+
         os.makedirs(os.path.dirname(eval_config.evaluation_output_path), exist_ok=True)
 
     def setup_llm(self):
@@ -62,9 +80,14 @@ class RagasEvaluator:
                 sys.exit(1)
                 
             self.embeddings = CohereEmbeddings(
-                model="embed-english-v3.0",
+                model=eval_config.embedding_model,
                 cohere_api_key=api_key
             )
+            if eval_config.embedding_cache_enabled:
+                self.embeddings = CachedEmbeddings(
+                    logging.getLogger("JavaCodeAnalyzer"), None, self.embeddings,
+                    eval_config.embedding_model, eval_config.embedding_cache_dir
+                )
             print("✅ Cohere embeddings initialized")
         except Exception as e:
             print(f"❌ Embeddings init failed: {e}")
@@ -94,23 +117,22 @@ class RagasEvaluator:
         name = name.replace("controller", "").replace("service", "")
         return name
 
+    def index_components(self, data):
+        """Components by normalized class name"""
+        classes = {}
+        for idx, c in enumerate(data.get("components", [])):
+            class_name = c.get("class_name", f"unknown_class_{idx}")
+            # Use normalized name for matching
+            classes[self.normalize_name(class_name)] = c
+        return classes
+
     def create_evaluation_dataset(self, gold_data, pred_data):
-        questions, ground_truths, answers, contexts = [], [], [], []
+        """Overview and method pairs as column lists, with the name/signature facts the lexical tier checks"""
+        pairs = {column: [] for column in PAIR_COLUMNS}
 
         # Create class mapping with normalized keys
-        gold_classes = {}
-        for idx, c in enumerate(gold_data.get("components", [])):
-            class_name = c.get("class_name", f"unknown_class_{idx}")
-            # Use normalized name for matching
-            norm_name = self.normalize_name(class_name)
-            gold_classes[norm_name] = c
-            
-        pred_classes = {}
-        for idx, c in enumerate(pred_data.get("components", [])):
-            class_name = c.get("class_name", f"unknown_class_{idx}")
-            # Use normalized name for matching
-            norm_name = self.normalize_name(class_name)
-            pred_classes[norm_name] = c
+        gold_classes = self.index_components(gold_data)
+        pred_classes = self.index_components(pred_data)
 
         # Create a set of all unique normalized class names
         all_classes = set(gold_classes.keys()) | set(pred_classes.keys())
@@ -118,99 +140,101 @@ class RagasEvaluator:
         for norm_class_name in all_classes:
             gold = gold_classes.get(norm_class_name)
             pred = pred_classes.get(norm_class_name)
-            
-            # If we have gold but no pred, create an empty prediction
-            if gold and not pred:
-                print(f"⚠️ Creating empty prediction for: {norm_class_name}")
-                pred = {
-                    "overview": "",
-                    "methods": [],
-                    "source_file": gold.get("source_file", "")
-                }
                 
             # If we have pred but no gold, skip
             if pred and not gold:
                 print(f"⚠️ Missing gold data for: {norm_class_name}")
                 continue
-                
-            if not gold or not pred:
-                continue
 
-            # Get original class name for display
-            orig_class_name = gold.get("class_name", norm_class_name)
+            self.add_component_pairs(pairs, norm_class_name, gold, pred)
+
+        if not pairs["question"]:
+            print("⚠️ Warning: No evaluation pairs found. Evaluation may be incomplete.")
+            return None
 
-            # Class overview comparison
-            gold_overview = gold.get("overview", "")
-            pred_overview = pred.get("overview", "")
+        print(f"✅ Prepared {len(pairs['question'])} evaluation pairs")
+        return pairs
+
+    def add_component_pairs(self, pairs, norm_class_name, gold, pred=None):
+        """Append the overview and method pairs of one gold class and its prediction"""
+        # If we have gold but no pred, create an empty prediction
+        if not pred:
+            print(f"⚠️ Creating empty prediction for: {norm_class_name}")
+            pred = {
+                "overview": "",
+                "methods": [],
+                "source_file": gold.get("source_file", "")
+            }
+
+        # Get original class name for display
+        orig_class_name = gold.get("class_name", norm_class_name)
+
+        # Class overview comparison
+        gold_overview = gold.get("overview", "")
+        pred_overview = pred.get("overview", "")
+        
+        if gold_overview or pred_overview:
+            pairs["question"].append(f"Class overview: {orig_class_name}")
+            pairs["ground_truth"].append(gold_overview)
+            pairs["answer"].append(pred_overview)
+            pairs["contexts"].append([f"Class: {orig_class_name} | File: {gold.get('source_file', 'unknown')}"])
+            pairs["name_match"].append(pred.get("class_name", orig_class_name) == orig_class_name)
+            pairs["gold_signature"].append("")
+            pairs["pred_signature"].append("")
+
+        # Method-level comparison
+        gold_methods = {}
+        for m in gold.get("methods", []):
+            method_name = m.get("name", f"method_{id(m)}")
+            # Normalize method names for matching
+            norm_method_name = self.normalize_name(method_name)
+            gold_methods[norm_method_name] = m
             
-            if gold_overview or pred_overview:
-                questions.append(f"Class overview: {orig_class_name}")
-                ground_truths.append(gold_overview)
-                answers.append(pred_overview)
-                contexts.append([f"Class: {orig_class_name} | File: {gold.get('source_file', 'unknown')}"])
-
-            # Method-level comparison
-            gold_methods = {}
-            for m in gold.get("methods", []):
-                method_name = m.get("name", f"method_{id(m)}")
-                # Normalize method names for matching
-                norm_method_name = self.normalize_name(method_name)
-                gold_methods[norm_method_name] = m
+        pred_methods = {}
+        for m in pred.get("methods", []):
+            method_name = m.get("name", f"method_{id(m)}")
+            # Normalize method names for matching
+            norm_method_name = self.normalize_name(method_name)
+            pred_methods[norm_method_name] = m
+
+        # Create a set of all unique normalized method names
+        all_methods = set(gold_methods.keys()) | set(pred_methods.keys())
+
+        for norm_method_name in all_methods:
+            gold_method = gold_methods.get(norm_method_name)
+            pred_method = pred_methods.get(norm_method_name)
+            
+            # If we have gold method but no pred, create empty prediction
+            if gold_method and not pred_method:
+                print(f"⚠️ Creating empty prediction for method: {orig_class_name}.{norm_method_name}")
+                pred_method = {
+                    "description": "",
+                    "signature": ""
+                }
                 
-            pred_methods = {}
-            for m in pred.get("methods", []):
-                method_name = m.get("name", f"method_{id(m)}")
-                # Normalize method names for matching
-                norm_method_name = self.normalize_name(method_name)
-                pred_methods[norm_method_name] = m
-
-            # Create a set of all unique normalized method names
-            all_methods = set(gold_methods.keys()) | set(pred_methods.keys())
-
-            for norm_method_name in all_methods:
-                gold_method = gold_methods.get(norm_method_name)
-                pred_method = pred_methods.get(norm_method_name)
+            # If we have pred method but no gold, skip
+            if pred_method and not gold_method:
+                print(f"⚠️ Missing gold data for method: {orig_class_name}.{norm_method_name}")
+                continue
                 
-                # If we have gold method but no pred, create empty prediction
-                if gold_method and not pred_method:
-                    print(f"⚠️ Creating empty prediction for method: {orig_class_name}.{norm_method_name}")
-                    pred_method = {
-                        "description": "",
-                        "signature": ""
-                    }
-                    
-                # If we have pred method but no gold, skip
-                if pred_method and not gold_method:
-                    print(f"⚠️ Missing gold data for method: {orig_class_name}.{norm_method_name}")
-                    continue
-                    
-                if not gold_method or not pred_method:
-                    continue
-                    
-                # Get original method name for display
-                orig_method_name = gold_method.get("name", norm_method_name)
-                    
-                gold_desc = gold_method.get("description", "")
-                pred_desc = pred_method.get("description", "")
+            if not gold_method or not pred_method:
+                continue
                 
-                questions.append(f"Method: {orig_class_name}.{orig_method_name}")
-                ground_truths.append(gold_desc)
-                answers.append(pred_desc)
-                contexts.append([
-                    f"Method: {orig_method_name} | Signature: {gold_method.get('signature', '')}"
-                ])
-
-        if not questions:
-            print("⚠️ Warning: No evaluation pairs found. Evaluation may be incomplete.")
-            return None
-
-        print(f"✅ Prepared {len(questions)} evaluation pairs")
-        return Dataset.from_dict({
-            "question": questions,
-            "answer": answers,
-            "ground_truth": ground_truths,
-            "contexts": contexts
-        })
+            # Get original method name for display
+            orig_method_name = gold_method.get("name", norm_method_name)
+                
+            gold_desc = gold_method.get("description", "")
+            pred_desc = pred_method.get("description", "")
+            
+            pairs["question"].append(f"Method: {orig_class_name}.{orig_method_name}")
+            pairs["ground_truth"].append(gold_desc)
+            pairs["answer"].append(pred_desc)
+            pairs["contexts"].append([
+                f"Method: {orig_method_name} | Signature: {gold_method.get('signature', '')}"
+            ])
+            pairs["name_match"].append(pred_method.get("name", orig_method_name) == orig_method_name)
+            pairs["gold_signature"].append(gold_method.get("signature", ""))
+            pairs["pred_signature"].append(pred_method.get("signature", ""))
 
     def get_metrics(self):
         valid_metrics = []
@@ -221,15 +245,95 @@ class RagasEvaluator:
                 print(f"⚠️ Skipping unknown metric: '{m}'")
         return valid_metrics
 
+    def reuse_cached_scores(self, report, pairs, rows, metrics):
+        """Fill cached scores into the report; returns the rows and metrics still to score, and the score keys"""
+        if self.score_cache is None or not len(rows):
+            return list(rows), list(metrics), {}
+        keys = {
+            (i, m.name): self.score_cache.make_key(
+                pairs["question"][i], pairs["ground_truth"][i], pairs["answer"][i], pairs["contexts"][i],
+                m.name, self.judge_model
+            )
+            for i in rows for m in metrics
+        }
+        cached = self.score_cache.get_many(list(keys.values()))
+        for (i, name), key in keys.items():
+            if key in cached:
+                report.at[i, name] = cached[key]
+        pending = [i for i in rows if any(keys[(i, m.name)] not in cached for m in metrics)]
+        pending_metrics = [m for m in metrics if any(keys[(i, m.name)] not in cached for i in pending)]
+        print(f"♻️ {len(rows) - len(pending)} of {len(rows)} escalated pairs reused cached scores")
+        return pending, pending_metrics, keys
+
+    def score_pairs(self, pairs, metrics):
+        """Per-pair report: lexical tier, then cached or fresh RAGAS scores for the escalated pairs"""
+        # Lexical tier first: only pairs it cannot decide go to the LLM-judged metrics
+        report = pd.DataFrame({c: pairs[c] for c in RAGAS_COLUMNS})
+        if eval_config.lexical_prescore:
+            for column, values in self.lexical_scorer.score(pairs).items():
+                report[column] = values
+        else:
+            report["tier"] = "ragas"
+        escalated = report.index[report["tier"] == "ragas"]
+        for metric in metrics:
+            report[metric.name] = float("nan")
+        print(f"🔎 {len(report) - len(escalated)} pairs scored locally, {len(escalated)} escalated to RAGAS")
+
+        # Only pairs without cached scores (new or changed since an earlier evaluation) are scored
+        pending, pending_metrics, keys = self.reuse_cached_scores(report, pairs, escalated, metrics)
+        if pending:
+            dataset = Dataset.from_dict({c: [pairs[c][i] for i in pending] for c in RAGAS_COLUMNS})
+            if isinstance(self.embeddings, CachedEmbeddings):
+                # One batched call for every text not embedded by an earlier run
+                self.embeddings.warm(dataset["answer"] + dataset["ground_truth"])
+
+            result = evaluate(
+                dataset,
+                metrics=pending_metrics,
+                embeddings=self.embeddings,
+                llm=self.llm,
+                raise_exceptions=False  # Continue despite individual failures
+            )
+            scores = result.to_pandas()
+            for metric in pending_metrics:
+                if metric.name in scores:
+                    report.loc[pending, metric.name] = scores[metric.name].to_numpy()
+            if self.score_cache is not None:
+                self.score_cache.put_many(
+                    (keys[(i, metric.name)], metric.name, report.at[i, metric.name])
+                    for i in pending for metric in pending_metrics
+                )
+        return report
+
+    def write_report(self, report, metrics):
+        # Save detailed per-sample results, with the tier that scored each pair
+        report.to_csv(eval_config.evaluation_output_path, index=False)
+
+        # Save overall summary
+        summary_path = eval_config.evaluation_output_path.replace(".csv", "_summary.txt")
+        with open(summary_path, "w") as f:
+            f.write("\n📊 Evaluation Summary (Aggregated Metrics):\n")
+            for tier, count in report["tier"].value_counts().items():
+                f.write(f"pairs scored by {tier}: {count}\n")
+            if "verdict" in report:
+                for verdict, count in report["verdict"].value_counts().items():
+                    f.write(f"verdict {verdict}: {count}\n")
+                for column in ("token_f1", "rouge_l", "lexical_score"):
+                    f.write(f"{column} (all pairs): {report[column].mean():.4f}\n")
+            for metric in metrics:
+                if report[metric.name].notna().any():
+                    f.write(f"{metric.name} (RAGAS pairs): {report[metric.name].mean():.4f}\n")
+            print(f"\n📁 Summary saved to: {summary_path}")
+
     async def run_evaluation(self):
         print("🚀 Starting RAGAS Evaluation with Cohere")
 
         try:
             gold_data = self.load_json_data(eval_config.gold_path)
             pred_data = self.load_json_data(eval_config.predictions_path)
-            dataset = self.create_evaluation_dataset(gold_data, pred_data)
+            pairs = self.create_evaluation_dataset(gold_data, pred_data)
 
-            if dataset is None:
+            if pairs is None:
                 print("❌ Evaluation aborted: No valid data pairs")
                 return
 
@@ -238,28 +342,14 @@ class RagasEvaluator:
                 print("❌ No valid metrics configured. Evaluation aborted.")
                 return
 
-            result = evaluate(
-                dataset,
-                metrics=metrics,
-                embeddings=self.embeddings,
-                llm=self.llm,
-                raise_exceptions=False  # Continue despite individual failures
-            )
-
-            # Save detailed per-sample results
-            result_df = result.to_pandas()
-            result_df.to_csv(eval_config.evaluation_output_path, index=False)
-
-            # Save overall summary
-            summary_path = eval_config.evaluation_output_path.replace(".csv", "_summary.txt")
-            with open(summary_path, "w") as f:
-                f.write("\n📊 Evaluation Summary (Aggregated Metrics):\n")
-                for metric_name, score in result.scores.items():
-                    f.write(f"{metric_name}: {score:.4f}\n")
-                print(f"\n📁 Summary saved to: {summary_path}")
+            report = self.score_pairs(pairs, metrics)
+            self.write_report(report, metrics)
 
+            if isinstance(self.embeddings, CachedEmbeddings):
+                stats = self.embeddings.stats()
+                print(f"📦 Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.0%} hit rate)")
             print(f"✅ Evaluation complete. Output: {eval_config.evaluation_output_path}")
-            print(result)
             
         except Exception as e:
             print(f"❌ Evaluation failed: {e}")
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+
+import pandas as pd
+
+from config.config import eval_config
+from src.evaluation_main import PAIR_COLUMNS, RagasEvaluator
+from utils.metrics import metrics
+
+
+class StreamingEvaluationStage:
+    """In-process evaluation that runs alongside the analysis.
+
+    The gold standard is indexed by normalized class name up front. Each
+    component is matched as soon as it is emitted and its pairs are queued;
+    a fixed number of workers (a concurrency budget separate from the
+    analysis LLM limiter) score batches of pairs off the event loop and
+    append them to a partial CSV, so scores accumulate while the run is
+    still going. `finish` scores the gold classes no component matched
+    (as empty predictions) and writes the final CSV and summary.
+    """
+
+    def __init__(self, logger, exception_handler):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.evaluator = RagasEvaluator()
+        self.metrics = self.evaluator.get_metrics()
+        self.gold_classes = self.evaluator.index_components(self.evaluator.load_json_data(eval_config.gold_path))
+        self.matched = set()
+        self.queue = asyncio.Queue()
+        self.reports = []
+        self.partial_path = eval_config.evaluation_output_path.replace(".csv", "_partial.csv")
+        self.workers = []
+        self.scored_pairs = 0
+
+    def start(self):
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(max(1, eval_config.stream_workers))]
+        self.logger.info(f"Streaming evaluation against {len(self.gold_classes)} gold classes "
+                         f"with {len(self.workers)} workers")
+
+    def submit(self, component: dict):
+        """Match a finished component against the gold standard and queue its pairs"""
+        norm_name = self.evaluator.normalize_name(component.get("class_name", ""))
+        gold = self.gold_classes.get(norm_name)
+        if gold is None or norm_name in self.matched:
+            return
+        self.queue_pairs(norm_name, gold, component)
+
+    def queue_pairs(self, norm_name: str, gold: dict, pred: dict = None):
+        self.matched.add(norm_name)
+        pairs = {column: [] for column in PAIR_COLUMNS}
+        self.evaluator.add_component_pairs(pairs, norm_name, gold, pred)
+        if pairs["question"]:
+            self.queue.put_nowait(pairs)
+
+    def next_batch(self, first: dict) -> dict:
+        """Merge queued pair sets into one batch of up to stream_batch_size pairs"""
+        batch = {column: list(values) for column, values in first.items()}
+        while len(batch["question"]) < eval_config.stream_batch_size and not self.queue.empty():
+            pairs = self.queue.get_nowait()
+            if pairs is None:
+                # Leave the stop marker for the next loop iteration
+                self.queue.put_nowait(None)
+                break
+            for column in PAIR_COLUMNS:
+                batch[column].extend(pairs[column])
+        return batch
+
+    async def worker(self):
+        while True:
+            pairs = await self.queue.get()
+            if pairs is None:
+                return
+            try:
+                batch = self.next_batch(pairs)
+                # RAGAS runs its own event loop, so a batch is scored in a thread
+                start = time.monotonic()
+                report = await asyncio.to_thread(self.evaluator.score_pairs, batch, self.metrics)
+                metrics.observe("evaluation_batch_seconds", time.monotonic() - start)
+                for tier, count in report["tier"].value_counts().items():
+                    metrics.count("evaluation_pairs_total", int(count), tier=tier)
+                report.to_csv(self.partial_path, mode="a", header=not self.reports, index=False)
+                self.reports.append(report)
+                self.scored_pairs += len(report)
+                self.logger.info(f"Evaluation: {self.scored_pairs} pairs scored, "
+                                 f"~{self.queue.qsize()} components queued")
+            except Exception as ex:
+                await self.exception_handler.handle(ex, "streaming evaluation batch")
+
+    async def finish(self):
+        """Score unmatched gold classes, drain the workers and write the final report"""
+        for norm_name, gold in list(self.gold_classes.items()):
+            if norm_name not in self.matched:
+                self.queue_pairs(norm_name, gold)
+        for _ in self.workers:
+            self.queue.put_nowait(None)
+        await asyncio.gather(*self.workers)
+        if not self.reports:
+            self.logger.warning("Streaming evaluation produced no scored pairs")
+            return
+        report = pd.concat(self.reports, ignore_index=True)
+        self.evaluator.write_report(report, self.metrics)
+        self.logger.info(f"Evaluation complete: {len(report)} pairs, output {eval_config.evaluation_output_path}")
@@ -0,0 +1,404 @@
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Bodies of literals, matched from their opening quote. Unrolled loops keep
+# the regex engine from backtracking on long strings.
+_TEXT_BLOCK_REST = re.compile(r'(?:[^\\]|\\.)*?"""', re.DOTALL)
+_QUOTED = {
+    '"': re.compile(r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'),
+    "'": re.compile(r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'"),
+}
+
+_DECL_KEYWORDS = ("class", "interface", "enum", "record")
+_DECL_PATTERN = re.compile(r'(class|interface|enum|record)\s+([A-Za-z_$][\w$]*)')
+_RECORD_HEADER = re.compile(r'\s*[(<]')
+
+# Runs of lines left empty or whitespace-only once comments are cut out; matching
+# whole runs is much cheaper than trying a lookahead at every newline
+_BLANK_LINES = re.compile(r'\n(?:[ \t\r]*\n)+')
+
+_MEMBER_DELIMITER = re.compile(r'[;{}()]')
+
+_PACKAGE_PATTERN = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+(static\s+)?([\w$.\s]+?(?:\.\s*\*)?)\s*;', re.MULTILINE)
+_ANNOTATION_NAME = re.compile(r'\s*@\s*([\w.]+)\s*')
+_TRAILING_IDENTIFIER = re.compile(r'([A-Za-z_$][\w$]*)\s*$')
+_MODIFIERS = frozenset({
+    "public", "protected", "private", "static", "final", "abstract", "synchronized",
+    "native", "strictfp", "default", "transient", "volatile", "sealed", "non-sealed",
+})
+
+_IDENTIFIER_TAIL = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$.")
+
+
+@dataclass
+class TypeSpan:
+    """A class, interface, enum, record or annotation type declaration.
+
+    Offsets are indices into the scanned source string: `start` is the first
+    modifier/annotation of the declaration, `body_start` its opening brace and
+    `end` one past its closing brace.
+    """
+    name: str
+    kind: str
+    start: int
+    body_start: int
+    end: int
+    depth: int
+    parent: Optional[int] = None
+    children: List[int] = field(default_factory=list)
+    qualified_name: str = ""
+
+
+@dataclass
+class JavaScan:
+    spans: List[TypeSpan]
+    comments: List[Tuple[int, int]]
+    masked: str = ""  # Source with literals and comments blanked out, same offsets
+
+
+def scan_java(code: str) -> JavaScan:
+    """Linear scan of `code` collecting type spans and comment ranges.
+
+    A first pass blanks out string, char and text block literals and comments
+    (keeping offsets intact); declarations and braces are then located with
+    substring searches on the masked text. Only declarations at top level or
+    directly inside a type body are reported; local and anonymous classes
+    stay part of their enclosing method.
+    """
+    masked, comments = _mask_literals(code)
+
+    spans: List[TypeSpan] = []
+    open_types: List[int] = []
+    depth = 0
+    counted_to = 0
+    for m in _find_declarations(masked):
+        decl_pos = m.start()
+
+        depth += masked.count("{", counted_to, decl_pos) - masked.count("}", counted_to, decl_pos)
+        counted_to = decl_pos
+        while open_types and spans[open_types[-1]].end <= decl_pos:
+            open_types.pop()
+        expected_depth = spans[open_types[-1]].depth + 1 if open_types else 0
+        if depth != expected_depth:
+            # Local class inside a method or initializer block
+            continue
+
+        kind, name = m.groups()
+        if kind == "record" and not _RECORD_HEADER.match(masked, m.end()):
+            # `record` used as an ordinary identifier
+            continue
+        if kind == "interface":
+            at = decl_pos - 1
+            while at >= 0 and masked[at].isspace():
+                at -= 1
+            if at >= 0 and masked[at] == "@":
+                kind = "annotation"
+
+        body_start = _find_body_start(masked, m.end(), kind == "record")
+        if body_start < 0:
+            continue
+
+        parent = open_types[-1] if open_types else None
+        qualified = f"{spans[parent].qualified_name}.{name}" if parent is not None else name
+        start = _skip_trivia(code, _declaration_boundary(masked, decl_pos), comments)
+        spans.append(TypeSpan(name, kind, start, body_start, _find_body_end(masked, body_start),
+                              depth, parent, qualified_name=qualified))
+        if parent is not None:
+            spans[parent].children.append(len(spans) - 1)
+        open_types.append(len(spans) - 1)
+
+    return JavaScan(spans, comments, masked)
+
+
+def _mask_literals(code: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """Replace literals and comments with spaces; also return the comment ranges.
+
+    Jumps between quote and slash characters with str.find, so the Python
+    loop only runs once per literal, comment or division operator.
+    """
+    comments: List[Tuple[int, int]] = []
+    pieces = []
+    last = 0
+    n = len(code)
+    find = code.find
+    # Every quote and slash turned into `"`, so one find reaches the next of any of them
+    next_candidate = code.replace("'", '"').replace("/", '"').find
+    pos = next_candidate('"')
+    while pos >= 0:
+        end = -1
+        char = code[pos]
+        if char == "/":
+            following = code[pos + 1:pos + 2]
+            if following == "/":
+                end = find("\n", pos)
+                end = n if end < 0 else end
+                comments.append((pos, end))
+            elif following == "*":
+                end = find("*/", pos + 2)
+                end = n if end < 0 else end + 2
+                comments.append((pos, end))
+        elif code.startswith('"""', pos):
+            m = _TEXT_BLOCK_REST.match(code, pos + 3)
+            end = m.end() if m else n
+        else:
+            m = _QUOTED[char].match(code, pos)
+            if m:
+                end = m.end()
+
+        if end < 0:
+            # Division operator or stray quote
+            pos = next_candidate('"', pos + 1)
+        else:
+            pieces.append(code[last:pos])
+            pieces.append(" " * (end - pos))
+            last = end
+            pos = next_candidate('"', end)
+
+    pieces.append(code[last:])
+    return "".join(pieces), comments
+
+
+def _find_declarations(masked: str) -> List[re.Match]:
+    """Declaration keyword matches in source order.
+
+    Keywords are located with plain substring search, which is much faster
+    than a regex scan, and only the hits are checked with the full pattern.
+    """
+    hits = []
+    for keyword in _DECL_KEYWORDS:
+        pos = masked.find(keyword)
+        while pos >= 0:
+            if not pos or masked[pos - 1] not in _IDENTIFIER_TAIL:
+                m = _DECL_PATTERN.match(masked, pos)
+                if m:
+                    hits.append(m)
+            pos = masked.find(keyword, pos + len(keyword))
+    hits.sort(key=lambda m: m.start())
+    return hits
+
+
+def _find_body_start(masked: str, pos: int, skip_header: bool) -> int:
+    """Offset of the `{` opening a type body, or -1 if the statement ends first"""
+    if skip_header:
+        # Record components may carry annotations with array braces
+        header = masked.find("(", pos)
+        if header < 0:
+            return -1
+        pos = _find_matching(masked, header, "(", ")")
+    brace = masked.find("{", pos)
+    semi = masked.find(";", pos)
+    if brace < 0 or 0 <= semi < brace:
+        return -1
+    return brace
+
+
+def _find_body_end(masked: str, body_start: int) -> int:
+    return _find_matching(masked, body_start, "{", "}")
+
+
+def _find_matching(masked: str, open_pos: int, opener: str, closer: str) -> int:
+    """Offset one past the closer matching the opener at open_pos (end of text if unbalanced)"""
+    depth = 1
+    pos = open_pos + 1
+    while True:
+        close = masked.find(closer, pos)
+        if close < 0:
+            return len(masked)
+        depth += masked.count(opener, pos, close) - 1
+        if depth <= 0:
+            return close + 1
+        pos = close + 1
+
+
+def _declaration_boundary(masked: str, decl_pos: int) -> int:
+    """End of the statement or block preceding a declaration's modifiers and annotations"""
+    boundary = decl_pos
+    while True:
+        boundary = max(masked.rfind(";", 0, boundary), masked.rfind("{", 0, boundary),
+                       masked.rfind("}", 0, boundary)) + 1
+        # A brace inside an annotation argument, e.g. @Table(indexes = {...})
+        if boundary == 0 or masked.count(")", boundary, decl_pos) <= masked.count("(", boundary, decl_pos):
+            return boundary
+        boundary -= 1
+
+
+def _skip_trivia(code: str, pos: int, comments: List[Tuple[int, int]]) -> int:
+    """Advance past whitespace and comments that precede a declaration"""
+    i = bisect_left(comments, (pos, -1))
+    while True:
+        while pos < len(code) and code[pos].isspace():
+            pos += 1
+        if i < len(comments) and comments[i][0] == pos:
+            pos = comments[i][1]
+            i += 1
+            continue
+        return pos
+
+
+def render_span(code: str, scan: JavaScan, index: int) -> str:
+    """Source of one type with comments removed and nested type bodies elided.
+
+    Nested types are emitted as their own chunks, so the parent keeps only
+    their declaration header followed by `{ ... }`.
+    """
+    span = scan.spans[index]
+    first = bisect_left(scan.comments, (span.start, -1))
+    last = bisect_left(scan.comments, (span.end, -1), first)
+    cuts = [(s, e, "") for s, e in scan.comments[first:last]]
+    cuts.extend(
+        (scan.spans[child].body_start, scan.spans[child].end, "{ ... }")
+        for child in span.children
+    )
+    cuts.sort()
+
+    parts = []
+    pos = span.start
+    for s, e, replacement in cuts:
+        if s < pos:
+            # Comment inside an already elided nested body
+            continue
+        parts.append(code[pos:s])
+        parts.append(replacement)
+        pos = e
+    parts.append(code[pos:span.end])
+
+    return _BLANK_LINES.sub("\n", "".join(parts)).strip()
+
+
+def member_ranges(scan: JavaScan, index: int) -> List[Tuple[int, int]]:
+    """(start, end) offsets of each member directly inside a type body.
+
+    A member ends at a `;` or at the `}` closing a top-level block (method
+    body, initializer or nested type); it starts right after the previous
+    member, so leading annotations and modifiers stay attached. For enums the
+    constant list is the first member.
+    """
+    span = scan.spans[index]
+    masked = scan.masked
+    ranges = []
+    depth = 0
+    paren_depth = 0
+    member_start = span.body_start + 1
+    for m in _MEMBER_DELIMITER.finditer(masked, span.body_start + 1, span.end - 1):
+        char = m.group()
+        if char == "(":
+            paren_depth += 1
+            continue
+        if char == ")":
+            paren_depth = max(0, paren_depth - 1)
+            continue
+        if paren_depth:
+            # Annotation array values and lambdas passed as arguments
+            continue
+        if char == "{":
+            depth += 1
+            continue
+        if char == "}":
+            depth -= 1
+            if depth > 0:
+                continue
+        elif depth > 0:
+            continue
+        # Array initializers and anonymous classes end with `};`, not `}`
+        if char == "}" and masked[m.end():span.end - 1].lstrip().startswith(";"):
+            continue
+        if masked[member_start:m.end()].strip(" \t\r\n;"):
+            ranges.append((member_start, m.end()))
+        member_start = m.end()
+    if masked[member_start:span.end - 1].strip():
+        ranges.append((member_start, span.end - 1))
+    return ranges
+
+
+@dataclass
+class MethodSignature:
+    name: str
+    signature: str
+
+
+def extract_imports(code: str) -> Tuple[str, List[str]]:
+    """Package name and imported names of a compilation unit"""
+    masked, _ = _mask_literals(code)
+    package = _PACKAGE_PATTERN.search(masked)
+    imports = [
+        ("static " if m.group(1) else "") + "".join(m.group(2).split())
+        for m in _IMPORT_PATTERN.finditer(masked)
+    ]
+    return (package.group(1) if package else ""), imports
+
+
+def method_signatures(code: str, scan: JavaScan, index: int) -> List[MethodSignature]:
+    """Methods and constructors declared directly in a type, in source order.
+
+    The signature is the declaration up to its body or `;`, including
+    annotations, with comments dropped and whitespace collapsed.
+    """
+    span = scan.spans[index]
+    masked = scan.masked
+    methods = []
+    for start, end in member_ranges(scan, index):
+        pos = _skip_annotations(masked, start, end)
+        paren = masked.find("(", pos, end)
+        if paren < 0 or any(0 <= masked.find(d, pos, paren) for d in "{;="):
+            # Field, initializer block, enum constant body or nested type stub
+            continue
+
+        prefix = masked[pos:paren]
+        name_match = _TRAILING_IDENTIFIER.search(prefix)
+        if not name_match or _DECL_PATTERN.search(prefix):
+            continue
+        name = name_match.group(1)
+        leading = _strip_type_parameters(prefix[:name_match.start()]).split()
+        if not [word for word in leading if word not in _MODIFIERS] and name != span.name:
+            # Enum constant with constructor arguments
+            continue
+
+        body = _find_matching(masked, paren, "(", ")")
+        stop = end
+        for delimiter in "{;":
+            found = masked.find(delimiter, body, end)
+            if 0 <= found < stop:
+                stop = found
+        text = _strip_comment_ranges(code, scan, _skip_trivia(code, start, scan.comments), stop)
+        methods.append(MethodSignature(name, " ".join(text.split())))
+    return methods
+
+
+def _skip_annotations(masked: str, pos: int, end: int) -> int:
+    while True:
+        m = _ANNOTATION_NAME.match(masked, pos, end)
+        if not m or m.group(1) == "interface":
+            return pos
+        pos = m.end()
+        if masked.startswith("(", pos):
+            pos = _find_matching(masked, pos, "(", ")")
+
+
+def _strip_type_parameters(text: str) -> str:
+    """Drop generic parameter lists so `<K, V> Map<K, V>` reads as one type word"""
+    result, depth = [], 0
+    for char in text:
+        if char == "<":
+            depth += 1
+        elif char == ">":
+            depth = max(0, depth - 1)
+            if depth == 0:
+                result.append(" ")
+        elif depth == 0:
+            result.append(char)
+    return "".join(result)
+
+
+def _strip_comment_ranges(code: str, scan: JavaScan, start: int, end: int) -> str:
+    first = bisect_left(scan.comments, (start, -1))
+    parts, pos = [], start
+    for s, e in scan.comments[first:]:
+        if s >= end:
+            break
+        parts.append(code[pos:s])
+        pos = e
+    parts.append(code[pos:end])
+    return " ".join(parts)
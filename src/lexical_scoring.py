@@ -0,0 +1,111 @@
+import re
+from typing import Dict, List
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SPACE = re.compile(r"\s+")
+
+# Pairs per dense bag-of-words block in token_f1
+_CHUNK = 256
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def normalize_signature(signature: str) -> str:
+    return _SPACE.sub(" ", (signature or "").strip()).replace(" (", "(").replace("( ", "(").replace(" )", ")")
+
+
+def token_f1(answers: List[np.ndarray], truths: List[np.ndarray]) -> np.ndarray:
+    """Bag-of-words F1 of each answer against its ground truth, over dense count blocks"""
+    scores = np.zeros(len(answers))
+    for start in range(0, len(answers), _CHUNK):
+        a_ids, t_ids = answers[start:start + _CHUNK], truths[start:start + _CHUNK]
+        n = len(a_ids)
+        vocab, inverse = np.unique(np.concatenate(a_ids + t_ids + [np.zeros(0, np.int64)]), return_inverse=True)
+        a_counts = np.zeros((n, len(vocab)), np.int32)
+        t_counts = np.zeros((n, len(vocab)), np.int32)
+        lengths = np.array([len(x) for x in a_ids + t_ids], np.int64)
+        rows = np.repeat(np.arange(2 * n) % n, lengths)
+        split = lengths[:n].sum()
+        np.add.at(a_counts, (rows[:split], inverse[:split]), 1)
+        np.add.at(t_counts, (rows[split:], inverse[split:]), 1)
+        overlap = np.minimum(a_counts, t_counts).sum(axis=1)
+        total = lengths[:n] + lengths[n:]
+        scores[start:start + n] = np.divide(2 * overlap, total, out=np.zeros(n), where=total > 0)
+    return scores
+
+
+def lcs_length(a: np.ndarray, b: np.ndarray) -> int:
+    """Longest common subsequence, one vectorized DP row per token of `a`"""
+    if not len(a) or not len(b):
+        return 0
+    row = np.zeros(len(b) + 1, np.int32)
+    for token in a:
+        # row[j] = max(row[j], row[j - 1] + 1 on a match, new row[j - 1]); rows are non-decreasing
+        candidate = np.maximum(row[1:], np.where(b == token, row[:-1] + 1, 0))
+        row[1:] = np.maximum.accumulate(candidate)
+    return int(row[-1])
+
+
+def rouge_l(answers: List[np.ndarray], truths: List[np.ndarray]) -> np.ndarray:
+    lcs = np.array([lcs_length(a, t) for a, t in zip(answers, truths)], np.float64)
+    a_len = np.array([len(a) for a in answers], np.float64)
+    t_len = np.array([len(t) for t in truths], np.float64)
+    precision = np.divide(lcs, a_len, out=np.zeros_like(lcs), where=a_len > 0)
+    recall = np.divide(lcs, t_len, out=np.zeros_like(lcs), where=t_len > 0)
+    total = precision + recall
+    return np.divide(2 * precision * recall, total, out=np.zeros_like(lcs), where=total > 0)
+
+
+class LexicalScorer:
+    """Cheap local scoring tier in front of the LLM-judged RAGAS metrics.
+
+    Every pair gets token F1, a ROUGE-L F-measure and exact name/signature
+    checks. Pairs scoring at least `accept` with matching names and
+    signatures are decided as right, empty answers and pairs at or below
+    `reject` as wrong; only the band in between is escalated to RAGAS.
+    """
+
+    def __init__(self, logger, exception_handler, accept: float, reject: float):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.accept = accept
+        self.reject = reject
+
+    def score(self, pairs: Dict[str, list]) -> Dict[str, np.ndarray]:
+        vocab = {}
+        def ids(text):
+            return np.array([vocab.setdefault(w, len(vocab)) for w in words(text)], np.int64)
+        answers = [ids(a) for a in pairs["answer"]]
+        truths = [ids(t) for t in pairs["ground_truth"]]
+
+        f1 = token_f1(answers, truths)
+        rouge = rouge_l(answers, truths)
+        name_match = np.array(pairs["name_match"], bool)
+        signature_match = np.array([
+            normalize_signature(g) == normalize_signature(p) if g else True
+            for g, p in zip(pairs["gold_signature"], pairs["pred_signature"])
+        ], bool)
+        exact = np.array([words(a) == words(t) for a, t in zip(pairs["answer"], pairs["ground_truth"])], bool)
+        empty = np.array([len(a) == 0 for a in answers], bool)
+
+        lexical = (f1 + rouge) / 2
+        right = (exact | (lexical >= self.accept)) & name_match & signature_match & ~empty
+        wrong = empty | ((lexical <= self.reject) & ~right)
+        verdict = np.where(right, "right", np.where(wrong, "wrong", "uncertain"))
+        tier = np.where(verdict == "uncertain", "ragas", "lexical")
+
+        self.logger.info(f"Lexical tier: {int(right.sum())} right, {int(wrong.sum())} wrong, "
+                         f"{int((tier == 'ragas').sum())} of {len(tier)} pairs escalated to RAGAS")
+        return {
+            "token_f1": f1.round(4),
+            "rouge_l": rouge.round(4),
+            "name_match": name_match,
+            "signature_match": signature_match,
+            "lexical_score": lexical.round(4),
+            "verdict": verdict,
+            "tier": tier,
+        }
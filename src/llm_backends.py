@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from collections import Counter
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from config.config import llm_config
+
+_CLASS_NAME = re.compile(r"\b(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)")
+_METHOD_LIST = re.compile(r"^Describe these methods: (.*)$", re.MULTILINE)
+_PACKED_BLOCK = re.compile(r"^### Class id (\d+)$", re.MULTILINE)
+
+
+def create_chat_model(logger):
+    """Chat model for llm_config.backend: "cohere" (default) or "fake" (offline stand-in)"""
+    if llm_config.backend == "fake":
+        logger.info("Using the local fake LLM backend")
+        return FakeChatBackend(
+            latency_ms=llm_config.fake_latency_ms,
+            latency_sigma=llm_config.fake_latency_sigma,
+            error_rate=llm_config.fake_error_rate,
+            rate_limit_rate=llm_config.fake_rate_limit_rate,
+            seed=llm_config.fake_seed
+        ).as_runnable()
+    if llm_config.backend != "cohere":
+        raise ValueError(f"Unknown LLM backend: {llm_config.backend}")
+
+    from langchain_cohere import ChatCohere
+    return ChatCohere(
+        model=llm_config.model_name,
+        cohere_api_key=llm_config.api_key,
+        temperature=llm_config.temperature,
+        max_tokens=llm_config.max_tokens
+    )
+
+def backend_model_id() -> str:
+    """Model identity for cache keys, so stand-in answers never mix with real ones"""
+    if llm_config.backend == "cohere":
+        return llm_config.model_name
+    return f"{llm_config.backend}:{llm_config.model_name}"
+
+
+class FakeBackendError(Exception):
+    """Injected failure; carries status_code/headers like a provider HTTP error"""
+
+    def __init__(self, message: str, status_code: int, headers: dict = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeChatBackend:
+    """Deterministic in-process stand-in for the chat model.
+
+    Answers the class, packed-class and overview prompts with schema-valid
+    JSON built from the prompt itself, after a log-normal latency with median
+    `latency_ms`. Failures are injected at `error_rate` (503) and
+    `rate_limit_rate` (429 with Retry-After). Latency and failures are drawn
+    from a generator seeded by `seed`, the prompt and how often that prompt
+    was seen, so a run is reproducible regardless of scheduling order.
+    """
+
+    def __init__(self, latency_ms: float = 800.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.seen = Counter()
+        self.calls = 0
+
+    def as_runnable(self) -> RunnableLambda:
+        return RunnableLambda(self._invoke_sync, afunc=self.ainvoke)
+
+    def _invoke_sync(self, prompt) -> AIMessage:
+        return asyncio.run(self.ainvoke(prompt))
+
+    async def ainvoke(self, prompt) -> AIMessage:
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.seen[digest] += 1
+        self.calls += 1
+        rng = random.Random(f"{self.seed}:{digest}:{self.seen[digest]}")
+
+        latency = self.latency_ms * math.exp(rng.gauss(0, self.latency_sigma)) if self.latency_ms > 0 else 0.0
+        await asyncio.sleep(latency / 1000)
+
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            raise FakeBackendError("429 Too Many Requests (injected)", 429, {"Retry-After": "1"})
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeBackendError("503 Service Unavailable (injected)", 503)
+        return AIMessage(content=json.dumps(self.answer(text)))
+
+    def answer(self, text: str):
+        blocks = _PACKED_BLOCK.split(text)
+        if len(blocks) > 1:
+            # [preamble, id, body, id, body, ...]
+            return [
+                dict(self.describe_class(body), id=int(class_id))
+                for class_id, body in zip(blocks[1::2], blocks[2::2])
+            ]
+        if _METHOD_LIST.search(text):
+            return self.describe_class(text)
+        return {
+            "project_name": "",
+            "purpose": "Stand-in project purpose",
+            "core_functionality": "Stand-in core functionality",
+            "key_technologies": ["Java"],
+            "architecture": "Stand-in architecture",
+            "business_domain": "Stand-in business domain",
+        }
+
+    @staticmethod
+    def describe_class(text: str) -> dict:
+        names_match = _METHOD_LIST.search(text)
+        names = []
+        if names_match and names_match.group(1).strip() != "(none)":
+            names = [n.strip() for n in names_match.group(1).split(",") if n.strip()]
+        class_match = _CLASS_NAME.search(text[names_match.end():] if names_match else text)
+        class_name = class_match.group(1) if class_match else "the class"
+        complexity = ("low", "medium", "high")[min(2, len(names) // 5)]
+        return {
+            "overview": f"Stand-in overview of {class_name}",
+            "methods": {name: f"Stand-in description of {name}" for name in names},
+            "complexity": complexity,
+        }
@@ -1,11 +1,19 @@
 import asyncio
-import re
+import json
+import time
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_cohere import ChatCohere
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
-from typing import List
+from typing import List, Union
 from config.config import app_config, llm_config  # Top-level config
+from utils.analysis_cache import AnalysisCache
+from utils.json_repair import MalformedResponseError, repair_json
+from utils.metrics import metrics
+from src.code_processor import CodeProcessor
+from src.llm_backends import backend_model_id, create_chat_model
+from src.request_packer import RequestPacker
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.retry_policy import RATE_LIMIT, CircuitBreaker, RetryBudgetExceeded, RetryPolicy, classify_error
 
 # Define structured output models
 class MethodInfo(BaseModel):
@@ -20,6 +28,11 @@ class JavaClassAnalysis(BaseModel):
     dependencies: list[str] = Field(description="Class dependencies")
     complexity: str = Field(description="Complexity level: low, medium, high")
 
+class ClassDescription(BaseModel):
+    overview: str = Field(description="Class purpose overview")
+    methods: dict[str, str] = Field(description="Method name to description")
+    complexity: str = Field(description="Complexity level: low, medium, high")
+
 class ProjectOverview(BaseModel):
     project_name: str = Field(description="Project name")
     purpose: str = Field(description="Project purpose")
@@ -28,46 +41,44 @@ class ProjectOverview(BaseModel):
     architecture: str = Field(description="System architecture")
     business_domain: str = Field(description="Business domain")
 
+# Instructions and output estimate added to the code when budgeting tokens per call
+PROMPT_OVERHEAD_TOKENS = 400
+
+# How each retry error class is reported to the adaptive limiter
+LIMITER_OUTCOMES = {"rate_limit": "throttled", "timeout": "timeout"}
+
+COMPLEXITY_RANK = {"unknown": 0, "low": 1, "medium": 2, "high": 3}
+
 class AsyncLLMAnalyzer:
     def __init__(self, logger, exception_handler):
         self.logger = logger
         self.exception_handler = exception_handler
-        self.llm = ChatCohere(
-            model=llm_config.model_name,
-            cohere_api_key=llm_config.api_key,
-            temperature=llm_config.temperature,
-            max_tokens=llm_config.max_tokens
-        )
+        self.llm = create_chat_model(logger)
         
         # Create prompt templates
-        self.class_prompt = ChatPromptTemplate.from_template(
-            "You are a software architect. Analyze the following Java class and return a JSON object with the following keys:\n"
-    "- class_name: The name of the class\n"
-    "- overview: A brief summary of the class's purpose\n"
-    "- methods: List of objects with:\n"
-    "    - name: Method name\n"
-    "    - signature: Full method signature with annotations\n"
-    "    - description: What the method does\n"
-    "- dependencies: List of external classes/imports used\n"
-    "- complexity: Complexity level (low, medium, high)\n\n"
-    "Return ONLY valid JSON. No explanation or markdown.\n\n"
-    "Output format:\n"
-    "{{{{\n"
-    '  "class_name": "ExampleClass",\n'
-    '  "overview": "Handles business logic for orders",\n'
-    '  "methods": [\n'
-    "    {{{{\n"
-    '      "name": "calculateTotal",\n'
-    '      "signature": "public double calculateTotal(List<Item> items)",\n'
-    '      "description": "Calculates the total price for the given items."\n'
-    "    }}}}\n"
-    "  ],\n"
-    '  "dependencies": ["java.util.List", "com.myapp.Item"],\n'
-    '  "complexity": "medium"\n'
-    "}}}}\n\n"
-    "Use empty strings (\"\") for missing values. Maintain exact JSON key names.\n\n"
+        # Names, signatures and dependencies are extracted statically; the LLM
+        # only writes the prose fields, keyed by method name
+        self.class_template = (
+            "You are a software architect. Describe the following Java class.\n"
+    "Return ONLY valid JSON with exactly these keys, no explanation or markdown:\n"
+    '{{"overview": "<brief summary of the class purpose>", '
+    '"methods": {{"<method name>": "<what the method does>"}}, '
+    '"complexity": "<low|medium|high>"}}\n\n'
+    "Describe these methods: {method_names}\n\n"
     "Code:\n{code}"
 )
+        self.class_prompt = ChatPromptTemplate.from_template(self.class_template)
+
+        # Several small classes per request, answered as one JSON array
+        self.packed_class_template = (
+            "You are a software architect. Describe each Java class below.\n"
+    "Return ONLY a valid JSON array with one object per class, no explanation or markdown:\n"
+    '[{{"id": <class id>, "overview": "<brief summary of the class purpose>", '
+    '"methods": {{"<method name>": "<what the method does>"}}, '
+    '"complexity": "<low|medium|high>"}}]\n\n'
+    "{classes}"
+)
+        self.packed_class_prompt = ChatPromptTemplate.from_template(self.packed_class_template)
         
         self.overview_prompt = ChatPromptTemplate.from_template(
     "Generate a comprehensive project overview from the documentation:\n"
@@ -94,39 +105,338 @@ class AsyncLLMAnalyzer:
 
         
         # Create chains
-        self.class_chain = self.class_prompt | self.llm | JsonOutputParser(pydantic_object=JavaClassAnalysis)
+        # Class responses are parsed with repair_json so truncated answers can be salvaged
+        self.class_chain = self.class_prompt | self.llm | StrOutputParser()
         self.overview_chain = self.overview_prompt | self.llm | JsonOutputParser(pydantic_object=ProjectOverview)
+        self.packed_class_chain = self.packed_class_prompt | self.llm | StrOutputParser()
 
-    async def analyze_classes_batch(self, code_chunks: List[str]) -> List[dict]:
-        """Process multiple class chunks concurrently"""
-        tasks = [self.analyze_class(chunk) for chunk in code_chunks]
-        return await asyncio.gather(*tasks)
+        self.code_processor = CodeProcessor(logger, exception_handler)
 
-    async def analyze_class(self, code_chunk: str) -> dict:
-        for attempt in range(llm_config.max_retries):
+        # Bounds every LLM call of the run, whichever file or pack it belongs to
+        self.limiter = AdaptiveRateLimiter(
+            logger,
+            initial_concurrency=app_config.max_concurrent,
+            min_concurrency=llm_config.min_concurrency,
+            max_concurrency=llm_config.max_concurrency,
+            requests_per_minute=llm_config.requests_per_minute,
+            tokens_per_minute=llm_config.tokens_per_minute,
+            target_latency=llm_config.target_latency
+        )
+
+        self.retry_policy = RetryPolicy(
+            logger,
+            max_attempts=llm_config.max_retries,
+            base_delay=llm_config.retry_base_delay,
+            max_delay=llm_config.retry_max_delay,
+            budget_ratio=llm_config.retry_budget_ratio,
+            budget_min=llm_config.retry_budget_min
+        )
+        self.breaker = CircuitBreaker(
+            logger,
+            failure_threshold=llm_config.breaker_failure_threshold,
+            cooldown=llm_config.breaker_cooldown
+        )
+
+        self.salvaged = 0
+        self.continuations = 0
+
+        self.packer = None
+        if app_config.pack_requests:
+            self.packer = RequestPacker(
+                logger, exception_handler, self.analyze_packed,
+                max_tokens=app_config.pack_max_tokens,
+                max_items=app_config.pack_max_classes,
+                linger_ms=app_config.pack_linger_ms
+            )
+
+        self.cache = None
+        if app_config.cache_enabled:
+            self.cache = AnalysisCache(
+                logger, exception_handler, app_config.cache_path,
+                max_size_mb=app_config.cache_max_size_mb,
+                max_age_days=app_config.cache_max_age_days
+            )
+
+    async def invoke(self, chain, inputs: dict, prompt_text: str):
+        """Run one LLM call through the circuit breaker and the shared rate/concurrency limiter"""
+        tokens = self.code_processor.estimate_tokens(prompt_text) + PROMPT_OVERHEAD_TOKENS
+        queued = time.monotonic()
+        await self.breaker.before_call()
+        error_kind = "cancelled"
+        try:
+            await self.limiter.acquire(tokens)
+            start = time.monotonic()
+            metrics.observe("llm_queue_wait_seconds", start - queued)
+            metrics.count("llm_tokens_in_total", tokens)
+            outcome = "error"
             try:
-                # Truncate large chunks
-                if len(code_chunk) > 3000:
-                    truncated = code_chunk[:3000] + "\n// ... [truncated]"
-                    self.logger.debug(f"Truncating code chunk from {len(code_chunk)} to 3000 chars")
-                else:
-                    truncated = code_chunk
-                    
-                self.logger.debug(f"Analyzing class chunk (attempt {attempt+1})")
-                result = await self.class_chain.ainvoke({"code": truncated})
-                
-                # Post-process result
-                result["methods"] = result.get("methods", [])
-                result["dependencies"] = result.get("dependencies", [])
-                result["complexity"] = result.get("complexity", "unknown")
-                
+                result = await asyncio.wait_for(chain.ainvoke(inputs), llm_config.timeout)
+                outcome = "ok"
+                error_kind = None
+                text = result if isinstance(result, str) else json.dumps(result, default=str)
+                metrics.count("llm_tokens_out_total", self.code_processor.estimate_tokens(text))
                 return result
             except Exception as ex:
-                if attempt < llm_config.max_retries - 1:
-                    await asyncio.sleep(1)
-                    continue
+                error_kind = classify_error(ex)
+                outcome = LIMITER_OUTCOMES.get(error_kind, "error")
+                raise
+            finally:
+                metrics.observe("llm_service_seconds", time.monotonic() - start, outcome=outcome)
+                metrics.count("llm_calls_total", outcome=outcome)
+                await self.limiter.release(time.monotonic() - start, outcome)
+        finally:
+            if error_kind == "cancelled":
+                self.breaker.probe_in_flight = False
+            else:
+                self.breaker.record(error_kind)
+
+    async def analyze_classes_batch(self, code_chunks: List[Union[str, List[str]]],
+                                    imports: List[str] = None) -> List[dict]:
+        """Process multiple class chunks concurrently.
+
+        An item may be a list of parts of one oversized class; its parts are
+        analyzed concurrently and merged into a single result. `imports` are
+        the source file's imports, used for the static dependency list.
+        """
+        tasks = []
+        for chunk in code_chunks:
+            if isinstance(chunk, str):
+                tasks.append(self.analyze_class(chunk, imports))
+            elif len(chunk) == 1:
+                tasks.append(self.analyze_class(chunk[0], imports))
+            else:
+                tasks.append(self.analyze_class_parts(chunk, imports))
+        return await asyncio.gather(*tasks)
+
+    async def analyze_class_parts(self, parts: List[str], imports: List[str] = None) -> dict:
+        self.logger.debug(f"Analyzing class split into {len(parts)} parts")
+        partials = await asyncio.gather(*(self.analyze_class(part, imports) for part in parts))
+        return self.merge_partial_analyses(partials)
+
+    @staticmethod
+    def merge_partial_analyses(partials: List[dict]) -> dict:
+        """Combine analyses of parts of one class: union methods and dependencies,
+        keep the highest complexity and join the distinct overviews in part order"""
+        succeeded = [p for p in partials if not p.get("failed")] or partials
+
+        class_name = next((p["class_name"] for p in succeeded if p.get("class_name") not in (None, "", "Unknown")),
+                          succeeded[0].get("class_name", "Unknown"))
+
+        overviews = []
+        for p in succeeded:
+            overview = (p.get("overview") or "").strip()
+            if overview and overview not in overviews:
+                overviews.append(overview)
+
+        methods, seen_methods = [], set()
+        dependencies = []
+        for p in partials:
+            for method in p.get("methods", []):
+                key = (method.get("name"), method.get("signature"))
+                if key not in seen_methods:
+                    seen_methods.add(key)
+                    methods.append(method)
+            for dependency in p.get("dependencies", []):
+                if dependency not in dependencies:
+                    dependencies.append(dependency)
+
+        complexities = [str(p.get("complexity", "")).lower() for p in succeeded]
+        complexity = max(complexities, key=lambda c: COMPLEXITY_RANK.get(c, -1))
+
+        merged = {
+            "class_name": class_name,
+            "overview": " ".join(overviews),
+            "methods": methods,
+            "dependencies": dependencies,
+            "complexity": complexity,
+        }
+        if any(p.get("failed") for p in partials):
+            # A class with any failed part is retried as a whole
+            merged["failed"] = True
+        return merged
+
+    async def analyze_class(self, code_chunk: str, imports: List[str] = None) -> dict:
+        skeleton = self.code_processor.extract_structure(code_chunk, imports)
+        method_names = list(dict.fromkeys(m["name"] for m in skeleton["methods"]))
+
+        tokens = self.code_processor.estimate_tokens(code_chunk)
+        packable = self.packer is not None and tokens <= app_config.pack_class_max_tokens
+
+        # Results are keyed by the prompt that produced them. A packable class
+        # may have been answered alone when its pack missed it, so both keys are tried
+        cache_key = packed_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(
+                code_chunk, self.class_template, backend_model_id(), llm_config.temperature
+            )
+            if packable:
+                packed_key = self.cache.make_key(
+                    code_chunk, self.packed_class_template, backend_model_id(), llm_config.temperature
+                )
+            cached = self.cache.get_any([k for k in (packed_key, cache_key) if k])
+            if cached is not None:
+                self.logger.debug("Analysis cache hit")
+                return self.apply_description(skeleton, cached)
+
+        if packable:
+            try:
+                description = await self.packer.submit((code_chunk, method_names), tokens)
+            except Exception as ex:
                 await self.exception_handler.handle(ex, "analyze_class")
-                return self.fallback_class_analysis(code_chunk)
+                return self.fallback_class_analysis(code_chunk, imports)
+            if description is not None:
+                if packed_key:
+                    self.cache.put(packed_key, description)
+                return self.apply_description(skeleton, description)
+            self.logger.debug(f"Class {skeleton['class_name']} missing from packed response, retrying alone")
+
+        try:
+            # Oversized classes are split to the token budget upstream
+            description, complete = await self.retry_policy.run(
+                lambda: self.describe_class(code_chunk, method_names),
+                f"analyze_class {skeleton['class_name']}"
+            )
+            if cache_key and complete:
+                self.cache.put(cache_key, description)
+            return self.apply_description(skeleton, description)
+        except Exception as ex:
+            await self.exception_handler.handle(ex, "analyze_class")
+            return self.fallback_class_analysis(code_chunk, imports)
+
+    async def describe_class(self, code_chunk: str, method_names: List[str]) -> tuple:
+        """Get the class description, salvaging a truncated or malformed response.
+
+        Complete fields of a damaged response are kept and one continuation
+        request asks only for what is missing. Returns (description, complete).
+        """
+        text = await self.invoke(self.class_chain, {
+            "code": code_chunk,
+            "method_names": ", ".join(method_names) or "(none)"
+        }, code_chunk)
+        description, complete = self.salvage_description(text)
+        if complete:
+            return description, True
+
+        self.salvaged += 1
+        described = {name.lower() for name in description["methods"]}
+        missing = [name for name in method_names if name.lower() not in described]
+        if description["overview"] and description["complexity"] != "unknown" and not missing:
+            return description, True
+
+        self.continuations += 1
+        self.logger.debug(f"Salvaged partial response, requesting {len(missing)} missing method descriptions")
+        try:
+            text = await self.invoke(self.class_chain, {
+                "code": code_chunk,
+                "method_names": ", ".join(missing) or "(none)"
+            }, code_chunk)
+            continuation, complete = self.salvage_description(text)
+        except Exception as ex:
+            self.logger.warning(f"Continuation request failed, keeping the partial description: {ex}")
+            return description, False
+
+        description["overview"] = description["overview"] or continuation["overview"]
+        if description["complexity"] == "unknown":
+            description["complexity"] = continuation["complexity"]
+        for name, method_description in continuation["methods"].items():
+            description["methods"].setdefault(name, method_description)
+        return description, complete
+
+    @staticmethod
+    def salvage_description(text: str) -> tuple:
+        """Parse a class description response, keeping only fields that are complete and valid.
+
+        Returns (description, complete); raises MalformedResponseError when
+        nothing usable is left, so the call is retried as a parse error.
+        """
+        value, complete = repair_json(text)
+        if not isinstance(value, dict):
+            raise MalformedResponseError(f"Expected a JSON object, got {type(value).__name__}")
+
+        overview = value.get("overview")
+        complexity = str(value.get("complexity") or "").lower()
+        methods = value.get("methods") or {}
+        if isinstance(methods, list):
+            methods = {m.get("name"): m.get("description") for m in methods if isinstance(m, dict)}
+        if not isinstance(methods, dict):
+            methods = {}
+
+        description = ClassDescription.parse_obj({
+            "overview": overview if isinstance(overview, str) else "",
+            "methods": {str(k): v for k, v in methods.items() if k and isinstance(v, str) and v},
+            "complexity": complexity if complexity in COMPLEXITY_RANK else "unknown",
+        }).dict()
+        if not (description["overview"] or description["methods"]):
+            raise MalformedResponseError("Response has no usable fields")
+        complete = complete and bool(description["overview"]) and description["complexity"] != "unknown"
+        return description, complete
+
+    async def analyze_packed(self, items: List[tuple]) -> List[dict]:
+        """One LLM call for several (code_chunk, method_names) items.
+
+        Returns a description per item, or None where the response had no
+        valid entry for it. The call is retried like any other; once its
+        retries are spent every item is answered None and retried alone,
+        unless the backend is throttling or the circuit breaker is open, in
+        which case the error is raised to every item instead.
+        """
+        blocks = [
+            f"### Class id {i}\nDescribe these methods: {', '.join(names) or '(none)'}\n{code}"
+            for i, (code, names) in enumerate(items)
+        ]
+        self.logger.debug(f"Analyzing {len(items)} classes in one packed request")
+        classes = "\n\n".join(blocks)
+        try:
+            text = await self.retry_policy.run(
+                lambda: self.invoke(self.packed_class_chain, {"classes": classes}, classes),
+                f"packed request of {len(items)} classes"
+            )
+        except Exception as ex:
+            cause = ex.__cause__ if isinstance(ex, RetryBudgetExceeded) and ex.__cause__ else ex
+            if classify_error(cause) == RATE_LIMIT or self.breaker.state != "closed":
+                # One call per class would only multiply the load on a struggling backend
+                raise
+            self.logger.warning(f"Packed request of {len(items)} classes failed, retrying them alone: {ex}")
+            return [None] * len(items)
+        response, complete = repair_json(text)
+        if not complete and isinstance(response, list) and response:
+            # The last entry is the one the response was cut in; it is retried alone
+            self.salvaged += 1
+            response = response[:-1]
+        if isinstance(response, dict):
+            # Some models wrap the array in an object
+            response = next((v for v in response.values() if isinstance(v, list)), [response])
+
+        results = [None] * len(items)
+        for entry in response if isinstance(response, list) else []:
+            try:
+                index = int(entry.get("id"))
+                if 0 <= index < len(items) and results[index] is None:
+                    results[index] = ClassDescription.parse_obj(
+                        {k: entry.get(k) for k in ("overview", "methods", "complexity")}
+                    ).dict()
+            except Exception:
+                # Invalid entry, the class is retried on its own
+                continue
+        return results
+
+    @staticmethod
+    def apply_description(skeleton: dict, description: dict) -> dict:
+        """Fill the LLM's prose into the statically extracted skeleton"""
+        descriptions = description.get("methods") or {}
+        if not isinstance(descriptions, dict):
+            # Tolerate a list of {"name", "description"} objects
+            descriptions = {m.get("name", ""): m.get("description", "") for m in descriptions if isinstance(m, dict)}
+        by_lower_name = {str(k).lower(): v for k, v in descriptions.items()}
+
+        result = dict(skeleton)
+        result["overview"] = description.get("overview", "") or ""
+        result["complexity"] = description.get("complexity", "unknown") or "unknown"
+        result["methods"] = [
+            dict(m, description=descriptions.get(m["name"], by_lower_name.get(m["name"].lower(), "")) or "")
+            for m in skeleton["methods"]
+        ]
+        return result
     
     async def analyze_project_overview(self, overview_text: str, project_name: str) -> ProjectOverview:
         try:
@@ -136,7 +446,10 @@ class AsyncLLMAnalyzer:
             else:
                 truncated = overview_text
                 
-            result = await self.overview_chain.ainvoke({"overview_text": truncated})
+            result = await self.retry_policy.run(
+                lambda: self.invoke(self.overview_chain, {"overview_text": truncated}, truncated),
+                "analyze_project_overview"
+            )
             # Set project_name directly in the result dictionary
             result["project_name"] = project_name
             return ProjectOverview(**result)
@@ -151,16 +464,18 @@ class AsyncLLMAnalyzer:
                 business_domain="Unknown"
             )
     
-    def fallback_class_analysis(self, code: str) -> dict:
-        class_name = "Unknown"
-        match = re.search(r'class\s+(\w+)', code)
-        if match:
-            class_name = match.group(1)
-        
-        return JavaClassAnalysis(
-            class_name=class_name,
-            overview="Analysis failed",
-            methods=[],
-            dependencies=[],
-            complexity="unknown"
-        ).dict()
\ No newline at end of file
+    def unfinished_class_analysis(self, parts: List[str], imports: List[str] = None) -> dict:
+        """Static skeleton of a class the run's deadline left unanalyzed"""
+        skeletons = [self.code_processor.extract_structure(part, imports) for part in parts]
+        result = self.merge_partial_analyses(skeletons) if len(skeletons) > 1 else skeletons[0]
+        result["overview"] = "Not analyzed: deadline reached"
+        result["unfinished"] = True
+        return result
+
+    def fallback_class_analysis(self, code: str, imports: List[str] = None) -> dict:
+        """Static skeleton of the class when the LLM analysis failed"""
+        skeleton = self.code_processor.extract_structure(code, imports)
+        skeleton["overview"] = "Analysis failed"
+        result = JavaClassAnalysis(**skeleton).dict()
+        result["failed"] = True
+        return result
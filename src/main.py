@@ -1,32 +1,61 @@
 
+import argparse
 import asyncio
 import os
+import time
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
 
-from config.config import app_config, llm_config  # Top-level config
+from config.config import app_config, eval_config, llm_config  # Top-level config
 from utils.logger import Logger
 from utils.exception_handler import ExceptionHandler
 from utils.git_tool import GitManager
-from src.data_loader import DataLoader
+from utils.run_journal import FileProgress, RunJournal
+from utils.metrics import metrics
+from src.data_loader import DataLoader, GitObjectDataLoader
 from src.code_processor import CodeProcessor
-from src.llm_integration import AsyncLLMAnalyzer
+from src.parsing_stage import ParsingStage
+from src.scheduler import CostScheduler, WorkItem
+from src.dedup import Deduplicator, adapt_analysis
+from src.dependency_graph import DependencyGraphBuilder
+from src.llm_integration import AsyncLLMAnalyzer, ProjectOverview
 from src.output_generator import OutputWriter
 
 class CodebaseAnalyzer:
-    def __init__(self):
+    def __init__(self, deadline_seconds: float = 0, resume_run_id: str = None):
         # Initialize dependencies
         self.logger = Logger(app_config.log_level, app_config.log_file)
         self.exception_handler = ExceptionHandler(self.logger)
         self.git_manager = GitManager(self.logger, self.exception_handler)
-        self.data_loader = DataLoader(self.logger, self.exception_handler)
+        if app_config.clone_mode == "blobless":
+            self.data_loader = GitObjectDataLoader(self.logger, self.exception_handler)
+        else:
+            self.data_loader = DataLoader(self.logger, self.exception_handler)
         self.code_processor = CodeProcessor(self.logger, self.exception_handler)
+        self.parsing_stage = ParsingStage(self.logger, self.exception_handler, self.data_loader)
         self.llm_analyzer = AsyncLLMAnalyzer(self.logger, self.exception_handler)
         self.output_writer = OutputWriter(self.logger, self.exception_handler)
+        # Wall-clock budget counted from construction; 0 means none
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds > 0 else None
+        self.journal = None
+        if app_config.journal_enabled or resume_run_id:
+            self.journal = RunJournal(self.logger, self.exception_handler, app_config.journal_path)
+        # A resumed run keeps its id, which is also the timestamp of its output files
+        self.run_id = resume_run_id or self.output_writer.timestamp
+        self.output_writer.timestamp = self.run_id
+        self.resuming = bool(resume_run_id)
+        self.resumed_files = {}
+        if resume_run_id:
+            if self.journal.get_header(resume_run_id) is None:
+                raise ValueError(f"No journaled run with id {resume_run_id}")
+            self.resumed_files = self.journal.completed_files(resume_run_id)
     
     async def run_analysis(self):
-        self.logger.info("Starting SakilaProject analysis")
+        self.logger.info(f"Starting SakilaProject analysis (run id {self.run_id})")
+        if self.resuming:
+            self.logger.info(f"Resuming: {len(self.resumed_files)} files already journaled")
         
         # Create required directories
         Path("cloned_repo").mkdir(exist_ok=True)
@@ -34,89 +63,387 @@ class CodebaseAnalyzer:
         Path(app_config.log_file).parent.mkdir(parents=True, exist_ok=True)
         
         # Clone repository
-        repo_dir = await self.git_manager.clone_repository(
-            app_config.codebase_repo, 
-            "cloned_repo"
-        )
+        with metrics.span("clone"):
+            repo_dir = await self.git_manager.clone_repository(
+                app_config.codebase_repo, 
+                "cloned_repo",
+                blobless=app_config.clone_mode == "blobless",
+                ref=app_config.clone_ref
+            )
+        
+        # In incremental mode, only files changed since the last recorded commit are analyzed
+        previous_output, changed_paths, stale_paths, head_sha = await self.resolve_incremental_scope(repo_dir)
         
         # Find and process overview file
         overview_file = self.data_loader.find_project_overview_file(repo_dir)
-        overview_text = ""
-        if overview_file:
-            self.logger.info(f"Using overview file: {overview_file}")
-            overview_text = self.data_loader.read_file(overview_file)
+        journaled_header = self.journal.get_header(self.run_id) if self.resuming else None
+        if journaled_header:
+            self.logger.info("Reusing the journaled project overview")
+            project_overview = ProjectOverview(**journaled_header["project_overview"])
+        elif previous_output and (not overview_file or self.normalize_path(overview_file) not in stale_paths):
+            self.logger.info("Overview unchanged, reusing previous project overview")
+            project_overview = ProjectOverview(**previous_output["project_overview"])
         else:
-            self.logger.warning("No overview file found")
+            overview_text = ""
+            if overview_file:
+                self.logger.info(f"Using overview file: {overview_file}")
+                overview_text = self.data_loader.read_file(overview_file)
+            else:
+                self.logger.warning("No overview file found")
+            
+            # Analyze project overview
+            with metrics.span("overview"):
+                project_overview = await self.llm_analyzer.analyze_project_overview(
+                    overview_text, app_config.project_name
+                )
+        self.logger.info("Project overview analysis complete")
+        
+        header = {
+            "project": app_config.project_name,
+            "analysis_date": datetime.now().isoformat(),
+            "commit_sha": head_sha,
+            "project_overview": project_overview.dict(),
+        }
+        # Components go to the NDJSON stream as they complete, or are collected in memory
+        if self.journal:
+            self.journal.start_run(self.run_id, header)
+        stream = self.output_writer.open_stream(header) if app_config.stream_output else None
+        components = []
+        emitted = 0
+        evaluation = self.start_evaluation()
+        
+        def emit(analysis):
+            nonlocal emitted
+            emitted += 1
+            if stream:
+                stream.write(analysis)
+            else:
+                components.append(analysis)
+            if evaluation:
+                evaluation.submit(analysis)
+        
+        if previous_output:
+            # Keep previous analyses of untouched files; changed and deleted files are replaced
+            retained = 0
+            for c in previous_output.pop("components", []):
+                if self.normalize_path(c.get("source_file", "")) not in stale_paths:
+                    emit(c)
+                    retained += 1
+            self.logger.info(f"Retained {retained} analyses of unchanged files")
         
-        # Analyze project overview
-        project_overview = await self.llm_analyzer.analyze_project_overview(
-            overview_text, app_config.project_name
+        # Files are journaled once every class has a real analysis
+        file_progress = FileProgress(self.journal, self.run_id) if self.journal else None
+        
+        def journal_result(analysis):
+            if file_progress:
+                file_progress.record(analysis)
+        
+        def locate(analysis, item):
+            """Where the class comes from; the analysis store indexes it by package and references"""
+            analysis.update(source_file=item.source_file, package=item.package, references=item.references)
+            return analysis
+        
+        async def analyze(item):
+            self.logger.debug(f"Analyzing class {item.key} (estimated {item.cost:.1f}s)")
+            analysis = (await self.llm_analyzer.analyze_classes_batch([item.parts], item.imports))[0]
+            return locate(analysis, item)
+        
+        def unfinished(item):
+            return locate(self.llm_analyzer.unfinished_class_analysis(item.parts, item.imports), item)
+        
+        def failed(item):
+            return locate(self.llm_analyzer.fallback_class_analysis(item.parts[0], item.imports), item)
+        
+        # Classes are submitted while parsing goes on, so ordering is longest-first
+        # within the scheduler's window. LLM calls themselves are bounded by the
+        # analyzer's adaptive limiter
+        scheduler = CostScheduler(
+            self.logger, self.exception_handler,
+            app_config.latency_history_path,
+            workers=app_config.max_classes_in_flight,
+            deadline=self.deadline,
+            window=app_config.schedule_window
         )
-        self.logger.info("Project overview analysis complete")
         
-        # Find Java files
-        java_files = self.data_loader.list_code_files(repo_dir, [".java"])
-        self.logger.info(f"Found {len(java_files)} Java files for analysis")
+        def skeleton_of(item):
+            return self.code_processor.extract_structure(item.parts[0], item.imports)
         
-        # Process files concurrently with semaphore
-        semaphore = asyncio.Semaphore(app_config.max_concurrent)
-        components = []
+        deduplicator = None
+        if app_config.dedup_enabled:
+            deduplicator = Deduplicator(self.logger, self.exception_handler, app_config.dedup_threshold,
+                                        app_config.dedup_max_representatives)
+        # Near-duplicates waiting for their representative's analysis, by representative index
+        members = defaultdict(list)
         
-        async def process_file(file_path):
-            async with semaphore:
-                self.logger.debug(f"Processing file: {file_path}")
-                try:
-                    code = self.data_loader.read_file(file_path)
-                    if not code.strip():
-                        self.logger.warning(f"Skipping empty file: {file_path}")
-                        return
-                    
-                    class_chunks = self.code_processor.split_into_classes(code)
-                    if not class_chunks:
-                        self.logger.warning(f"No classes found in file: {file_path}")
-                        return
-                    
-                    self.logger.debug(f"Processing {len(class_chunks)} classes in {file_path}")
-                    
-                    # Batch process all classes in this file
-                    analyses = await self.llm_analyzer.analyze_classes_batch(class_chunks)
-                    for analysis in analyses:
-                        analysis["source_file"] = str(file_path)
-                        components.append(analysis)
-                except Exception as ex:
-                    await self.exception_handler.handle(ex, f"process_file: {file_path}")
+        def resolve_member(member, mapping, analysis):
+            if analysis.get("unfinished"):
+                member_analysis = unfinished(member)
+            elif analysis.get("failed"):
+                member_analysis = failed(member)
+            else:
+                member_analysis = locate(adapt_analysis(analysis, skeleton_of(member), mapping), member)
+            emit(member_analysis)
+            journal_result(member_analysis)
         
-        # Execute all file processing tasks
-        tasks = [process_file(file) for file in java_files]
-        await asyncio.gather(*tasks)
+        def on_result(item, analysis):
+            emit(analysis)
+            journal_result(analysis)
+            if deduplicator:
+                deduplicator.record_analysis(item.index, analysis)
+            for member, mapping in members.pop(item.index, []):
+                resolve_member(member, mapping, analysis)
         
-        self.logger.info(f"Analyzed {len(components)} classes")
+        async def dispatch(item):
+            if deduplicator:
+                match = deduplicator.add(item, skeleton_of(item)) if item.signature and len(item.parts) == 1 else None
+                if match is not None:
+                    rep_index, mapping = match
+                    analysis = deduplicator.analysis_of(rep_index)
+                    if analysis is None:
+                        members[rep_index].append((item, mapping))
+                    else:
+                        resolve_member(item, mapping, analysis)
+                    return
+            await scheduler.submit(item)
         
-        # Prepare final output structure
-        output = {
-            "project": app_config.project_name,
-            "analysis_date": datetime.now().isoformat(),
-            "project_overview": project_overview.dict(),
-            "components": components
-        }
+        graph_builder = DependencyGraphBuilder(self.logger, self.exception_handler)
+        class_count = 0
+        
+        def collect(parsed) -> list:
+            """WorkItems of one parsed file; files finished by the resumed run are emitted from the journal"""
+            nonlocal class_count
+            file_path = parsed.path
+            if parsed.class_refs:
+                graph_builder.add_file(str(file_path), parsed.package, parsed.imports,
+                                       parsed.class_names, parsed.class_refs)
+            if parsed.content_hash and self.resumed_files.get(str(file_path)) == parsed.content_hash:
+                for c in self.journal.iter_components(self.run_id, str(file_path)):
+                    emit(c)
+                return []
+            if parsed.error:
+                self.logger.error(f"Exception in parse_file: {file_path}: {parsed.error}")
+                return []
+            if parsed.empty:
+                self.logger.warning(f"Skipping empty file: {file_path}")
+                return []
+            if not parsed.class_parts:
+                self.logger.warning(f"No classes found in file: {file_path}")
+                return []
+            if file_progress:
+                file_progress.expect(str(file_path), parsed.content_hash, len(parsed.class_parts))
+            items = []
+            signatures = parsed.class_signatures or [None] * len(parsed.class_parts)
+            for i, (parts, tokens, signature) in enumerate(zip(parsed.class_parts, parsed.class_tokens, signatures)):
+                items.append(WorkItem(
+                    index=class_count,
+                    key=f"{self.normalize_path(file_path)}#{i}",
+                    source_file=str(file_path),
+                    parts=parts,
+                    imports=parsed.imports,
+                    tokens=tokens,
+                    signature=signature,
+                    package=parsed.package,
+                    references=parsed.class_refs[i] if parsed.class_refs else []
+                ))
+                class_count += 1
+            return items
+        
+        # Bounds the batches parsed ahead of dispatch; a full scheduler window stalls them in turn
+        parse_slots = asyncio.Semaphore(max(1, app_config.parse_workers) * 2)
+        
+        async def parse(batch):
+            # Reading and class splitting run in the parsing pool
+            try:
+                for parsed in await self.parsing_stage.parse_batch(batch):
+                    for item in collect(parsed):
+                        await dispatch(item)
+            except Exception as ex:
+                await self.exception_handler.handle(ex, f"parse_batch: {len(batch)} files")
+            finally:
+                parse_slots.release()
+        
+        def files_to_analyze():
+            for file_path in self.data_loader.iter_code_files(repo_dir, [".java"]):
+                if previous_output and self.normalize_path(file_path) not in changed_paths:
+                    continue
+                yield file_path
+        
+        async def produce():
+            # Parse batches of Java files as soon as discovery yields them
+            tasks = set()
+            file_count = 0
+            try:
+                with metrics.span("discover_parse") as span:
+                    for batch in self.parsing_stage.batches(files_to_analyze()):
+                        await parse_slots.acquire()
+                        file_count += len(batch)
+                        task = asyncio.create_task(parse(batch))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                        # Let already scheduled batches start while the walk continues
+                        await asyncio.sleep(0)
+                    self.logger.info(f"Found {file_count} Java files for analysis")
+                    await asyncio.gather(*tasks)
+                    span["files"] = file_count
+            finally:
+                self.parsing_stage.shutdown()
+                await scheduler.close()
+        
+        producer = asyncio.create_task(produce())
+        try:
+            with metrics.span("analyze") as span:
+                await scheduler.run(analyze, unfinished, failed, on_result)
+                await producer
+                span["classes"] = class_count
+                span["unique"] = class_count - (deduplicator.duplicates if deduplicator else 0)
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+            if stream:
+                stream.close()
+        
+        if deduplicator and deduplicator.duplicates:
+            self.logger.info(f"Near-duplicate detection: {deduplicator.duplicates} of {class_count} classes "
+                             f"reused a representative's analysis")
+        self.logger.info(f"Analyzed {class_count} classes")
+        if self.llm_analyzer.cache:
+            self.logger.info(f"Analysis cache stats: {self.llm_analyzer.cache.stats()}")
+        self.logger.info(f"LLM limiter state: {self.llm_analyzer.limiter.snapshot()}")
+        self.logger.info(f"LLM retry stats: {self.llm_analyzer.retry_policy.stats()}, "
+                         f"circuit breaker opened {self.llm_analyzer.breaker.times_opened} times")
+        self.logger.info(f"Salvaged {self.llm_analyzer.salvaged} partial responses, "
+                         f"{self.llm_analyzer.continuations} continuation requests")
+        if self.llm_analyzer.packer:
+            self.logger.info(f"Request packing stats: {self.llm_analyzer.packer.stats()}")
         
         # Write output
-        await self.output_writer.write_output(output)
-        self.logger.info("Analysis complete. Output saved")
-        if eval_config.enable_evaluation:
-            self.logger.info("Triggering RAGAS evaluation")
+        with metrics.span("write_output"):
+            if stream:
+                if app_config.finalize_stream:
+                    await self.output_writer.finalize_stream(stream.path, self.output_writer.timestamped_path())
+            else:
+                await self.output_writer.write_output(dict(header, components=components))
+        if app_config.graph_enabled:
+            if previous_output:
+                # Unchanged files were not parsed, so their edges are unknown
+                self.logger.info("Skipping the dependency graph for an incremental run")
+            else:
+                try:
+                    graph_path = self.output_writer.timestamped_path(".graph.json")
+                    with metrics.span("graph"):
+                        graph_builder.build().write(graph_path)
+                    self.logger.info(f"Dependency graph written to {graph_path}")
+                except Exception as ex:
+                    await self.exception_handler.handle(ex, "dependency graph")
+        if app_config.store_enabled:
+            if stream:
+                records = self.output_writer.iter_stream(stream.path)
+                next(records)  # Header
+            else:
+                records = components
+            with metrics.span("store"):
+                await self.output_writer.store_output(self.run_id, header, records)
+        if self.journal:
+            self.journal.finish_run(self.run_id)
+        self.logger.info(f"Analysis complete. Output saved ({emitted} components)")
+        if evaluation:
+            # Most pairs were scored while the analysis ran; this drains the rest
             try:
-                # Fire-and-forget approach
-                subprocess.Popen([
-                    sys.executable, 
-                    "evaluation_main.py"
-                ])
-                self.logger.info("Evaluation process started in background")
+                with metrics.span("evaluation_drain"):
+                    await evaluation.finish()
             except Exception as ex:
-                self.logger.error(f"Failed to start evaluation: {str(ex)}")
+                await self.exception_handler.handle(ex, "evaluation")
+        self.write_metrics()
+
+    def write_metrics(self):
+        """Export the run's spans, counters and histograms as JSON and a Prometheus textfile"""
+        if not app_config.metrics_enabled:
+            return
+        llm = self.llm_analyzer
+        if llm.cache:
+            for name, value in llm.cache.stats().items():
+                metrics.gauge(f"cache_{name}", value)
+        for name, value in llm.limiter.snapshot().items():
+            if isinstance(value, (int, float)):
+                metrics.gauge(f"limiter_{name}", value)
+        metrics.gauge("breaker_times_opened", llm.breaker.times_opened)
+        metrics.gauge("responses_salvaged", llm.salvaged)
+        metrics.gauge("continuation_requests", llm.continuations)
+        try:
+            report_path = self.output_writer.timestamped_path(".metrics.json")
+            metrics.write_json(report_path)
+            metrics.write_prometheus(app_config.metrics_prometheus_path)
+            self.logger.info(f"Run metrics written to {report_path} and {app_config.metrics_prometheus_path}")
+        except Exception as ex:
+            self.logger.warning(f"Could not write run metrics: {ex}")
+
+    def start_evaluation(self):
+        """Streaming evaluation stage when enabled; its failure to start never stops the analysis"""
+        if not eval_config.enable_evaluation:
+            return None
+        try:
+            # Imported here so RAGAS is only needed when evaluation is enabled
+            from src.evaluation_stage import StreamingEvaluationStage
+            stage = StreamingEvaluationStage(self.logger, self.exception_handler)
+            stage.start()
+            return stage
+        except (Exception, SystemExit) as ex:
+            # RagasEvaluator exits on a missing API key or gold file
+            self.logger.error(f"Failed to start evaluation: {ex}")
+            return None
+
+    @staticmethod
+    def normalize_path(path) -> str:
+        return os.path.normpath(str(path))
+
+    async def resolve_incremental_scope(self, repo_dir: str):
+        """Return (previous_output, changed_paths, stale_paths, head_sha).
+
+        previous_output is None whenever a full analysis is required.
+        """
+        if not app_config.incremental:
+            return None, set(), set(), await self.git_manager.get_head_sha(repo_dir)
+
+        head_sha = await self.git_manager.fetch_updates(
+            repo_dir, blobless=app_config.clone_mode == "blobless", ref=app_config.clone_ref
+        )
+        previous_output = self.output_writer.load_previous_output()
+        base_sha = (previous_output or {}).get("commit_sha")
+        if not base_sha:
+            self.logger.info("No previously analyzed commit recorded, running full analysis")
+            return None, set(), set(), head_sha
+
+        try:
+            changed, deleted = await self.git_manager.diff_changed_files(repo_dir, base_sha, head_sha)
+        except Exception as ex:
+            await self.exception_handler.handle(ex, "resolve_incremental_scope")
+            self.logger.warning("Falling back to full analysis")
+            return None, set(), set(), head_sha
+
+        changed_paths = {self.normalize_path(os.path.join(repo_dir, p)) for p in changed}
+        # Files a previous run's deadline cut off or whose analysis failed are analyzed again
+        changed_paths |= {
+            self.normalize_path(c.get("source_file", ""))
+            for c in previous_output.get("components", []) if c.get("unfinished") or c.get("failed")
+        }
+        stale_paths = changed_paths | {self.normalize_path(os.path.join(repo_dir, p)) for p in deleted}
+        return previous_output, changed_paths, stale_paths, head_sha
 
 async def main():
-    analyzer = CodebaseAnalyzer()
+    parser = argparse.ArgumentParser(description="Analyze a Java codebase with an LLM")
+    parser.add_argument("--deadline", type=float, default=app_config.deadline_seconds,
+                        help="Seconds after which no new classes are dispatched; "
+                             "completed results are written and the rest marked unfinished")
+    parser.add_argument("--finalize", metavar="NDJSON",
+                        help="Only build the aggregated JSON output from an existing NDJSON stream")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue an interrupted run, skipping files it already journaled")
+    args = parser.parse_args()
+    analyzer = CodebaseAnalyzer(deadline_seconds=args.deadline, resume_run_id=args.resume)
+    if args.finalize:
+        await analyzer.output_writer.finalize_stream(args.finalize)
+        return
     await analyzer.run_analysis()
 
 if __name__ == "__main__":
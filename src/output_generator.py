@@ -1,24 +1,28 @@
 import json
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 from config.config import app_config  # UPDATE THIS IMPORT
+from src.analysis_store import AnalysisStore
+from utils.metrics import metrics
 
 class OutputWriter:
     def __init__(self, logger, exception_handler):
         self.logger = logger
         self.exception_handler = exception_handler
-    
+        # One timestamp per run, shared by the stream and the final JSON
+        self.timestamp = datetime.now().strftime(app_config.timestamp_format)
+
+    def timestamped_path(self, suffix: str = None) -> Path:
+        original_path = Path(app_config.output_json)
+        return original_path.with_name(
+            f"{original_path.stem}_{self.timestamp}{suffix or original_path.suffix}"
+        )
+
     async def write_output(self, data: dict):
         try:
-            # Generate timestamped filename
-            timestamp = datetime.now().strftime(app_config.timestamp_format)
-            original_path = Path(app_config.output_json)
-            
-            # Create timestamped filename
-            timestamped_path = original_path.with_name(
-                f"{original_path.stem}_{timestamp}{original_path.suffix}"
-            )
+            timestamped_path = self.timestamped_path()
             
             # Create directories if needed
             timestamped_path.parent.mkdir(parents=True, exist_ok=True)
@@ -26,9 +30,152 @@ class OutputWriter:
             # Write to file
             with timestamped_path.open("w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2)
+                metrics.count("bytes_written_total", f.tell(), output="json")
             
             self.logger.info(f"Output written to {timestamped_path}")
             return True
         except Exception as ex:
             await self.exception_handler.handle(ex, "write_output")
-            return False
\ No newline at end of file
+            return False
+
+    def previous_outputs(self) -> list:
+        """Aggregated outputs of earlier runs, newest first.
+
+        Only `<stem>_<timestamp><suffix>` names count, so the run's
+        .metrics.json and .graph.json reports are never taken for an output.
+        """
+        original_path = Path(app_config.output_json)
+        prefix = f"{original_path.stem}_"
+        outputs = []
+        for path in original_path.parent.glob(f"{prefix}*{original_path.suffix}"):
+            stamp = path.name[len(prefix):-len(original_path.suffix)]
+            try:
+                outputs.append((datetime.strptime(stamp, app_config.timestamp_format), path))
+            except ValueError:
+                continue
+        return [path for _, path in sorted(outputs, reverse=True)]
+
+    def load_previous_output(self):
+        """Load the most recent timestamped output that records its commit, or None if there is none"""
+        for path in self.previous_outputs():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as ex:
+                self.logger.warning(f"Could not load previous output {path}: {ex}")
+                continue
+            if isinstance(data, dict) and data.get("commit_sha"):
+                self.logger.info(f"Loaded previous output: {path}")
+                return data
+        return None
+
+    def open_stream(self, header: dict) -> "NDJSONStreamWriter":
+        """Start the run's NDJSON stream; the first line is the header, one component per line follows"""
+        stream = NDJSONStreamWriter(
+            self.logger, self.timestamped_path(".ndjson"),
+            batch_size=app_config.stream_batch_size,
+            fsync_interval=app_config.stream_fsync_interval
+        )
+        stream.write(header)
+        return stream
+
+    def iter_stream(self, stream_path):
+        """Yield the header, then each component, of an NDJSON stream"""
+        with Path(stream_path).open("r", encoding="utf-8") as src:
+            for line in src:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written
+                    self.logger.warning(f"Skipping truncated line in {stream_path}")
+
+    async def store_output(self, run_id: str, header: dict, components):
+        """Index a run into the analysis store (app_config.store_path)"""
+        try:
+            store = AnalysisStore(self.logger, self.exception_handler, app_config.store_path)
+            try:
+                store.write_run(run_id, header, components)
+            finally:
+                store.close()
+            return True
+        except Exception as ex:
+            await self.exception_handler.handle(ex, "store_output")
+            return False
+
+    async def finalize_stream(self, stream_path, output_path=None):
+        """Build the aggregated JSON (same layout as write_output) from an NDJSON stream.
+
+        Components are copied one at a time, so memory stays flat however
+        large the stream is. Returns the written path, or None on failure.
+        """
+        stream_path = Path(stream_path)
+        output_path = Path(output_path) if output_path else stream_path.with_suffix(".json")
+        try:
+            records = self.iter_stream(stream_path)
+            with output_path.open("w", encoding="utf-8") as dst:
+                header = next(records)
+                header.pop("components", None)
+                dst.write("{\n")
+                for key, value in header.items():
+                    dst.write(f"  {json.dumps(key)}: {_indent(json.dumps(value, indent=2), 2)},\n")
+                dst.write('  "components": [')
+                count = 0
+                for component in records:
+                    dst.write(("," if count else "") + "\n    " + _indent(json.dumps(component, indent=2), 4))
+                    count += 1
+                dst.write("\n  ]\n}" if count else "]\n}")
+                metrics.count("bytes_written_total", dst.tell(), output="json")
+            self.logger.info(f"Finalized {count} components from {stream_path} into {output_path}")
+            return output_path
+        except Exception as ex:
+            await self.exception_handler.handle(ex, "finalize_stream")
+            return None
+
+
+def _indent(text: str, spaces: int) -> str:
+    return text.replace("\n", "\n" + " " * spaces)
+
+
+class NDJSONStreamWriter:
+    """Appends JSON records one per line with buffered, batched writes.
+
+    Records are written every `batch_size` records and fsynced at most every
+    `fsync_interval` seconds, so a crash loses at most the unsynced tail.
+    """
+
+    def __init__(self, logger, path: Path, batch_size: int = 50, fsync_interval: float = 5.0):
+        self.logger = logger
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.path.open("w", encoding="utf-8")
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.buffer = []
+        self.last_sync = time.monotonic()
+        self.records = 0
+
+    def write(self, record: dict):
+        self.buffer.append(json.dumps(record) + "\n")
+        self.records += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self, sync: bool = False):
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer = []
+        self.file.flush()
+        if sync or time.monotonic() - self.last_sync >= self.fsync_interval:
+            start = time.monotonic()
+            os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+            metrics.observe("fsync_seconds", self.last_sync - start)
+
+    def close(self):
+        if not self.file.closed:
+            self.flush(sync=True)
+            metrics.count("bytes_written_total", self.file.tell(), output="ndjson")
+            self.file.close()
+            self.logger.info(f"Streamed {self.records} records to {self.path}")
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from config.config import app_config
+from src.code_processor import CodeProcessor
+from src.dedup import minhash_signature
+from utils.metrics import metrics
+
+@dataclass
+class ParsedFile:
+    """Result of reading and splitting one source file in a worker process"""
+    path: str
+    class_parts: List[List[str]] = field(default_factory=list)
+    class_tokens: List[int] = field(default_factory=list)  # Estimated tokens per class, all parts
+    class_signatures: List[Optional[List[int]]] = field(default_factory=list)  # MinHash of single-part classes
+    imports: List[str] = field(default_factory=list)
+    package: str = ""
+    class_names: List[str] = field(default_factory=list)  # Qualified within the file, e.g. Outer.Inner
+    class_refs: List[List[str]] = field(default_factory=list)  # Type names each class references
+    content_hash: str = ""
+    size: int = 0  # Characters of source
+    parse_seconds: float = 0.0  # Scanning and splitting time in the worker
+    empty: bool = False
+    error: str = ""
+
+
+_worker_processor = None
+
+def parse_files(batch: List[Tuple[str, Optional[str]]], chunk_size: int, chunk_overlap: int,
+                signatures: bool = False, references: bool = False) -> List[ParsedFile]:
+    """Worker entry point: read (unless text is supplied) and split a batch of files.
+
+    Runs in a child process, so it only uses a plain logging.Logger and
+    receives its settings explicitly rather than relying on the parent's
+    config state.
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        logger = logging.getLogger("JavaCodeAnalyzer")
+        _worker_processor = CodeProcessor(logger, None)
+    processor = _worker_processor
+
+    results = []
+    for path, text in batch:
+        parsed = ParsedFile(path)
+        try:
+            code = text if text is not None else Path(path).read_text(encoding="utf-8", errors="ignore")
+            parsed.content_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+            parsed.size = len(code)
+            start = time.perf_counter()
+            if not code.strip():
+                parsed.empty = True
+            else:
+                scan = processor.scan(code)
+                chunks = processor.split_into_classes(code, scan)
+                parsed.class_parts = [
+                    processor.split_to_token_budget(chunk, chunk_size, chunk_overlap) for chunk in chunks
+                ]
+                parsed.class_names = [span.qualified_name for span in scan.spans]
+                parsed.class_tokens = [
+                    sum(processor.estimate_tokens(part) for part in parts) for parts in parsed.class_parts
+                ]
+                if signatures:
+                    parsed.class_signatures = [
+                        minhash_signature(parts[0]) if len(parts) == 1 else None for parts in parsed.class_parts
+                    ]
+                if references:
+                    # A nested type's `{ ... }` stub declares it rather than depending on it
+                    parsed.class_refs = [
+                        [ref for ref in processor.type_references(chunk)
+                         if ref not in {scan.spans[c].name for c in span.children}]
+                        for chunk, span in zip(chunks, scan.spans)
+                    ]
+                parsed.package, parsed.imports = processor.extract_package_imports(code)
+            parsed.parse_seconds = time.perf_counter() - start
+        except Exception as ex:
+            parsed.error = str(ex)
+        results.append(parsed)
+    return results
+
+
+class ParsingStage:
+    """CPU-bound reading and class splitting, off the event loop.
+
+    Files are parsed in batches of app_config.parse_batch_size on a pool of
+    app_config.parse_workers processes so splitting scales with cores and the
+    event loop stays free for LLM I/O. With parse_workers <= 1 batches run in a
+    background thread instead.
+    """
+
+    def __init__(self, logger, exception_handler, data_loader):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.data_loader = data_loader
+        self.executor = None
+        if app_config.parse_workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=app_config.parse_workers)
+
+    def batches(self, file_paths: Iterable[Path]) -> Iterator[List[Path]]:
+        batch = []
+        for file_path in file_paths:
+            batch.append(file_path)
+            if len(batch) >= app_config.parse_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def parse_batch(self, file_paths: List[Path]) -> List[ParsedFile]:
+        # Working-tree files are read inside the worker; other backends (e.g. the
+        # git object store) are read here and shipped as text
+        if self.data_loader.reads_from_disk:
+            payload = [(str(p), None) for p in file_paths]
+        else:
+            texts = await asyncio.to_thread(lambda: [self.data_loader.read_file(p) for p in file_paths])
+            payload = [(str(p), text) for p, text in zip(file_paths, texts)]
+        args = (payload, app_config.chunk_size, app_config.chunk_overlap,
+                app_config.dedup_enabled, app_config.graph_enabled or app_config.store_enabled)
+        start = time.monotonic()
+        if self.executor:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self.executor, parse_files, *args)
+        else:
+            results = await asyncio.to_thread(parse_files, *args)
+        # Worker-side timings travel back on the results; the batch time includes pool queueing
+        metrics.observe("parse_batch_seconds", time.monotonic() - start)
+        for parsed in results:
+            metrics.observe("parse_file_seconds", parsed.parse_seconds)
+            metrics.count("bytes_parsed_total", parsed.size)
+            metrics.count("classes_found_total", len(parsed.class_parts))
+        metrics.count("files_parsed_total", len(results))
+        return results
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,62 @@
+import argparse
+import json
+import logging
+import sqlite3
+
+from config.config import app_config
+from src.analysis_store import AnalysisStore
+
+COLUMNS = ("project", "run_id", "package", "class_name", "complexity", "source_file")
+
+
+def print_rows(rows, columns=COLUMNS, as_json=False):
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        print("\t".join(str(row.get(c, "")) for c in columns))
+    print(f"({len(rows)} rows)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the indexed analysis store")
+    parser.add_argument("--store", default=app_config.store_path, help="Path of the store database")
+    parser.add_argument("--project", help="Limit to one project")
+    parser.add_argument("--all-runs", action="store_true", help="Search every run, not only the latest per project")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dependents = commands.add_parser("dependents", help="Classes that depend on a class")
+    dependents.add_argument("target", help="Simple (FilmRepository) or qualified (com.x.FilmRepository) name")
+
+    classes = commands.add_parser("classes", help="Classes by name, package and complexity")
+    classes.add_argument("--name")
+    classes.add_argument("--package", help="Package, including its subpackages")
+    classes.add_argument("--complexity", choices=["low", "medium", "high", "unknown"])
+
+    search = commands.add_parser("search", help="Full-text search over names, overviews and method descriptions")
+    search.add_argument("query", help="FTS5 query, e.g. 'payment AND rental'")
+
+    commands.add_parser("runs", help="List stored runs")
+
+    args = parser.parse_args(argv)
+    store = AnalysisStore(logging.getLogger("JavaCodeAnalyzer"), None, args.store)
+    try:
+        scope = {"project": args.project, "all_runs": args.all_runs}
+        if args.command == "dependents":
+            print_rows(store.dependents(args.target, **scope), as_json=args.json)
+        elif args.command == "classes":
+            print_rows(store.classes(args.name, args.package, args.complexity, **scope), as_json=args.json)
+        elif args.command == "search":
+            try:
+                rows = store.search(args.query, **scope)
+            except sqlite3.OperationalError as ex:
+                # FTS5 syntax errors, e.g. an unbalanced quote or a bare operator
+                search.error(f"invalid query {args.query!r}: {ex}")
+            print_rows(rows, as_json=args.json)
+        else:
+            print_rows(store.runs(), ("project", "run_id", "commit_sha", "analysis_date", "classes"), args.json)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class RequestPacker:
+    """Micro-batcher that packs small requests into one LLM round-trip.
+
+    Callers `submit` an item and await its result. Items accumulate until the
+    batch reaches `max_tokens` or `max_items`, or until `linger_ms` passes
+    after the first item, and are then handed to `send_batch` together.
+    `send_batch` returns one result per item, with None for any item the
+    response did not cover; the caller is expected to retry those on its own.
+    An error raised by `send_batch` is raised to every caller in the batch.
+    """
+
+    def __init__(self, logger, exception_handler,
+                 send_batch: Callable[[List[Any]], Awaitable[List[Optional[dict]]]],
+                 max_tokens: int, max_items: int, linger_ms: int):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.send_batch = send_batch
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.linger = linger_ms / 1000
+        self.pending = []
+        self.pending_tokens = 0
+        self.timer = None
+        self.in_flight = set()
+        self.batches_sent = 0
+        self.items_sent = 0
+
+    async def submit(self, item: Any, tokens: int) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        if self.pending and self.pending_tokens + tokens > self.max_tokens:
+            self.flush()
+
+        future = loop.create_future()
+        self.pending.append((item, future))
+        self.pending_tokens += tokens
+        if len(self.pending) >= self.max_items or self.pending_tokens >= self.max_tokens:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.linger, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_tokens = self.pending, [], 0
+        task = asyncio.ensure_future(self._send(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def _send(self, batch):
+        self.batches_sent += 1
+        self.items_sent += len(batch)
+        try:
+            results = await self.send_batch([item for item, _ in batch])
+        except Exception as ex:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        results = list(results) + [None] * (len(batch) - len(results))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "packed_requests": self.batches_sent,
+            "packed_classes": self.items_sent,
+            "classes_per_request": round(self.items_sent / self.batches_sent, 2) if self.batches_sent else 0.0,
+        }
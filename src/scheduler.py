@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.metrics import metrics
+
+# Used until a run has recorded real latencies
+DEFAULT_SECONDS_PER_TOKEN = 0.01
+
+@dataclass
+class WorkItem:
+    """One class (possibly split into parts) waiting for LLM analysis"""
+    index: int
+    key: str
+    source_file: str
+    parts: List[str]
+    imports: List[str] = field(default_factory=list)
+    tokens: int = 0
+    cost: float = 0.0
+    signature: Optional[List[int]] = None  # MinHash for near-duplicate detection
+    package: str = ""
+    references: List[str] = field(default_factory=list)  # Type names the class uses, when resolved
+
+
+class CostScheduler:
+    """Dispatches classes longest-estimated-first so a giant class never sets the tail of the run.
+
+    A class's cost is its latency in the previous run when known, else its
+    token count times the observed seconds per token. Both are kept in a small
+    JSON history file. Classes are `submit`ted while parsing is still going
+    and wait in a buffer of at most `window` classes; workers always take the
+    costliest buffered class, so the ordering is longest-first within that
+    window rather than across the whole repo. A full buffer makes `submit`
+    wait, which holds parsing back and keeps memory bounded. With a deadline,
+    dispatch stops once it passes and in-flight classes are cancelled; they
+    and everything submitted afterwards are returned through `on_unfinished`.
+    Classes whose analysis raised are returned through `on_failed` instead.
+    """
+
+    def __init__(self, logger, exception_handler, history_path: str, workers: int,
+                 deadline: Optional[float] = None, window: int = 0):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.history_path = history_path
+        self.workers = max(1, workers)
+        self.deadline = deadline  # time.monotonic() value, None for no deadline
+        self.window = window  # Max buffered classes, 0 for no limit
+        self.latencies: Dict[str, float] = {}
+        self.seconds_per_token = DEFAULT_SECONDS_PER_TOKEN
+        self.observed_seconds = 0.0
+        self.observed_tokens = 0
+        self.buffer = []  # Heap of (-cost, index, item)
+        self.condition = asyncio.Condition()
+        self.closed = False
+        self.expired = False
+        self.keys = []
+        self.failed = 0
+        self.unfinished = 0
+        self.load_history()
+
+    def load_history(self):
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+            self.latencies = history.get("latencies", {})
+            self.seconds_per_token = history.get("seconds_per_token", DEFAULT_SECONDS_PER_TOKEN)
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.logger.warning(f"Could not load latency history: {ex}")
+
+    def save_history(self, keys):
+        """Persist latencies of this run's classes only, so the file tracks the repo"""
+        if self.observed_tokens:
+            self.seconds_per_token = self.observed_seconds / self.observed_tokens
+        try:
+            if os.path.dirname(self.history_path):
+                os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+            with open(self.history_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "seconds_per_token": self.seconds_per_token,
+                    "latencies": {k: self.latencies[k] for k in keys if k in self.latencies},
+                }, f)
+        except Exception as ex:
+            self.logger.warning(f"Could not save latency history: {ex}")
+
+    def estimate(self, item: WorkItem) -> float:
+        if item.key in self.latencies:
+            return self.latencies[item.key]
+        return item.tokens * self.seconds_per_token
+
+    async def submit(self, item: WorkItem):
+        """Buffer a class for dispatch, waiting while the window is full"""
+        item.cost = self.estimate(item)
+        self.keys.append(item.key)
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: self.expired or not self.window or len(self.buffer) < self.window
+            )
+            heapq.heappush(self.buffer, (-item.cost, item.index, item))
+            self.condition.notify_all()
+
+    async def close(self):
+        """Signal that no more classes will be submitted"""
+        async with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    async def next_item(self) -> Optional[WorkItem]:
+        """Costliest buffered class, or None once closed and drained"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.buffer or self.closed)
+            if not self.buffer:
+                return None
+            item = heapq.heappop(self.buffer)[-1]
+            self.condition.notify_all()
+            return item
+
+    async def run(self, analyze: Callable[[WorkItem], Awaitable[dict]],
+                  on_unfinished: Callable[[WorkItem], dict],
+                  on_failed: Callable[[WorkItem], dict],
+                  on_result: Callable[[WorkItem, dict], None]):
+        """Analyze submitted classes until `close`, handing each result to `on_result` as soon as it is ready"""
+        in_flight = {}
+
+        async def worker():
+            while True:
+                item = await self.next_item()
+                if item is None:
+                    return
+                in_flight[item.index] = item
+                start = time.monotonic()
+                try:
+                    result = await analyze(item)
+                except Exception as ex:
+                    await self.exception_handler.handle(ex, f"analyze {item.key}")
+                    del in_flight[item.index]
+                    self.failed += 1
+                    metrics.count("classes_failed_total")
+                    self.deliver(item, on_failed(item), on_result)
+                    continue
+                del in_flight[item.index]
+                self.deliver(item, result, on_result)
+                latency = time.monotonic() - start
+                self.latencies[item.key] = latency
+                self.observed_seconds += latency
+                self.observed_tokens += item.tokens
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            self.logger.warning("Deadline reached, cancelling in-flight analyses")
+            async with self.condition:
+                # Submitting no longer waits for room; everything left is cut off
+                self.expired = True
+                self.condition.notify_all()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for item in list(in_flight.values()):
+                self.unfinished += 1
+                self.deliver(item, on_unfinished(item), on_result)
+            # Parsing goes on until close, so later submissions are drained as they arrive
+            while (item := await self.next_item()) is not None:
+                self.unfinished += 1
+                self.deliver(item, on_unfinished(item), on_result)
+            metrics.count("classes_unfinished_total", self.unfinished)
+
+        if self.failed:
+            self.logger.warning(f"{self.failed} of {len(self.keys)} classes failed")
+        if self.unfinished:
+            self.logger.warning(f"{self.unfinished} of {len(self.keys)} classes left unfinished by the deadline")
+        self.save_history(self.keys)
+
+    def deliver(self, item: WorkItem, result: dict, on_result: Callable[[WorkItem, dict], None]):
+        try:
+            on_result(item, result)
+        except Exception as ex:
+            # A failing consumer must not stop the workers
+            self.logger.error(f"Exception in on_result for {item.key}: {ex}")
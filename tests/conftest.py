@@ -0,0 +1,54 @@
+import logging
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Modules import each other as `src.*`, `utils.*` and `config.*` from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.exception_handler import ExceptionHandler
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("JavaCodeAnalyzer")
+
+
+@pytest.fixture
+def exception_handler(logger):
+    return ExceptionHandler(logger)
+
+
+def git(cwd, *args) -> str:
+    env = {**os.environ, "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@localhost",
+           "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@localhost"}
+    return subprocess.run(["git", *args], cwd=cwd, env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Git repo with two Java files, tagged v1, that serves partial clones.
+
+    `.path` is the repo, `.commit(files)` writes and commits files and returns the new SHA.
+    """
+    root = tmp_path / "upstream"
+    root.mkdir()
+    git(root, "init", "-q", "-b", "main")
+    git(root, "config", "uploadpack.allowFilter", "true")
+    git(root, "config", "uploadpack.allowAnySHA1InWant", "true")
+
+    def commit(files: dict) -> str:
+        for name, text in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(text, encoding="utf-8")
+        git(root, "add", "-A")
+        git(root, "commit", "-q", "--no-gpg-sign", "-m", "change")
+        return git(root, "rev-parse", "HEAD")
+
+    commit({"src/A.java": "class A {}\n", "src/B.java": "class B { void b() {} }\n", "README.md": "Demo\n"})
+    git(root, "tag", "v1")
+    return SimpleNamespace(path=root, commit=commit)
@@ -0,0 +1,24 @@
+import logging
+
+from utils.analysis_cache import AnalysisCache
+
+
+def cache(path):
+    return AnalysisCache(logging.getLogger("JavaCodeAnalyzer"), None, str(path))
+
+
+def test_key_depends_on_the_prompt_but_not_on_formatting(tmp_path):
+    c = cache(tmp_path / "cache.sqlite")
+    key = c.make_key("class A {\n    void a() {}\n}", "single", "model", 0.7)
+    assert key == c.make_key("class A {\nvoid a() {}\n\n}", "single", "model", 0.7)
+    assert key != c.make_key("class A {\n    void a() {}\n}", "packed", "model", 0.7)
+
+
+def test_get_any_prefers_the_first_key_and_counts_one_lookup(tmp_path):
+    c = cache(tmp_path / "cache.sqlite")
+    c.put("single", {"overview": "alone"})
+    assert c.get_any(["packed", "single"]) == {"overview": "alone"}
+    c.put("packed", {"overview": "packed"})
+    assert c.get_any(["packed", "single"]) == {"overview": "packed"}
+    assert c.get_any(["missing", "also missing"]) is None
+    assert (c.hits, c.misses) == (2, 1)
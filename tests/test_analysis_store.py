@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from src.analysis_store import AnalysisStore
+from src.query_store import main as query_main
+
+HEADER = {"project": "shop", "commit_sha": "abc", "analysis_date": "2024-01-01"}
+
+
+def component(name, package, source_file, references=(), dependencies=(), **fields):
+    return {
+        "class_name": name, "package": package, "source_file": source_file,
+        "references": list(references), "dependencies": list(dependencies),
+        "overview": fields.get("overview", f"The {name} class"), "complexity": fields.get("complexity", "low"),
+        "methods": fields.get("methods", []),
+    }
+
+
+# The repo's layout does not follow the package: paths alone would guess `app.billing`
+COMPONENTS = [
+    component("Invoice", "com.shop.billing", "app/billing/Invoice.java", ["Money", "String"],
+              overview="Invoice totals", methods=[{"name": "total", "description": "Sums the payment lines"}]),
+    component("Money", "com.shop.billing", "app/billing/Money.java", complexity="medium"),
+    component("Report", "com.shop.reports", "app/reports/Report.java", ["Invoice"],
+              dependencies=["com.shop.billing.Invoice"]),
+    # Imports a Money of its own, so the same-package Money is shadowed
+    component("Ledger", "com.shop.billing", "app/billing/Ledger.java", ["Money"],
+              dependencies=["org.other.Money"]),
+]
+
+
+@pytest.fixture
+def store(tmp_path, logger, exception_handler):
+    store = AnalysisStore(logger, exception_handler, str(tmp_path / "store.sqlite"))
+    store.write_run("run1", HEADER, COMPONENTS)
+    yield store
+    store.close()
+
+
+def names(rows):
+    return sorted(row["class_name"] for row in rows)
+
+
+def test_package_is_taken_from_the_component(store):
+    assert names(store.classes(package="com.shop")) == ["Invoice", "Ledger", "Money", "Report"]
+    assert names(store.classes(package="com.shop.billing", complexity="medium")) == ["Money"]
+    assert store.classes(package="app") == []
+
+
+def test_package_is_guessed_from_the_path_for_older_outputs(tmp_path, logger, exception_handler):
+    store = AnalysisStore(logger, exception_handler, str(tmp_path / "old.sqlite"))
+    legacy = {k: v for k, v in COMPONENTS[0].items() if k not in ("package", "references")}
+    store.write_run("old", HEADER, [dict(legacy, source_file="src/main/java/com/shop/billing/Invoice.java")])
+    assert store.classes()[0]["package"] == "com.shop.billing"
+    store.close()
+
+
+def test_dependents_include_imports_and_same_package_references(store):
+    assert names(store.dependents("Invoice")) == ["Report"]
+    assert names(store.dependents("com.shop.billing.Money")) == ["Invoice"]
+    assert names(store.dependents("Money")) == ["Invoice", "Ledger"]
+    assert names(store.dependents("org.other.Money")) == ["Ledger"]
+
+
+def test_rewriting_a_run_replaces_it(store):
+    store.write_run("run1", HEADER, COMPONENTS[:2])
+    assert names(store.dependents("Money")) == ["Invoice"]
+    assert [run["classes"] for run in store.runs()] == [2]
+
+
+def test_search_and_latest_run_scope(store):
+    assert names(store.search("payment")) == ["Invoice"]
+    store.write_run("run2", HEADER, COMPONENTS[1:2])
+    assert names(store.search("Money")) == ["Money"]
+    assert names(store.classes()) == ["Money"]
+    assert len(store.classes(all_runs=True)) == 5
+
+
+def test_cli_prints_matching_classes(store, capsys):
+    query_main(["--store", store.path, "--json", "dependents", "com.shop.billing.Money"])
+    rows = json.loads(capsys.readouterr().out)
+    assert [(r["class_name"], r["package"]) for r in rows] == [("Invoice", "com.shop.billing")]
+
+
+def test_cli_reports_a_malformed_search_as_a_usage_error(store, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        query_main(["--store", store.path, "search", '"unbalanced'])
+    assert exit_info.value.code == 2
+    err = capsys.readouterr().err
+    assert "usage:" in err and "invalid query" in err
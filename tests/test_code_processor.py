@@ -0,0 +1,36 @@
+import logging
+
+from src.code_processor import CodeProcessor
+
+METHODS = [f"public int compute{i}(int a) {{ return a + {i}; }}" for i in range(80)]
+BIG_CLASS = "public class Big {\n    private int count = 0;\n" + "".join(f"    {m}\n" for m in METHODS) + "}\n"
+
+
+def processor():
+    return CodeProcessor(logging.getLogger("JavaCodeAnalyzer"), None)
+
+
+def test_chunk_within_budget_is_returned_unchanged():
+    assert processor().split_to_token_budget("class A { void a() {} }", 100, 20) == ["class A { void a() {} }"]
+
+
+def test_split_keeps_every_member_once_and_repeats_the_context():
+    parts = processor().split_to_token_budget(BIG_CLASS, 200, 50)
+    assert len(parts) > 1
+    for i, part in enumerate(parts, 1):
+        assert part.startswith(f"// Part {i} of {len(parts)} of Big\npublic class Big {{\n    private int count = 0;")
+        assert part.endswith("\n}")
+    joined = "\n".join(parts)
+    for method in METHODS:
+        assert joined.count(method) == 1
+
+
+def test_class_without_member_boundaries_is_not_split():
+    code = "class A { void a() { " + "x++; " * 400 + "} }"
+    assert processor().split_to_token_budget(code, 100, 20) == [code]
+
+
+def test_parts_respect_the_budget_including_marker_and_closing_brace():
+    for budget in range(60, 600, 7):
+        parts = processor().split_to_token_budget(BIG_CLASS, budget, 20)
+        assert max(processor().estimate_tokens(part) for part in parts) <= budget, budget
@@ -0,0 +1,91 @@
+import os
+
+from src import data_loader
+from src.data_loader import DataLoader, IgnoreRules
+
+
+def rules(*lines, base=""):
+    return IgnoreRules().extend(base, lines)
+
+
+def test_last_matching_rule_wins_and_negation_reincludes():
+    r = rules("*.log", "!keep.log")
+    assert r.is_ignored("build/out.log", False)
+    assert not r.is_ignored("build/keep.log", False)
+    assert rules("!keep.log", "*.log").is_ignored("keep.log", False)
+
+
+def test_trailing_slash_matches_directories_only():
+    r = rules("target/")
+    assert r.is_ignored("module/target", True)
+    assert not r.is_ignored("module/target", False)
+
+
+def test_slash_anchors_to_the_declaring_directory():
+    assert rules("/gen").is_ignored("gen", True)
+    assert not rules("/gen").is_ignored("src/gen", True)
+    assert rules("docs/*.md").is_ignored("docs/a.md", False)
+    assert not rules("docs/*.md").is_ignored("sub/docs/a.md", False)
+    assert rules("gen").is_ignored("src/gen", True)
+
+
+def test_wildcards():
+    assert rules("**/test/**").is_ignored("a/b/test/c/D.java", False)
+    assert rules("Foo?.java").is_ignored("Foo1.java", False)
+    assert not rules("Foo?.java").is_ignored("Foo12.java", False)
+    assert rules("[ab].java").is_ignored("a.java", False)
+    assert not rules("[!ab].java").is_ignored("a.java", False)
+
+
+def test_nested_rules_only_apply_below_their_directory():
+    r = rules("*.java").extend("legacy", ["!Keep.java", "/Top.java"])
+    assert not r.is_ignored("legacy/sub/Keep.java", False)
+    assert r.is_ignored("Keep.java", False)
+    assert r.is_ignored("legacy/Top.java", False)
+    assert not rules("/Top.java", base="legacy").is_ignored("legacy/sub/Top.java", False)
+
+
+def write(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def loader(logger, exclude_globs=()):
+    return DataLoader(logger, None, exclude_globs=list(exclude_globs), respect_gitignore=True)
+
+
+def relative(root, paths):
+    return sorted(p.relative_to(root).as_posix() for p in paths)
+
+
+def test_walk_honours_nested_gitignore_files(tmp_path, logger):
+    write(tmp_path, {
+        ".gitignore": "build/\n*.tmp.java\n",
+        "src/A.java": "", "src/B.tmp.java": "", "build/Gen.java": "",
+        "legacy/.gitignore": "*.java\n!Keep.java\n",
+        "legacy/Old.java": "", "legacy/Keep.java": "",
+        "other/Old.java": "",
+    })
+    found = loader(logger).list_code_files(str(tmp_path), [".java"])
+    assert relative(tmp_path, found) == ["legacy/Keep.java", "other/Old.java", "src/A.java"]
+
+
+def test_exclude_globs_apply_without_gitignore(tmp_path, logger):
+    write(tmp_path, {".gitignore": "*.java\n", "src/A.java": "", "test/ATest.java": ""})
+    walker = DataLoader(logger, None, exclude_globs=["test/"], respect_gitignore=False)
+    assert relative(tmp_path, walker.list_code_files(str(tmp_path), [".java"])) == ["src/A.java"]
+
+
+def test_ignored_directories_are_never_scanned(tmp_path, logger, monkeypatch):
+    write(tmp_path, {".gitignore": "node_modules/\n", "src/A.java": "", "node_modules/pkg/B.java": ""})
+    scanned = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        scanned.append(os.path.relpath(path, tmp_path))
+        return real_scandir(path)
+    monkeypatch.setattr(data_loader.os, "scandir", scandir)
+    assert relative(tmp_path, loader(logger).list_code_files(str(tmp_path), [".java"])) == ["src/A.java"]
+    assert sorted(scanned) == [".", "src"]
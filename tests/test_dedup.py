@@ -0,0 +1,102 @@
+import logging
+
+from src.code_processor import CodeProcessor
+from src.dedup import Deduplicator, adapt_analysis, minhash_signature
+from src.scheduler import WorkItem
+
+processor = CodeProcessor(logging.getLogger("JavaCodeAnalyzer"), None)
+
+
+def entity(name, fields):
+    body = "".join(
+        f"    private String {f};\n"
+        f"    public String get{f.title()}() {{ return {f}; }}\n"
+        f"    public void set{f.title()}(String {f}) {{ this.{f} = {f}; }}\n"
+        for f in fields
+    )
+    return f"@Entity\npublic class {name} implements Serializable {{\n    @Id\n    private Long id;\n{body}}}"
+
+
+FILM = entity("Film", ["title", "rating", "length", "year"])
+ACTOR = entity("Actor", ["first", "last", "middle", "nick"])
+OTHER = "public class Other { public void run() { for (int i = 0; i < 10; i++) { System.out.println(i); } } }"
+
+
+def work_items(*sources):
+    return [
+        WorkItem(index=i, key=str(i), source_file=f"{i}.java", parts=[code], signature=minhash_signature(code))
+        for i, code in enumerate(sources)
+    ]
+
+
+def skeleton_of(item):
+    return processor.extract_structure(item.parts[0])
+
+
+def test_signature_ignores_identifiers_and_literals():
+    assert minhash_signature(FILM) == minhash_signature(ACTOR)
+    assert minhash_signature(FILM) != minhash_signature(OTHER)
+
+
+def add_all(dedup, items):
+    """Index -> add() result for each item, in order"""
+    return {item.index: dedup.add(item, skeleton_of(item)) for item in items}
+
+
+def test_near_duplicates_map_onto_the_first_representative():
+    results = add_all(Deduplicator(logging.getLogger("JavaCodeAnalyzer"), None), work_items(FILM, OTHER, ACTOR))
+    assert results[0] is None and results[1] is None
+    rep_index, mapping = results[2]
+    assert rep_index == 0
+    assert mapping["Film"] == "Actor"
+    assert mapping["getTitle"] == "getFirst"
+
+
+def test_split_classes_are_never_matched_or_indexed():
+    dedup = Deduplicator(logging.getLogger("JavaCodeAnalyzer"), None)
+    items = work_items(FILM, ACTOR)
+    items[1].parts = [ACTOR, ACTOR]
+    assert add_all(dedup, items) == {0: None, 1: None}
+    assert list(dedup.representatives) == [0]
+
+
+def test_adapt_analysis_renames_the_representative_prose():
+    rep = processor.extract_structure(FILM)
+    rep["overview"] = "Film entity; Films have a title"
+    rep["complexity"] = "low"
+    rep["methods"] = [dict(m, description=f"Accessor of the film {m['name'][3:].lower()}") for m in rep["methods"]]
+    mapping = add_all(Deduplicator(logging.getLogger("JavaCodeAnalyzer"), None), work_items(FILM, ACTOR))[1][1]
+
+    adapted = adapt_analysis(rep, processor.extract_structure(ACTOR), mapping)
+    assert adapted["class_name"] == "Actor"
+    assert adapted["overview"] == "Actor entity; Actors have a first"
+    assert adapted["complexity"] == "low"
+    assert adapted["methods"][0] == {
+        "name": "getFirst", "signature": "public String getFirst()", "description": "Accessor of the actor first"
+    }
+
+
+def test_add_matches_against_representatives_seen_so_far():
+    dedup = Deduplicator(logging.getLogger("JavaCodeAnalyzer"), None)
+    film, other, actor = work_items(FILM, OTHER, ACTOR)
+    assert dedup.add(film, skeleton_of(film)) is None
+    assert dedup.add(other, skeleton_of(other)) is None
+    assert dedup.analysis_of(0) is None
+    dedup.record_analysis(0, {"overview": "Film entity"})
+
+    rep_index, mapping = dedup.add(actor, skeleton_of(actor))
+    assert rep_index == 0 and mapping["Film"] == "Actor"
+    assert dedup.analysis_of(0) == {"overview": "Film entity"}
+    assert dedup.duplicates == 1
+
+
+def test_oldest_representatives_are_dropped_beyond_the_limit():
+    dedup = Deduplicator(logging.getLogger("JavaCodeAnalyzer"), None, max_representatives=1)
+    film, other, actor = work_items(FILM, OTHER, ACTOR)
+    dedup.add(film, skeleton_of(film))
+    dedup.add(other, skeleton_of(other))
+    assert list(dedup.representatives) == [1]
+    # Film is no longer indexed, so Actor becomes a representative itself
+    assert dedup.add(actor, skeleton_of(actor)) is None
+    assert list(dedup.representatives) == [2]
+    assert all(indices == [2] for indices in dedup.buckets.values())
@@ -0,0 +1,38 @@
+import logging
+
+from src.dependency_graph import DependencyGraph, DependencyGraphBuilder
+
+
+def build():
+    builder = DependencyGraphBuilder(logging.getLogger("JavaCodeAnalyzer"), None)
+    # A -> B -> C -> B is a cycle; D -> A via a wildcard import; E is nested in A's file
+    builder.add_file("a/A.java", "com.a", ["com.b.B", "java.util.List"], ["A", "A.E"], [["B", "E", "List"], []])
+    builder.add_file("b/B.java", "com.b", [], ["B"], [["C"]])
+    builder.add_file("b/C.java", "com.b", [], ["C"], [["B", "String"]])
+    builder.add_file("d/D.java", "com.d", ["com.a.*"], ["D"], [["A"]])
+    return builder.build()
+
+
+def test_references_resolve_through_imports_package_and_nesting():
+    graph = build()
+    assert sorted(graph.dependencies("com.a.A")) == ["com.a.A.E", "com.b.B"]
+    assert graph.dependencies("com.d.D") == ["com.a.A"]
+    assert graph.dependents("com.b.B") == ["com.a.A", "com.b.C"]
+    assert graph.impacted("com.b.C") == ["com.a.A", "com.b.B", "com.d.D"]
+
+
+def test_cycles_share_a_component_and_a_layer():
+    graph = build()
+    i = graph.index
+    assert graph.scc[i["com.b.B"]] == graph.scc[i["com.b.C"]]
+    assert len(set(graph.scc)) == 4
+    assert graph.to_dict()["cycles"] == [["com.b.B", "com.b.C"]]
+    layers = {name: graph.layers[i[name]] for name in graph.nodes}
+    assert layers == {"com.a.A": 1, "com.a.A.E": 0, "com.b.B": 0, "com.b.C": 0, "com.d.D": 2}
+
+
+def test_write_and_load_round_trip(tmp_path):
+    graph = build()
+    graph.write(tmp_path / "graph.json")
+    loaded = DependencyGraph.load(tmp_path / "graph.json")
+    assert loaded.to_dict() == graph.to_dict()
@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from utils.embedding_cache import CachedEmbeddings, EmbeddingStore  # noqa: E402
+
+
+class CountingEmbeddings(Embeddings):
+    """Vector of a text: its length and first character; records every text it embeds"""
+
+    def __init__(self, dim=2):
+        self.dim = dim
+        self.embedded = []
+
+    def vector(self, text):
+        return ([float(len(text)), float(ord(text[0]))] + [1.0] * self.dim)[:self.dim]
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self.vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return self.vector(text)
+
+
+def cached(tmp_path, logger, exception_handler, backend):
+    return CachedEmbeddings(logger, exception_handler, backend, "embed-test", str(tmp_path / "embeddings"))
+
+
+def test_round_trip_survives_reopening(tmp_path, logger, exception_handler):
+    backend = CountingEmbeddings()
+    embeddings = cached(tmp_path, logger, exception_handler, backend)
+    first = embeddings.embed_documents(["alpha", "beta", "alpha"])
+    assert backend.embedded == ["alpha", "beta"]
+    embeddings.close()
+
+    reopened_backend = CountingEmbeddings()
+    reopened = cached(tmp_path, logger, exception_handler, reopened_backend)
+    assert reopened.embed_documents(["beta", "alpha"]) == [first[1], first[0]]
+    assert reopened_backend.embedded == []
+    assert reopened.stats() == {"hits": 2, "misses": 0, "hit_rate": 1.0}
+    # Queries are keyed apart from documents
+    reopened.embed_query("alpha")
+    assert reopened_backend.embedded == ["alpha"]
+    reopened.close()
+
+
+def test_rows_appended_after_mapping_are_readable(tmp_path, logger, exception_handler):
+    store = EmbeddingStore(logger, exception_handler, str(tmp_path / "embeddings"), "embed-test")
+    store.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert store.get_many(["b"])["b"].tolist() == [3.0, 4.0]
+    store.put_many(["c", "d", "e"], [[5.0, 6.0], [7.0, 8.0], [9.0, 10.0]])
+    found = store.get_many(["a", "e", "missing"])
+    assert sorted(found) == ["a", "e"]
+    assert found["a"].tolist() == [1.0, 2.0]
+    assert found["e"].tolist() == [9.0, 10.0]
+    store.close()
+
+
+def test_vectors_of_another_dimension_are_rejected(tmp_path, logger, exception_handler):
+    store = EmbeddingStore(logger, exception_handler, str(tmp_path / "embeddings"), "embed-test")
+    store.put_many(["a"], [[1.0, 2.0]])
+    with pytest.raises(ValueError, match="dimension 3 does not match the cache \\(2\\)"):
+        store.put_many(["b"], [[1.0, 2.0, 3.0]])
+    store.close()
+
+    reopened = EmbeddingStore(logger, exception_handler, str(tmp_path / "embeddings"), "embed-test")
+    assert reopened.dim == 2 and reopened.rows == 1
+    assert reopened.get_many(["a", "b"])["a"].tolist() == [1.0, 2.0]
+    reopened.close()
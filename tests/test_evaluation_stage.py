@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("ragas")
+pytest.importorskip("datasets")
+
+from config.config import eval_config  # noqa: E402
+from src import evaluation_stage  # noqa: E402
+from src.evaluation_main import PAIR_COLUMNS  # noqa: E402
+
+GOLD = {"components": [
+    {"class_name": name, "methods": [f"m{i}" for i in range(methods)]}
+    for name, methods in (("Film", 2), ("Actor", 3), ("Rental", 1), ("Store", 2))
+]}
+
+
+class StubEvaluator:
+    """One pair per gold method; a pair scores 1 when the prediction has that method"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.written = None
+
+    def get_metrics(self):
+        return ["stub"]
+
+    def load_json_data(self, path):
+        return GOLD
+
+    @staticmethod
+    def normalize_name(name):
+        return name.lower()
+
+    def index_components(self, data):
+        return {self.normalize_name(c["class_name"]): c for c in data["components"]}
+
+    def add_component_pairs(self, pairs, norm_name, gold, pred=None):
+        for method in gold["methods"]:
+            answer = method if pred and method in pred.get("methods", []) else ""
+            for column, value in zip(PAIR_COLUMNS, (f"{norm_name}.{method}", answer, method, [], True, "", "")):
+                pairs[column].append(value)
+
+    def score_pairs(self, batch, metrics):
+        self.batch_sizes.append(len(batch["question"]))
+        return pd.DataFrame({
+            "question": batch["question"],
+            "score": [1.0 if a else 0.0 for a in batch["answer"]],
+            "tier": ["lexical"] * len(batch["question"]),
+        })
+
+    def write_report(self, report, metrics):
+        self.written = report
+
+
+@pytest.fixture
+def stage(tmp_path, logger, exception_handler, monkeypatch):
+    monkeypatch.setattr(evaluation_stage, "RagasEvaluator", StubEvaluator)
+    monkeypatch.setattr(eval_config, "evaluation_output_path", str(tmp_path / "evaluation.csv"))
+    monkeypatch.setattr(eval_config, "stream_batch_size", 3)
+    monkeypatch.setattr(eval_config, "stream_workers", 2)
+    return evaluation_stage.StreamingEvaluationStage(logger, exception_handler)
+
+
+def run(stage, components):
+    async def go():
+        stage.start()
+        for component in components:
+            stage.submit(component)
+        # The stop markers must let every worker exit, however the batches were merged
+        await asyncio.wait_for(stage.finish(), 5)
+    asyncio.run(go())
+
+
+def test_every_gold_pair_is_scored_once(stage):
+    components = [{"class_name": "Film", "methods": ["m0", "m1"]}, {"class_name": "ACTOR", "methods": ["m1"]},
+                  {"class_name": "Film", "methods": []}, {"class_name": "Unknown", "methods": ["m0"]}]
+    run(stage, components)
+    assert sum(stage.evaluator.batch_sizes) == 8
+    report = stage.evaluator.written
+    assert sorted(report["question"]) == sorted(
+        f"{c['class_name'].lower()}.m{i}" for c in GOLD["components"] for i in range(len(c["methods"]))
+    )
+    # The second Film is ignored; unmatched gold classes are scored as empty predictions
+    scored = dict(zip(report["question"], report["score"]))
+    assert scored["film.m1"] == 1.0 and scored["actor.m1"] == 1.0
+    assert scored["actor.m0"] == 0.0 and scored["rental.m0"] == 0.0
+
+
+def test_batches_are_capped_and_the_partial_csv_has_one_header(stage, monkeypatch):
+    # One pair per class, so merged batches land exactly on the cap
+    monkeypatch.setattr(stage, "gold_classes", {f"c{i}": {"methods": ["m0"]} for i in range(8)})
+    run(stage, [{"class_name": f"C{i}", "methods": ["m0"]} for i in range(8)])
+    assert sorted(stage.evaluator.batch_sizes, reverse=True)[0] == 3
+    with open(stage.partial_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines.count("question,score,tier") == 1 and lines[0] == "question,score,tier"
+    assert len(pd.read_csv(stage.partial_path)) == 8
+
+
+def test_nothing_to_score_finishes_without_a_report(stage, monkeypatch):
+    monkeypatch.setattr(stage, "gold_classes", {})
+    run(stage, [{"class_name": "Film", "methods": ["m0"]}])
+    assert stage.evaluator.written is None
+    assert stage.evaluator.batch_sizes == []
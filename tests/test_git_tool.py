@@ -0,0 +1,49 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("git")
+
+from conftest import git  # noqa: E402
+from src.data_loader import GitObjectDataLoader  # noqa: E402
+from utils.git_tool import GitManager  # noqa: E402
+
+
+def blobless_clone(upstream, tmp_path, logger, exception_handler, ref):
+    manager = GitManager(logger, exception_handler)
+    local_dir = asyncio.run(manager.clone_repository(
+        f"file://{upstream.path}", str(tmp_path / "clones"), blobless=True, ref=ref
+    ))
+    return manager, local_dir
+
+
+def test_fetch_on_a_detached_head_keeps_it_without_a_ref(upstream, tmp_path, logger, exception_handler):
+    manager, local_dir = blobless_clone(upstream, tmp_path, logger, exception_handler, "v1")
+    tagged = git(upstream.path, "rev-parse", "v1")
+    upstream.commit({"src/C.java": "class C {}\n"})
+    assert asyncio.run(manager.fetch_updates(local_dir, blobless=True)) == tagged
+
+
+def test_fetch_follows_the_cloned_ref(upstream, tmp_path, logger, exception_handler):
+    manager, local_dir = blobless_clone(upstream, tmp_path, logger, exception_handler, "v1")
+    moved = upstream.commit({"src/C.java": "class C {}\n"})
+    git(upstream.path, "tag", "-f", "v1")
+    assert asyncio.run(manager.fetch_updates(local_dir, blobless=True, ref="v1")) == moved
+
+
+def test_fetch_on_a_branch_moves_the_branch(upstream, tmp_path, logger, exception_handler):
+    manager, local_dir = blobless_clone(upstream, tmp_path, logger, exception_handler, "main")
+    moved = upstream.commit({"src/C.java": "class C {}\n"})
+    assert asyncio.run(manager.fetch_updates(local_dir, blobless=True)) == moved
+    assert git(local_dir, "symbolic-ref", "--short", "HEAD") == "main"
+
+
+def test_object_store_loader_lists_and_reads_java_blobs(upstream, tmp_path, logger, exception_handler):
+    _, local_dir = blobless_clone(upstream, tmp_path, logger, exception_handler, "v1")
+    loader = GitObjectDataLoader(logger, exception_handler)
+    files = sorted(loader.list_code_files(local_dir, [".java"]))
+    assert files == [Path(local_dir) / "src" / "A.java", Path(local_dir) / "src" / "B.java"]
+    assert loader.read_file(files[1]) == "class B { void b() {} }\n"
+    # No checkout: the sources exist only in the object store
+    assert not (Path(local_dir) / "src").exists()
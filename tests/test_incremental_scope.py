@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("git")
+
+from config.config import app_config  # noqa: E402
+from src.main import CodebaseAnalyzer  # noqa: E402
+
+
+class FakeGit:
+    async def fetch_updates(self, repo_dir, blobless=False, ref=""):
+        return "head"
+
+    async def diff_changed_files(self, repo_dir, base_sha, head_sha):
+        assert (base_sha, head_sha) == ("base", "head")
+        return ["src/Changed.java"], ["src/Deleted.java"]
+
+
+def analyzer(previous_output):
+    return SimpleNamespace(
+        git_manager=FakeGit(),
+        output_writer=SimpleNamespace(load_previous_output=lambda: previous_output),
+        logger=logging.getLogger("JavaCodeAnalyzer"),
+        exception_handler=None,
+        normalize_path=CodebaseAnalyzer.normalize_path,
+    )
+
+
+def scope(previous_output, monkeypatch):
+    monkeypatch.setattr(app_config, "incremental", True)
+    return asyncio.run(CodebaseAnalyzer.resolve_incremental_scope(analyzer(previous_output), "repo"))
+
+
+def test_changed_unfinished_and_failed_files_are_reanalyzed(monkeypatch):
+    previous = {"commit_sha": "base", "components": [
+        {"source_file": os.path.join("repo", "src", "Kept.java")},
+        {"source_file": os.path.join("repo", "src", "Cut.java"), "unfinished": True},
+        {"source_file": os.path.join("repo", "src", "Broken.java"), "failed": True},
+    ]}
+    output, changed, stale, head = scope(previous, monkeypatch)
+    path = lambda name: os.path.normpath(os.path.join("repo", "src", name))
+    assert output is previous and head == "head"
+    assert changed == {path("Changed.java"), path("Cut.java"), path("Broken.java")}
+    assert stale == changed | {path("Deleted.java")}
+
+
+def test_output_without_a_commit_means_a_full_analysis(monkeypatch):
+    assert scope({"components": []}, monkeypatch) == (None, set(), set(), "head")
@@ -0,0 +1,93 @@
+import logging
+
+from src.code_processor import CodeProcessor
+from src.java_lexer import extract_imports, member_ranges, scan_java
+
+SOURCE = '''package com.example;
+import java.util.List;
+import static java.lang.Math.max;
+import java.io.*;
+/** class InJavadoc { */
+public class Outer {
+    // class InLineComment {
+    private String s = "class InString { }";
+    private String escaped = "quote \\" class InEscaped {";
+    private char c = '{';
+    private String block = """
+        class InTextBlock {
+        """;
+    /* } */
+    public List<String> find(int a, String b) { return null; }
+    static class Inner { void run() {} }
+}
+'''
+
+
+def processor():
+    return CodeProcessor(logging.getLogger("JavaCodeAnalyzer"), None)
+
+
+def test_literals_and_comments_hide_declarations_and_braces():
+    scan = scan_java(SOURCE)
+    assert [span.qualified_name for span in scan.spans] == ["Outer", "Outer.Inner"]
+    assert scan.spans[0].end == SOURCE.rindex("}") + 1
+    assert scan.spans[0].children == [1]
+
+
+def test_masked_text_keeps_offsets():
+    scan = scan_java(SOURCE)
+    assert len(scan.masked) == len(SOURCE)
+    assert "InString" not in scan.masked
+    assert "InTextBlock" not in scan.masked
+    assert "InJavadoc" not in scan.masked
+
+
+def test_nested_type_is_its_own_chunk_and_a_stub_in_its_parent():
+    outer, inner = processor().split_into_classes(SOURCE)
+    assert "static class Inner { ... }" in outer
+    assert "void run()" not in outer
+    assert inner == "static class Inner { void run() {} }"
+    # Comments are dropped, literals kept verbatim
+    assert "InLineComment" not in outer
+    assert '"class InString { }"' in outer
+    assert "class InTextBlock {" in outer
+
+
+def test_member_ranges_ignore_braces_in_literals():
+    scan = scan_java(SOURCE)
+    members = [SOURCE[s:e].strip() for s, e in member_ranges(scan, 0)]
+    assert len(members) == 6
+    # Leading comments stay attached to the member they precede
+    assert members[0].endswith('private String s = "class InString { }";')
+    assert members[2] == "private char c = '{';"
+    assert members[-1] == "static class Inner { void run() {} }"
+
+
+def test_package_and_imports():
+    assert extract_imports(SOURCE) == (
+        "com.example", ["java.util.List", "static java.lang.Math.max", "java.io.*"]
+    )
+
+
+def test_structure_comes_from_the_source():
+    outer = processor().split_into_classes(SOURCE)[0]
+    structure = processor().extract_structure(outer, extract_imports(SOURCE)[1])
+    assert structure["class_name"] == "Outer"
+    assert structure["methods"] == [
+        {"name": "find", "signature": "public List<String> find(int a, String b)", "description": ""}
+    ]
+    # The static import is not referenced by the class; wildcard imports are always kept
+    assert structure["dependencies"] == ["java.util.List", "java.io.*"]
+
+
+def test_unterminated_literal_does_not_swallow_the_file():
+    code = 'class A { String s = "open;\n}\nclass B {}\n'
+    assert [span.name for span in scan_java(code).spans] == ["A", "B"]
+
+
+def test_division_is_not_a_comment_and_blank_lines_collapse():
+    code = "class A {\n    int half = 4 / 2; // x\n\n  \n    /* gone */\n\n    int b = 1;\n}\n"
+    scan = scan_java(code)
+    assert scan.comments == [(code.index("// x"), code.index("\n", code.index("// x"))),
+                             (code.index("/*"), code.index("*/") + 2)]
+    assert processor().split_into_classes(code) == ["class A {\n    int half = 4 / 2; \n    int b = 1;\n}"]
@@ -0,0 +1,32 @@
+import pytest
+
+from utils.json_repair import MalformedResponseError, repair_json
+
+
+def test_complete_value_inside_fences_and_prose():
+    assert repair_json('Sure:\n```json\n{"overview": "x", "complexity": "low"}\n```\nDone.') == (
+        {"overview": "x", "complexity": "low"}, True
+    )
+
+
+def test_truncated_object_keeps_complete_members():
+    value, complete = repair_json('{"overview": "x", "methods": {"a": "does a", "b": "does')
+    assert value == {"overview": "x", "methods": {"a": "does a"}}
+    assert complete is False
+
+
+def test_truncated_array_drops_the_cut_entry():
+    value, complete = repair_json('[{"id": 0, "overview": "a"}, {"id": 1, "overv')
+    assert value == [{"id": 0, "overview": "a"}, {"id": 1}]
+    assert complete is False
+
+
+def test_escaped_quotes_and_brackets_inside_strings():
+    value, complete = repair_json('{"a": "say \\"{[\\"", "b": "cut')
+    assert value == {"a": 'say "{["'}
+    assert complete is False
+
+
+def test_no_json_raises():
+    with pytest.raises(MalformedResponseError):
+        repair_json("I cannot help with that.")
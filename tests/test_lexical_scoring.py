@@ -0,0 +1,55 @@
+import logging
+import random
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.lexical_scoring import LexicalScorer, lcs_length, token_f1  # noqa: E402
+
+
+def reference_f1(a, t):
+    overlap = sum((Counter(a) & Counter(t)).values())
+    return 2 * overlap / (len(a) + len(t)) if a or t else 0.0
+
+
+def reference_lcs(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            table[i + 1][j + 1] = table[i][j] + 1 if x == y else max(table[i][j + 1], table[i + 1][j])
+    return table[-1][-1]
+
+
+def test_vectorized_metrics_match_their_definitions():
+    rng = random.Random(7)
+    # More pairs than one dense block, including empty sides
+    pairs = [([rng.randrange(12) for _ in range(rng.randrange(9))],
+              [rng.randrange(12) for _ in range(rng.randrange(9))]) for _ in range(600)]
+    answers = [np.array(a, np.int64) for a, _ in pairs]
+    truths = [np.array(t, np.int64) for _, t in pairs]
+    assert np.allclose(token_f1(answers, truths), [reference_f1(a, t) for a, t in pairs])
+    assert [lcs_length(a, t) for a, t in zip(answers, truths)] == [reference_lcs(a, t) for a, t in pairs]
+
+
+def score():
+    pairs = {
+        "answer": ["Loads the film by id", "Loads a film by its id", "Deletes every rental", "", "Loads the film by id",
+                   "Loads the film by id"],
+        "ground_truth": ["Loads the film by id"] * 6,
+        "name_match": [True, True, True, True, False, True],
+        "gold_signature": ["Film find(int id)"] * 6,
+        "pred_signature": ["Film find( int id )"] * 5 + ["Film find(long id)"],
+    }
+    return LexicalScorer(logging.getLogger("JavaCodeAnalyzer"), None, accept=0.8, reject=0.3).score(pairs)
+
+
+def test_verdicts_and_tiers():
+    result = score()
+    assert result["verdict"].tolist() == ["right", "uncertain", "wrong", "wrong", "uncertain", "uncertain"]
+    assert result["tier"].tolist() == ["lexical", "ragas", "lexical", "lexical", "ragas", "ragas"]
+    # Whitespace inside a signature does not count as a mismatch
+    assert result["signature_match"].tolist() == [True] * 5 + [False]
+    assert result["token_f1"][0] == 1.0 and result["rouge_l"][0] == 1.0
+    assert result["lexical_score"][3] == 0.0
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.llm_backends import FakeBackendError, FakeChatBackend  # noqa: E402
+from utils.retry_policy import RATE_LIMIT, TRANSIENT, classify_error, retry_after  # noqa: E402
+
+PROMPTS = [f"Describe these methods: run\nclass C{i} {{ void run() {{}} }}" for i in range(20)]
+
+
+def outcomes(backend, prompts):
+    async def run():
+        results = []
+        for prompt in prompts:
+            try:
+                results.append(json.loads((await backend.ainvoke(prompt)).content))
+            except FakeBackendError as ex:
+                results.append(ex.status_code)
+        return results
+    return asyncio.run(run())
+
+
+def test_answers_and_failures_are_deterministic_per_seed():
+    options = dict(latency_ms=0, error_rate=0.3, rate_limit_rate=0.2)
+    first = outcomes(FakeChatBackend(seed=1, **options), PROMPTS * 2)
+    assert first == outcomes(FakeChatBackend(seed=1, **options), PROMPTS * 2)
+    assert first != outcomes(FakeChatBackend(seed=2, **options), PROMPTS * 2)
+    assert {429, 503} <= {r for r in first if isinstance(r, int)}
+    answered = next(r for r in first if isinstance(r, dict))
+    assert answered["methods"] == {"run": "Stand-in description of run"}
+
+
+def test_packed_prompt_is_answered_per_class_id():
+    prompt = (
+        "Describe each Java class below.\n\n"
+        "### Class id 0\nDescribe these methods: a, b\nclass A { void a() {} void b() {} }\n\n"
+        "### Class id 3\nDescribe these methods: (none)\nclass B {}"
+    )
+    answer = outcomes(FakeChatBackend(latency_ms=0), [prompt])[0]
+    assert [entry["id"] for entry in answer] == [0, 3]
+    assert answer[0]["overview"] == "Stand-in overview of A"
+    assert set(answer[0]["methods"]) == {"a", "b"}
+    assert answer[1]["methods"] == {}
+
+
+def test_injected_errors_look_like_provider_http_errors():
+    async def fail(backend):
+        with pytest.raises(FakeBackendError) as info:
+            await backend.ainvoke(PROMPTS[0])
+        return info.value
+
+    throttled = asyncio.run(fail(FakeChatBackend(latency_ms=0, rate_limit_rate=1.0)))
+    assert throttled.status_code == 429
+    assert retry_after(throttled) == 1.0
+    assert classify_error(throttled) == RATE_LIMIT
+
+    unavailable = asyncio.run(fail(FakeChatBackend(latency_ms=0, error_rate=1.0)))
+    assert unavailable.status_code == 503
+    assert retry_after(unavailable) is None
+    assert classify_error(unavailable) == TRANSIENT
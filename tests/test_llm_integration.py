@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.llm_integration import AsyncLLMAnalyzer  # noqa: E402
+
+
+def test_merged_class_with_a_failed_part_is_marked_failed():
+    ok = {"class_name": "Big", "overview": "Does things", "methods": [], "dependencies": [], "complexity": "low"}
+    failed = dict(ok, overview="Analysis failed", failed=True)
+    merged = AsyncLLMAnalyzer.merge_partial_analyses([ok, failed])
+    assert merged["overview"] == "Does things"
+    assert merged["failed"] is True
+    assert "failed" not in AsyncLLMAnalyzer.merge_partial_analyses([ok, ok])
+
+
+@pytest.fixture
+def analyzer(logger, exception_handler, monkeypatch):
+    from config.config import app_config, llm_config
+    monkeypatch.setattr(llm_config, "backend", "fake")
+    monkeypatch.setattr(llm_config, "retry_base_delay", 0.0)
+    monkeypatch.setattr(app_config, "cache_enabled", False)
+    monkeypatch.setattr(app_config, "pack_linger_ms", 0)
+    return AsyncLLMAnalyzer(logger, exception_handler)
+
+
+def failing_invoke(analyzer, errors):
+    """Make invoke raise `errors` in turn, then answer packed and single calls"""
+    calls = []
+
+    async def invoke(chain, inputs, prompt_text):
+        calls.append("packed" if chain is analyzer.packed_class_chain else "single")
+        if errors:
+            raise errors.pop(0)
+        if chain is analyzer.packed_class_chain:
+            return '[{"id": 0, "overview": "Packed", "methods": {}, "complexity": "low"}]'
+        return '{"overview": "Alone", "methods": {}, "complexity": "low"}'
+
+    analyzer.invoke = invoke
+    return calls
+
+
+def test_packed_request_is_retried_before_falling_back(analyzer):
+    from src.llm_backends import FakeBackendError
+    calls = failing_invoke(analyzer, [FakeBackendError("unavailable", 503)])
+    result = asyncio.run(analyzer.analyze_class("class A { void a() {} }"))
+    assert calls == ["packed", "packed"]
+    assert result["overview"] == "Packed"
+
+
+def test_exhausted_packed_retries_fall_back_to_single_calls(analyzer):
+    from src.llm_backends import FakeBackendError
+    attempts = analyzer.retry_policy.max_attempts
+    calls = failing_invoke(analyzer, [FakeBackendError("unavailable", 503) for _ in range(attempts)])
+    analyzer.breaker.failure_threshold = attempts + 1
+    result = asyncio.run(analyzer.analyze_class("class A { void a() {} }"))
+    assert calls == ["packed"] * attempts + ["single"]
+    assert result["overview"] == "Alone"
+
+
+def test_rate_limited_pack_is_not_split_into_single_calls(analyzer):
+    from src.llm_backends import FakeBackendError
+    attempts = analyzer.retry_policy.max_attempts
+    calls = failing_invoke(analyzer, [FakeBackendError("slow down", 429) for _ in range(attempts)])
+    result = asyncio.run(analyzer.analyze_class("class A { void a() {} }"))
+    assert calls == ["packed"] * attempts
+    assert result["failed"] is True
+
+
+def test_pack_failing_with_an_open_breaker_is_not_split_into_single_calls(analyzer):
+    from src.llm_backends import FakeBackendError
+    attempts = analyzer.retry_policy.max_attempts
+    calls = failing_invoke(analyzer, [FakeBackendError("unavailable", 503) for _ in range(attempts)])
+    analyzer.breaker.state = "open"
+    result = asyncio.run(analyzer.analyze_class("class A { void a() {} }"))
+    assert "single" not in calls
+    assert result["failed"] is True
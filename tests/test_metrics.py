@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from utils.metrics import Histogram, RunMetrics
+
+
+def test_quantile_is_the_upper_bound_of_its_bucket():
+    histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+    assert histogram.quantile(0.5) == 0.0
+    for value in (0.05, 0.1, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    # A value equal to a bound lands in that bucket
+    assert histogram.counts == [2, 2, 1, 0]
+    assert histogram.quantile(0.4) == 0.1
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(1.0) == 10.0
+    # Past the last bound only the largest observation is known
+    histogram.observe(42.0)
+    assert histogram.quantile(1.0) == 42.0
+    assert histogram.to_dict()["buckets"] == {"0.1": 2, "1.0": 2, "10.0": 1, "+Inf": 1}
+
+
+def test_span_records_errors_and_feeds_stage_seconds():
+    metrics = RunMetrics()
+    with pytest.raises(KeyError):
+        with metrics.span("parse", files=3):
+            raise KeyError("missing")
+    assert metrics.spans[0]["stage"] == "parse" and metrics.spans[0]["files"] == 3
+    assert metrics.spans[0]["error"] == "KeyError"
+    entry = metrics.report()["histograms"][0]
+    assert entry["name"] == "stage_seconds" and entry["labels"] == {"stage": "parse"}
+    assert entry["value"]["count"] == 1
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_prometheus_buckets_are_cumulative(tmp_path):
+    metrics = RunMetrics()
+    metrics.count("tokens_total", 5, kind="prompt")
+    metrics.count("tokens_total", 2, kind="prompt")
+    metrics.gauge("queue_depth", 4)
+    for value in (0.003, 0.003, 0.2, 500.0):
+        metrics.observe("llm_seconds", value, model="m")
+    path = tmp_path / "textfile" / "run.prom"
+    metrics.write_prometheus(str(path), prefix="t")
+    lines = read_lines(path)
+    assert 't_tokens_total{kind="prompt"} 7.0' in lines
+    assert "# TYPE t_queue_depth gauge" in lines and "t_queue_depth 4" in lines
+    assert lines.count("# TYPE t_llm_seconds histogram") == 1
+    buckets = [line for line in lines if line.startswith("t_llm_seconds_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert buckets[0] == 't_llm_seconds_bucket{model="m",le="0.005"} 2'
+    assert counts == sorted(counts)
+    assert buckets[-1] == 't_llm_seconds_bucket{model="m",le="+Inf"} 4'
+    assert 't_llm_seconds_count{model="m"} 4' in lines
+
+
+def test_prometheus_file_is_replaced_atomically(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.prom")
+    metrics = RunMetrics()
+    metrics.count("runs_total")
+    metrics.write_prometheus(path, prefix="t")
+    metrics.count("runs_total")
+    metrics.write_prometheus(path, prefix="t")
+    assert "t_runs_total 2.0" in read_lines(path)
+    assert os.listdir(tmp_path) == ["run.prom"]
+
+    # A write that fails before the rename leaves the previous file whole
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", fail)
+    metrics.count("runs_total")
+    with pytest.raises(OSError):
+        metrics.write_prometheus(path, prefix="t")
+    assert "t_runs_total 2.0" in read_lines(path)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import logging
+
+from config.config import app_config
+from src.output_generator import NDJSONStreamWriter, OutputWriter
+from utils.exception_handler import ExceptionHandler
+
+
+def writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "output_json", str(tmp_path / "javacode_analysis.json"))
+    logger = logging.getLogger("JavaCodeAnalyzer")
+    return OutputWriter(logger, ExceptionHandler(logger))
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_metrics_and_graph_reports_are_not_taken_for_the_previous_output(tmp_path, monkeypatch):
+    output = writer(tmp_path, monkeypatch)
+    write(tmp_path / "javacode_analysis_20240101_120000.json", {"commit_sha": "abc", "components": []})
+    # Same run, sorting after the output itself
+    write(tmp_path / "javacode_analysis_20240101_120000.metrics.json", {"spans": []})
+    write(tmp_path / "javacode_analysis_20240101_120000.graph.json", {"nodes": []})
+    assert [p.name for p in output.previous_outputs()] == ["javacode_analysis_20240101_120000.json"]
+    assert output.load_previous_output()["commit_sha"] == "abc"
+
+
+def test_newest_output_with_a_commit_is_loaded(tmp_path, monkeypatch):
+    output = writer(tmp_path, monkeypatch)
+    write(tmp_path / "javacode_analysis_20240101_120000.json", {"commit_sha": "old"})
+    write(tmp_path / "javacode_analysis_20240102_120000.json", {"commit_sha": "new"})
+    write(tmp_path / "javacode_analysis_20240103_120000.json", {"components": []})
+    (tmp_path / "javacode_analysis_20240104_120000.json").write_text("{truncated", encoding="utf-8")
+    assert output.load_previous_output()["commit_sha"] == "new"
+
+
+def test_no_previous_output(tmp_path, monkeypatch):
+    assert writer(tmp_path, monkeypatch).load_previous_output() is None
+
+
+HEADER = {"project_name": "demo", "commit_sha": "abc", "overview": {"purpose": "x", "tags": ["a", "b"]}}
+COMPONENTS = [
+    {"class_name": "A", "methods": [{"name": "run", "description": "Runs"}], "dependencies": []},
+    {"class_name": "B", "methods": [], "dependencies": ["java.util.List"]},
+]
+
+
+def stream_and_finalize(output, components, tail=""):
+    stream = output.open_stream(HEADER)
+    for component in components:
+        stream.write(component)
+    stream.close()
+    if tail:
+        with stream.path.open("a", encoding="utf-8") as f:
+            f.write(tail)
+    return asyncio.run(output.finalize_stream(stream.path))
+
+
+def written_by_write_output(output, components):
+    assert asyncio.run(output.write_output(dict(HEADER, components=components)))
+    return output.timestamped_path().read_text(encoding="utf-8")
+
+
+def test_finalized_stream_matches_write_output(tmp_path, monkeypatch):
+    output = writer(tmp_path, monkeypatch)
+    finalized = stream_and_finalize(output, COMPONENTS)
+    assert finalized.read_text(encoding="utf-8") == written_by_write_output(output, COMPONENTS)
+
+
+def test_finalized_empty_stream_matches_write_output(tmp_path, monkeypatch):
+    output = writer(tmp_path, monkeypatch)
+    finalized = stream_and_finalize(output, [])
+    assert finalized.read_text(encoding="utf-8") == written_by_write_output(output, [])
+    assert json.loads(finalized.read_text(encoding="utf-8"))["components"] == []
+
+
+def test_truncated_last_line_is_skipped(tmp_path, monkeypatch):
+    output = writer(tmp_path, monkeypatch)
+    finalized = stream_and_finalize(output, COMPONENTS, tail='{"class_name": "C", "meth')
+    assert json.loads(finalized.read_text(encoding="utf-8")) == dict(HEADER, components=COMPONENTS)
+
+
+def test_stream_writes_in_batches(tmp_path):
+    stream = NDJSONStreamWriter(logging.getLogger("JavaCodeAnalyzer"), tmp_path / "run.ndjson", batch_size=2)
+    for i in range(3):
+        stream.write({"i": i})
+    assert stream.path.read_text(encoding="utf-8") == '{"i": 0}\n{"i": 1}\n'
+    stream.close()
+    assert [json.loads(line) for line in stream.path.read_text(encoding="utf-8").splitlines()] == [
+        {"i": 0}, {"i": 1}, {"i": 2}
+    ]
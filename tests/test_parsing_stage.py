@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("git")
+
+from config.config import app_config  # noqa: E402
+from src.data_loader import GitObjectDataLoader  # noqa: E402
+from src.parsing_stage import ParsingStage  # noqa: E402
+from utils.git_tool import GitManager  # noqa: E402
+
+
+def test_concurrent_batches_read_the_object_store_safely(upstream, tmp_path, logger, exception_handler,
+                                                          monkeypatch):
+    sources = {f"src/C{i}.java": f"class C{i} {{ int v = {i}; }}\n" * 50 for i in range(40)}
+    upstream.commit(sources)
+    local_dir = asyncio.run(GitManager(logger, exception_handler).clone_repository(
+        f"file://{upstream.path}", str(tmp_path / "clones"), blobless=True
+    ))
+    monkeypatch.setattr(app_config, "parse_workers", 1)
+    monkeypatch.setattr(app_config, "parse_batch_size", 4)
+    loader = GitObjectDataLoader(logger, exception_handler)
+    stage = ParsingStage(logger, exception_handler, loader)
+    files = loader.list_code_files(local_dir, [".java"])
+
+    async def parse_all():
+        return await asyncio.gather(*(stage.parse_batch(batch) for batch in stage.batches(files)))
+
+    parsed = [p for batch in asyncio.run(parse_all()) for p in batch]
+    assert len(parsed) == len(files) == 42
+    for p in parsed:
+        name = p.path.rsplit("/", 1)[1][:-len(".java")]
+        assert not p.error and p.class_names[0] == name
+        source = sources.get(f"src/{name}.java")
+        if source is not None:
+            assert p.size == len(source)
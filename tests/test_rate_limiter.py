@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+from utils.rate_limiter import AdaptiveRateLimiter, TokenBucket, is_rate_limit_error
+
+
+def limiter(**kwargs):
+    options = dict(initial_concurrency=4, min_concurrency=1, max_concurrency=8, target_latency=1.0)
+    options.update(kwargs)
+    return AdaptiveRateLimiter(logging.getLogger("JavaCodeAnalyzer"), **options)
+
+
+def test_healthy_calls_grow_the_limit_by_about_one_per_round():
+    async def scenario():
+        gate = limiter()
+        for _ in range(4):
+            await gate.acquire()
+            await gate.release(0.1, "ok")
+        return gate
+    gate = asyncio.run(scenario())
+    assert 4.9 < gate.limit < 5.0
+    assert gate.in_flight == 0
+
+
+def test_slow_calls_do_not_grow_the_limit():
+    async def scenario():
+        gate = limiter()
+        await gate.acquire()
+        await gate.release(5.0, "ok")
+        return gate
+    assert asyncio.run(scenario()).limit == 4
+
+
+def test_throttling_halves_once_per_backoff_interval_and_respects_the_floor():
+    async def scenario():
+        gate = limiter(initial_concurrency=8, backoff_interval=60)
+        for _ in range(3):
+            await gate.acquire()
+            await gate.release(0.1, "throttled")
+        first = gate.limit
+        for _ in range(5):
+            # Outside the backoff interval every timeout halves again
+            gate.last_backoff = 0.0
+            await gate.acquire()
+            await gate.release(0.1, "timeout")
+        return first, gate
+    first, gate = asyncio.run(scenario())
+    assert first == 4
+    assert gate.limit == 1
+    assert (gate.throttled, gate.timeouts) == (3, 5)
+
+
+def test_acquire_waits_for_a_free_slot():
+    async def scenario():
+        gate = limiter(initial_concurrency=1, max_concurrency=1)
+        await gate.acquire()
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0.01)
+        blocked = not waiter.done()
+        await gate.release(0.1, "ok")
+        await asyncio.wait_for(waiter, 1)
+        return blocked, gate.in_flight
+    assert asyncio.run(scenario()) == (True, 1)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert 0.9 < bucket.wait_time(1) <= 1.0
+    # Larger than the bucket: waits for a full bucket rather than forever
+    assert bucket.wait_time(1000) <= 60
+    assert TokenBucket(0).wait_time(10 ** 9) == 0
+
+
+class TooManyRequestsError(Exception):
+    pass
+
+
+class CohereAPIError(Exception):
+    def __init__(self, message, http_status):
+        super().__init__(message)
+        self.http_status = http_status
+
+
+def test_rate_limits_come_from_the_status_or_the_error_type():
+    assert is_rate_limit_error(CohereAPIError("slow down", 429))
+    assert is_rate_limit_error(TooManyRequestsError("slow down"))
+    assert not is_rate_limit_error(CohereAPIError("rate limit exceeded", 500))
+    assert not is_rate_limit_error(ValueError("Expecting ',' delimiter: line 1 column 429 (char 428)"))
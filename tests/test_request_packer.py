@@ -0,0 +1,78 @@
+import asyncio
+
+from src.request_packer import RequestPacker
+
+
+def make_packer(logger, exception_handler, send_batch, **limits):
+    limits = {"max_tokens": 100, "max_items": 3, "linger_ms": 10, **limits}
+    return RequestPacker(logger, exception_handler, send_batch, **limits)
+
+
+def test_full_pack_is_sent_at_once_with_results_in_order(logger, exception_handler):
+    sent = []
+
+    async def send_batch(items):
+        sent.append(list(items))
+        return [{"item": item} for item in items]
+
+    async def run():
+        packer = make_packer(logger, exception_handler, send_batch, linger_ms=60000)
+        return await asyncio.gather(*(packer.submit(i, 10) for i in range(3))), packer
+
+    results, packer = asyncio.run(run())
+    assert sent == [[0, 1, 2]]
+    assert results == [{"item": 0}, {"item": 1}, {"item": 2}]
+    assert packer.stats() == {"packed_requests": 1, "packed_classes": 3, "classes_per_request": 3.0}
+
+
+def test_partial_pack_is_sent_after_the_linger(logger, exception_handler):
+    sent = []
+
+    async def send_batch(items):
+        sent.append(list(items))
+        return list(items)
+
+    async def run():
+        packer = make_packer(logger, exception_handler, send_batch)
+        return await asyncio.gather(packer.submit("a", 10), packer.submit("b", 10))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert sent == [["a", "b"]]
+
+
+def test_item_over_the_token_budget_flushes_the_pending_pack_first(logger, exception_handler):
+    sent = []
+
+    async def send_batch(items):
+        sent.append(list(items))
+        return list(items)
+
+    async def run():
+        packer = make_packer(logger, exception_handler, send_batch)
+        return await asyncio.gather(packer.submit("a", 60), packer.submit("b", 60))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert sent == [["a"], ["b"]]
+
+
+def test_items_missing_from_the_response_get_none(logger, exception_handler):
+    async def send_batch(items):
+        return [{"ok": True}]
+
+    async def run():
+        packer = make_packer(logger, exception_handler, send_batch)
+        return await asyncio.gather(*(packer.submit(i, 10) for i in range(3)))
+
+    assert asyncio.run(run()) == [{"ok": True}, None, None]
+
+
+def test_send_error_is_raised_to_every_caller(logger, exception_handler):
+    async def send_batch(items):
+        raise RuntimeError("backend down")
+
+    async def run():
+        packer = make_packer(logger, exception_handler, send_batch)
+        return await asyncio.gather(*(packer.submit(i, 10) for i in range(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) and str(r) == "backend down" for r in results)
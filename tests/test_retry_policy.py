@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from utils.retry_policy import (
+    FATAL, PARSE, RATE_LIMIT, TIMEOUT, TRANSIENT, CircuitBreaker, RetryBudgetExceeded, RetryPolicy,
+    classify_error, retry_after
+)
+from utils.json_repair import MalformedResponseError
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def policy(**kwargs):
+    options = dict(max_attempts=3, base_delay=0, max_delay=0, budget_ratio=0, budget_min=10)
+    options.update(kwargs)
+    return RetryPolicy(logging.getLogger("JavaCodeAnalyzer"), **options)
+
+
+def failing(*errors, result="ok"):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return operation, calls
+
+
+def test_classify_error():
+    assert classify_error(HTTPError(429)) == RATE_LIMIT
+    assert classify_error(asyncio.TimeoutError()) == TIMEOUT
+    assert classify_error(MalformedResponseError("bad")) == PARSE
+    assert classify_error(HTTPError(401)) == FATAL
+    assert classify_error(HTTPError(503)) == TRANSIENT
+    assert classify_error(ConnectionResetError()) == TRANSIENT
+
+
+def test_parse_errors_quoting_throttling_words_are_not_rate_limits():
+    decode_error = json.JSONDecodeError("Expecting ',' delimiter", " " * 500, 428)
+    assert str(decode_error).endswith("line 1 column 429 (char 428)")
+    assert classify_error(decode_error) == PARSE
+
+    exceptions = pytest.importorskip("langchain_core.exceptions")
+    quoted = exceptions.OutputParserException('Invalid json output: {"overview": "Applies a rate limit"')
+    assert classify_error(quoted) == PARSE
+    # Free-form text alone never counts, only a status or a throttling type
+    assert classify_error(RuntimeError("too many requests")) == TRANSIENT
+
+
+def test_retry_after_header():
+    assert retry_after(HTTPError(429, {"Retry-After": "7"})) == 7.0
+    assert retry_after(HTTPError(429)) is None
+
+
+def test_transient_errors_are_retried_until_success():
+    operation, calls = failing(HTTPError(503), HTTPError(429))
+    retry = policy()
+    assert asyncio.run(retry.run(operation, "test")) == "ok"
+    assert len(calls) == 3
+    assert retry.stats() == {"calls": 1, "retries": 2, "budget_denied": 0}
+
+
+def test_fatal_errors_are_not_retried():
+    operation, calls = failing(HTTPError(401))
+    with pytest.raises(HTTPError):
+        asyncio.run(policy().run(operation, "test"))
+    assert len(calls) == 1
+
+
+def test_last_error_is_raised_after_max_attempts():
+    operation, calls = failing(*[HTTPError(503)] * 5)
+    with pytest.raises(HTTPError):
+        asyncio.run(policy(max_attempts=2).run(operation, "test"))
+    assert len(calls) == 2
+
+
+def test_retry_budget_caps_retries_across_calls():
+    retry = policy(budget_min=1)
+    first, _ = failing(HTTPError(503))
+    assert asyncio.run(retry.run(first, "first")) == "ok"
+    second, calls = failing(HTTPError(503))
+    with pytest.raises(RetryBudgetExceeded):
+        asyncio.run(retry.run(second, "second"))
+    assert len(calls) == 1
+    assert retry.budget_denied == 1
+
+
+def test_breaker_opens_after_consecutive_unhealthy_failures():
+    breaker = CircuitBreaker(logging.getLogger("JavaCodeAnalyzer"), failure_threshold=3, cooldown=30)
+    breaker.record(TRANSIENT)
+    breaker.record(RATE_LIMIT)
+    # A parse error is a response, so the backend counts as up again
+    breaker.record(PARSE)
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+    for _ in range(3):
+        breaker.record(TIMEOUT)
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    async def scenario():
+        breaker = CircuitBreaker(logging.getLogger("JavaCodeAnalyzer"), failure_threshold=1, cooldown=0.01)
+        breaker.record(TRANSIENT)
+        await breaker.before_call()
+        probing = (breaker.state, breaker.probe_in_flight)
+        breaker.record(TRANSIENT)
+        reopened = breaker.state
+        await breaker.before_call()
+        breaker.record(None)
+        return probing, reopened, breaker.state, breaker.times_opened
+    assert asyncio.run(scenario()) == (("half_open", True), "open", "closed", 2)
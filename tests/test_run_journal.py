@@ -0,0 +1,68 @@
+import logging
+
+from utils.run_journal import FileProgress, RunJournal
+
+
+def journal(path):
+    return RunJournal(logging.getLogger("JavaCodeAnalyzer"), None, str(path))
+
+
+def test_completed_files_and_components_survive_reopening(tmp_path):
+    path = tmp_path / "journal.sqlite"
+    first = journal(path)
+    first.start_run("run1", {"commit_sha": "abc"})
+    first.record_file("run1", "A.java", "hash-a", [{"class_name": "A"}, {"class_name": "A.Inner"}])
+    first.close()
+
+    reopened = journal(path)
+    assert reopened.get_header("run1") == {"commit_sha": "abc"}
+    assert reopened.completed_files("run1") == {"A.java": "hash-a"}
+    assert list(reopened.iter_components("run1", "A.java")) == [{"class_name": "A"}, {"class_name": "A.Inner"}]
+    assert reopened.get_header("other") is None
+
+
+def test_recording_a_file_again_replaces_its_components(tmp_path):
+    j = journal(tmp_path / "journal.sqlite")
+    j.start_run("run1", {})
+    j.record_file("run1", "A.java", "old", [{"class_name": "A"}, {"class_name": "B"}])
+    j.record_file("run1", "A.java", "new", [{"class_name": "A2"}])
+    assert j.completed_files("run1") == {"A.java": "new"}
+    assert list(j.iter_components("run1", "A.java")) == [{"class_name": "A2"}]
+
+
+def test_runs_are_kept_apart(tmp_path):
+    j = journal(tmp_path / "journal.sqlite")
+    j.start_run("run1", {})
+    j.start_run("run2", {})
+    j.record_file("run1", "A.java", "h", [{"class_name": "A"}])
+    assert j.completed_files("run2") == {}
+    assert list(j.iter_components("run2", "A.java")) == []
+
+
+def test_file_with_a_failed_class_is_retried_on_resume(tmp_path):
+    j = journal(tmp_path / "journal.sqlite")
+    j.start_run("run1", {})
+    progress = FileProgress(j, "run1")
+    progress.expect("A.java", "hash-a", 2)
+    progress.expect("B.java", "hash-b", 1)
+    progress.record({"class_name": "A", "source_file": "A.java"})
+    progress.record({"class_name": "A.Inner", "source_file": "A.java", "overview": "Analysis failed", "failed": True})
+    progress.record({"class_name": "B", "source_file": "B.java"})
+    assert j.completed_files("run1") == {"B.java": "hash-b"}
+
+    # The resumed run skips B.java and analyzes A.java again, this time successfully
+    resumed = FileProgress(j, "run1")
+    resumed.expect("A.java", "hash-a", 2)
+    resumed.record({"class_name": "A", "source_file": "A.java"})
+    resumed.record({"class_name": "A.Inner", "source_file": "A.java"})
+    assert j.completed_files("run1") == {"A.java": "hash-a", "B.java": "hash-b"}
+    assert [c["class_name"] for c in j.iter_components("run1", "A.java")] == ["A", "A.Inner"]
+
+
+def test_file_with_an_unfinished_class_is_not_journaled(tmp_path):
+    j = journal(tmp_path / "journal.sqlite")
+    j.start_run("run1", {})
+    progress = FileProgress(j, "run1")
+    progress.expect("A.java", "hash-a", 1)
+    progress.record({"class_name": "A", "source_file": "A.java", "unfinished": True})
+    assert j.completed_files("run1") == {}
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+
+from src.scheduler import CostScheduler, WorkItem
+from utils.exception_handler import ExceptionHandler
+
+
+def scheduler(tmp_path, workers=1, deadline=None, window=0):
+    logger = logging.getLogger("JavaCodeAnalyzer")
+    return CostScheduler(logger, ExceptionHandler(logger), str(tmp_path / "history.json"),
+                         workers=workers, deadline=deadline, window=window)
+
+
+def work_items(*tokens):
+    return [WorkItem(index=i, key=f"k{i}", source_file=f"{i}.java", parts=[f"class C{i} {{}}"], tokens=t)
+            for i, t in enumerate(tokens)]
+
+
+def run(tmp_path, items, analyze, **kwargs):
+    """Submit `items` while the scheduler runs, as the parsing stage does"""
+    results = {}
+
+    async def scenario():
+        sched = scheduler(tmp_path, **kwargs)
+
+        async def produce():
+            for item in items:
+                await sched.submit(item)
+            await sched.close()
+        await asyncio.gather(produce(), sched.run(
+            analyze,
+            on_unfinished=lambda item: "unfinished",
+            on_failed=lambda item: "failed",
+            on_result=lambda item, result: results.__setitem__(item.index, result)
+        ))
+    asyncio.run(scenario())
+    return results
+
+
+def test_costliest_classes_are_dispatched_first(tmp_path):
+    order = []
+
+    async def analyze(item):
+        order.append(item.index)
+        return "ok"
+    results = run(tmp_path, work_items(10, 500, 50), analyze)
+    assert order == [1, 2, 0]
+    assert results == {0: "ok", 1: "ok", 2: "ok"}
+
+
+def test_ordering_is_longest_first_within_the_window(tmp_path):
+    order = []
+
+    async def analyze(item):
+        order.append(item.index)
+        return "ok"
+    run(tmp_path, work_items(10, 20, 30, 500), analyze, window=2)
+    # The costliest class arrives after the window has filled, so it cannot jump ahead of the first
+    assert order[0] == 1
+    assert sorted(order) == [0, 1, 2, 3]
+
+
+def test_full_window_makes_submit_wait(tmp_path):
+    async def scenario():
+        sched = scheduler(tmp_path, window=2)
+        items = work_items(1, 2, 3)
+        await sched.submit(items[0])
+        await sched.submit(items[1])
+        blocked = asyncio.create_task(sched.submit(items[2]))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert (await sched.next_item()).index == 1
+        await asyncio.wait_for(blocked, 1)
+    asyncio.run(scenario())
+
+
+def test_failures_are_reported_apart_from_deadline_cut_offs(tmp_path):
+    async def analyze(item):
+        if item.index == 0:
+            raise RuntimeError("backend down")
+        await asyncio.sleep(10 if item.index == 2 else 0)
+        return "ok"
+    results = run(tmp_path, work_items(30, 20, 10), analyze, workers=3, deadline=time.monotonic() + 0.2)
+    assert results == {0: "failed", 1: "ok", 2: "unfinished"}
+
+
+def test_classes_submitted_after_the_deadline_are_unfinished(tmp_path):
+    results = {}
+
+    async def analyze(item):
+        return "ok"
+
+    async def scenario():
+        sched = scheduler(tmp_path, deadline=time.monotonic() + 0.05, window=1)
+
+        async def produce():
+            for item in work_items(10, 20):
+                await sched.submit(item)
+            await asyncio.sleep(0.2)
+            await sched.submit(work_items(10, 20, 30)[2])
+            await sched.close()
+        await asyncio.gather(produce(), sched.run(
+            analyze, lambda item: "unfinished", lambda item: "failed",
+            lambda item, result: results.__setitem__(item.index, result)
+        ))
+    asyncio.run(scenario())
+    assert results == {0: "ok", 1: "ok", 2: "unfinished"}
+
+
+def test_latencies_order_the_next_run(tmp_path):
+    async def analyze(item):
+        await asyncio.sleep(0.05 if item.index == 0 else 0)
+        return "ok"
+    run(tmp_path, work_items(10, 500), analyze)
+
+    order = []
+
+    async def record(item):
+        order.append(item.index)
+        return "ok"
+    run(tmp_path, work_items(10, 500), record)
+    assert order == [0, 1]
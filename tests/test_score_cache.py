@@ -0,0 +1,36 @@
+import logging
+
+from utils.score_cache import ScoreCache
+
+
+def cache(path):
+    return ScoreCache(logging.getLogger("JavaCodeAnalyzer"), None, str(path))
+
+
+def key(answer="answer", metric="answer_correctness"):
+    return ScoreCache.make_key("question", "truth", answer, ["context"], metric, "judge")
+
+
+def test_key_covers_answer_and_metric():
+    assert key() == key()
+    assert key() != key(answer="other answer")
+    assert key() != key(metric="faithfulness")
+
+
+def test_scores_persist_and_nan_is_not_stored(tmp_path):
+    first = cache(tmp_path / "scores.sqlite")
+    first.put_many([(key(), "answer_correctness", 0.75), (key("failed"), "answer_correctness", float("nan"))])
+    first.close()
+
+    reopened = cache(tmp_path / "scores.sqlite")
+    assert reopened.get_many([key(), key("failed"), key("unseen")]) == {key(): 0.75}
+    assert reopened.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.3333}
+
+
+def test_lookups_larger_than_one_query(tmp_path):
+    c = cache(tmp_path / "scores.sqlite")
+    entries = [(key(str(i)), "answer_correctness", i / 1000) for i in range(1200)]
+    c.put_many(entries)
+    found = c.get_many([k for k, _, _ in entries])
+    assert len(found) == 1200
+    assert found[key("999")] == 0.999
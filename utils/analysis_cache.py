@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from utils.metrics import metrics
+
+
+class AnalysisCache:
+    """Content-addressed SQLite store of per-class LLM analyses.
+
+    Entries are keyed on the normalized code chunk together with everything
+    that influences the generation (prompt template, model, temperature), so
+    an identical class seen in another run, repo or branch is a cache hit.
+    """
+
+    def __init__(self, logger, exception_handler, path: str,
+                 max_size_mb: int = 256, max_age_days: int = 30):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.path = path
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_accessed ON analyses(accessed_at)")
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def normalize_code(code: str) -> str:
+        """Drop indentation and blank lines so formatting-only edits still hit"""
+        return "\n".join(line.strip() for line in code.splitlines() if line.strip())
+
+    def make_key(self, code: str, prompt_template: str, model_name: str, temperature: float) -> str:
+        digest = hashlib.sha256()
+        for part in (self.normalize_code(code), prompt_template, model_name, repr(temperature)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.get_any([key])
+
+    def get_any(self, keys: List[str]) -> Optional[dict]:
+        """Value of the first of `keys` with a fresh entry; counts as a single lookup"""
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = dict(
+                (key, (value, created_at)) for key, value, created_at in self.conn.execute(
+                    f"SELECT key, value, created_at FROM analyses WHERE key IN ({placeholders})", keys
+                )
+            )
+            now = time.time()
+            key = next((k for k in keys if k in rows and now - rows[k][1] <= self.max_age_seconds), None)
+            if key is None:
+                self.misses += 1
+                metrics.count("cache_lookups_total", result="miss")
+                return None
+            self.conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            metrics.count("cache_lookups_total", result="hit")
+            return json.loads(rows[key][0])
+        except Exception as ex:
+            self.logger.warning(f"Analysis cache read failed: {ex}")
+            self.misses += 1
+            metrics.count("cache_lookups_total", result="miss")
+            return None
+
+    def put(self, key: str, value: dict):
+        try:
+            payload = json.dumps(value)
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self.conn.commit()
+            self.writes += 1
+        except Exception as ex:
+            self.logger.warning(f"Analysis cache write failed: {ex}")
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit"""
+        try:
+            cutoff = time.time() - self.max_age_seconds
+            expired = self.conn.execute("DELETE FROM analyses WHERE created_at < ?", (cutoff,)).rowcount
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+            stale_keys = []
+            if total > self.max_bytes:
+                for key, size in self.conn.execute("SELECT key, size FROM analyses ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    stale_keys.append((key,))
+                    total -= size
+                self.conn.executemany("DELETE FROM analyses WHERE key = ?", stale_keys)
+            self.conn.commit()
+            self.evictions += expired + len(stale_keys)
+            if expired or stale_keys:
+                self.logger.info(f"Analysis cache evicted {expired} expired and {len(stale_keys)} LRU entries")
+        except Exception as ex:
+            self.logger.warning(f"Analysis cache eviction failed: {ex}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        self.conn.close()
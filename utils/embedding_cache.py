@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Largest IN (...) list per index query
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingStore:
+    """On-disk embedding vectors: a float32 matrix file read through np.memmap plus a SQLite row index.
+
+    New vectors are appended as rows; the index maps a key (hash of model,
+    input kind and text) to its row, so a lookup is one indexed query and
+    one fancy-indexed read of the memory-mapped matrix.
+    """
+
+    def __init__(self, logger, exception_handler, directory: str, model_name: str):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        os.makedirs(directory, exist_ok=True)
+        model_id = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:16]
+        self.vectors_path = os.path.join(directory, f"vectors_{model_id}.f32")
+        self.conn = sqlite3.connect(os.path.join(directory, f"index_{model_id}.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.conn.commit()
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = row[0] if row else None
+        self.rows = self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        self.matrix = None
+        self.lock = threading.Lock()
+
+    def _map(self):
+        """(Re)map the vector file after it grew"""
+        if self.matrix is None or self.matrix.shape[0] < self.rows:
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self.matrix
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self.conn.execute(
+                    f"SELECT key, row FROM rows WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            if not found:
+                return {}
+            matrix = self._map()
+            keys_found = list(found)
+            vectors = np.asarray(matrix[[found[k] for k in keys_found]])
+        return dict(zip(keys_found, vectors))
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        if not keys:
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.dim is None:
+                self.dim = block.shape[1]
+                self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (self.dim,))
+            elif block.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {block.shape[1]} does not match the cache ({self.dim})")
+            # Rows are written before they are indexed; a crash only leaves unindexed rows, cut off here
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(self.rows * self.dim * 4)
+                f.write(block.tobytes())
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO rows (key, row) VALUES (?, ?)",
+                [(key, self.rows + i) for i, key in enumerate(keys)]
+            )
+            self.conn.commit()
+            self.rows += len(keys)
+
+    def close(self):
+        self.conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the backend.
+
+    Keys hash the model name, the input kind (document or query, which
+    providers such as Cohere embed differently) and the text. `warm` embeds
+    a whole evaluation's texts up front in one batched call so the per-sample
+    calls RAGAS makes while scoring (embed_documents) are all hits.
+    """
+
+    def __init__(self, logger, exception_handler, backend: Embeddings, model_name: str, directory: str):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.backend = backend
+        self.model_name = model_name
+        self.store = EmbeddingStore(logger, exception_handler, directory, model_name)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str, kind: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self.key(t, kind) for t in texts]
+        cached = self.store.get_many(list(dict.fromkeys(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for k in keys if k in missing)
+        self.misses += len(missing)
+        if missing:
+            fresh = self._embed_backend(list(missing.values()), kind)
+            self.store.put_many(list(missing), fresh)
+            cached.update(zip(missing, (np.asarray(v, dtype=np.float32) for v in fresh)))
+        return [cached[k].tolist() for k in keys]
+
+    def _embed_backend(self, texts: List[str], kind: str) -> List[List[float]]:
+        if kind == "document":
+            return self.backend.embed_documents(texts)
+        if hasattr(self.backend, "embed"):
+            # Batched query embedding (Cohere's input_type="search_query")
+            return self.backend.embed(texts, input_type="search_query")
+        return [self.backend.embed_query(t) for t in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def warm(self, texts: List[str]):
+        """Embed every distinct, not yet cached text in one batched backend call"""
+        self._embed(list(dict.fromkeys(t for t in texts if t)), "document")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+    def close(self):
+        self.store.close()
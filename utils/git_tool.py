@@ -1,15 +1,25 @@
 import os
 import shutil
 import asyncio
+from typing import List, Tuple
 from git import Repo
 from git.exc import GitCommandError
 
+from utils.metrics import metrics
+
 class GitManager:
     def __init__(self, logger, exception_handler):
         self.logger = logger
         self.exception_handler = exception_handler
     
-    async def clone_repository(self, repo_url: str, clone_dir: str) -> str:
+    async def clone_repository(self, repo_url: str, clone_dir: str,
+                               blobless: bool = False, ref: str = "") -> str:
+        """Clone repo_url into clone_dir, reusing an existing clone.
+
+        With blobless=True only the target ref is fetched (depth 1, no file
+        contents, no checkout); blobs are pulled lazily from the object store
+        when they are read.
+        """
         repo_name = os.path.splitext(os.path.basename(repo_url.rstrip("/")))[0]
         local_dir = os.path.join(clone_dir, repo_name)
         
@@ -21,11 +31,80 @@ class GitManager:
         if not os.path.exists(local_dir):
             try:
                 self.logger.info(f"Cloning repository: {repo_url}")
-                await asyncio.to_thread(Repo.clone_from, repo_url, local_dir)
+                clone_options = {}
+                if blobless:
+                    clone_options = {
+                        "depth": 1,
+                        "filter": "blob:none",
+                        "no_checkout": True,
+                        "single_branch": True,
+                    }
+                    if ref:
+                        clone_options["branch"] = ref
+                elif ref:
+                    clone_options["branch"] = ref
+                with metrics.span("git_clone", blobless=blobless):
+                    await asyncio.to_thread(Repo.clone_from, repo_url, local_dir, **clone_options)
                 return local_dir
             except GitCommandError as ex:
                 await self.exception_handler.handle(ex, "clone_repository")
                 raise
         else:
             self.logger.info(f"Repository exists: {local_dir}")
-            return local_dir
\ No newline at end of file
+            return local_dir
+
+    async def get_head_sha(self, local_dir: str) -> str:
+        repo = Repo(local_dir)
+        return repo.head.commit.hexsha
+
+    async def fetch_updates(self, local_dir: str, blobless: bool = False, ref: str = "") -> str:
+        """Fast-forward the local checkout to its upstream and return the new HEAD SHA.
+
+        A blobless clone fetches `ref` (the ref it was cloned at), else its
+        current branch; a detached HEAD with no `ref` is left where it is.
+        """
+        try:
+            repo = Repo(local_dir)
+            self.logger.info(f"Fetching updates for: {local_dir}")
+            with metrics.span("git_fetch", blobless=blobless):
+                if blobless:
+                    try:
+                        ref = ref or repo.active_branch.name
+                    except TypeError:
+                        # Detached HEAD, e.g. a clone at a tag or SHA
+                        self.logger.warning(f"Detached HEAD and no ref to fetch, keeping {local_dir} as is")
+                        ref = ""
+                    if ref:
+                        # No working tree to merge into: move HEAD straight to the fetched tip
+                        await asyncio.to_thread(
+                            repo.git.fetch, "--depth=1", "--filter=blob:none", "origin", ref
+                        )
+                        await asyncio.to_thread(repo.git.update_ref, "HEAD", "FETCH_HEAD^{commit}")
+                else:
+                    await asyncio.to_thread(repo.git.pull, "--ff-only")
+        except GitCommandError as ex:
+            await self.exception_handler.handle(ex, "fetch_updates")
+        return await self.get_head_sha(local_dir)
+
+    async def diff_changed_files(self, local_dir: str, base_sha: str,
+                                 head_sha: str) -> Tuple[List[str], List[str]]:
+        """Return (changed, deleted) repo-relative paths between two commits.
+
+        Added, modified and renamed files count as changed; the old side of a
+        rename is reported as deleted so its stale analysis can be dropped.
+        """
+        repo = Repo(local_dir)
+        changed, deleted = [], []
+        diffs = await asyncio.to_thread(repo.commit(base_sha).diff, head_sha)
+        for diff in diffs:
+            if diff.change_type == "D":
+                deleted.append(diff.a_path)
+            elif diff.change_type == "R":
+                deleted.append(diff.a_path)
+                changed.append(diff.b_path)
+            else:
+                changed.append(diff.b_path)
+        self.logger.info(
+            f"Diff {base_sha[:8]}..{head_sha[:8]}: {len(changed)} changed, {len(deleted)} deleted"
+        )
+        return changed, deleted
@@ -0,0 +1,67 @@
+import json
+import re
+from typing import Any, Tuple
+
+_FENCE = re.compile(r"```[A-Za-z]*")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class MalformedResponseError(ValueError):
+    """The response contains no recoverable JSON value"""
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """Parse the first JSON object or array in an LLM response, tolerating defects.
+
+    Markdown fences and surrounding prose are ignored. A value cut off
+    mid-way (e.g. at max_tokens) is truncated to the last complete member and
+    its open arrays/objects are closed, so an unterminated string or a
+    dangling key is dropped rather than guessed. Returns (value, complete),
+    where complete is False when anything had to be dropped.
+    """
+    cleaned = _FENCE.sub("", text)
+    starts = [i for i in (cleaned.find("{"), cleaned.find("[")) if i >= 0]
+    if not starts:
+        raise MalformedResponseError("No JSON object or array in response")
+    cleaned = cleaned[min(starts):]
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(cleaned)
+        return value, True
+    except json.JSONDecodeError:
+        pass
+
+    # Scan once, remembering every point where the text can be cut and closed
+    # into a valid document: just after an opening bracket or before a comma
+    stack = []
+    cut_points = []
+    in_string = escaped = False
+    for i, ch in enumerate(cleaned):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            cut_points.append((i + 1, "".join(stack)))
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                break
+        elif ch == ",":
+            cut_points.append((i, "".join(stack)))
+
+    for end, open_brackets in reversed(cut_points):
+        candidate = cleaned[:end].rstrip() + "".join(_CLOSERS[b] for b in reversed(open_brackets))
+        try:
+            return json.loads(candidate), False
+        except json.JSONDecodeError:
+            continue
+    raise MalformedResponseError("Response JSON could not be repaired")
@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+# Latency bucket upper bounds in seconds (the last bucket, +Inf, is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus (cumulative) export"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+def _label_key(labels: dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prometheus_labels(labels: Tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class RunMetrics:
+    """Per-run spans, counters, gauges and latency histograms.
+
+    Stages record spans (`with metrics.span("clone"):`), which feed the
+    `stage_seconds` histogram and the run timeline; components add counters
+    (tokens, retries, cache hits, bytes written) and observations such as
+    LLM queue wait and service time. The run exports a JSON report and a
+    Prometheus textfile-collector file.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.origin = time.monotonic()
+        self.spans = []
+        self.counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self.gauges: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        start = time.monotonic()
+        record = {"stage": stage, "start": round(start - self.origin, 6), **attrs}
+        try:
+            yield record
+        except BaseException as ex:
+            record["error"] = type(ex).__name__
+            raise
+        finally:
+            record["duration"] = round(time.monotonic() - start, 6)
+            self.spans.append(record)
+            self.observe("stage_seconds", record["duration"], stage=stage)
+
+    def count(self, name: str, value: float = 1, **labels):
+        self.counters[(name, _label_key(labels))] += value
+
+    def gauge(self, name: str, value: float, **labels):
+        self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    def report(self) -> dict:
+        def entries(values, convert=lambda v: v):
+            return [{"name": name, "labels": dict(labels), "value": convert(value)}
+                    for (name, labels), value in sorted(values.items())]
+        return {
+            "started": self.started,
+            "wall_seconds": round(time.monotonic() - self.origin, 6),
+            "spans": self.spans,
+            "counters": entries(self.counters),
+            "gauges": entries(self.gauges),
+            "histograms": entries(self.histograms, Histogram.to_dict),
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_prometheus(self, path, prefix: str = "javacode_analyzer"):
+        """Write the textfile-collector format, replacing the file atomically"""
+        lines = []
+        for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+            declared = set()
+            for (name, labels), value in sorted(values.items()):
+                metric = f"{prefix}_{name}"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    declared.add(metric)
+                lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+        declared = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = f"{prefix}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, count in zip([str(b) for b in histogram.buckets] + ["+Inf"], histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric}_bucket{_prometheus_labels(labels, le)} {cumulative}")
+            lines.append(f"{metric}_sum{_prometheus_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_prometheus_labels(labels)} {histogram.count}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry, shared like the config objects
+metrics = RunMetrics()
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Optional
+
+# Exception types provider SDKs raise for throttling, e.g. cohere's TooManyRequestsError
+_RATE_LIMIT_ERROR_NAMES = ("TooManyRequestsError", "RateLimitError", "ResourceExhausted", "ThrottlingException")
+
+def error_status(ex: Exception) -> Optional[int]:
+    """HTTP status carried by an LLM client error, if any"""
+    for source in (ex, getattr(ex, "response", None)):
+        for attr in ("status_code", "http_status"):
+            status = getattr(source, attr, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+def is_rate_limit_error(ex: Exception) -> bool:
+    # Never the message: a parse error can quote "429" or "rate limit" from the answer
+    return error_status(ex) == 429 or type(ex).__name__ in _RATE_LIMIT_ERROR_NAMES
+
+def is_timeout_error(ex: Exception) -> bool:
+    return isinstance(ex, (asyncio.TimeoutError, TimeoutError)) or "timeout" in type(ex).__name__.lower()
+
+
+class TokenBucket:
+    """Continuous-refill bucket; a rate of 0 disables the limit"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        # Requests larger than the whole bucket are let through once it is full
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if self.capacity:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    """Shared gate for every LLM call of a run.
+
+    Combines requests- and tokens-per-minute token buckets with an AIMD
+    concurrency limit: each healthy completion (latency under
+    `target_latency`) adds 1/limit, so the limit grows by about one per round
+    of calls; a 429 or timeout halves it, at most once per `backoff_interval`
+    so a burst of failures from the same overload only counts once.
+    """
+
+    def __init__(self, logger, initial_concurrency: int, min_concurrency: int, max_concurrency: int,
+                 requests_per_minute: int = 0, tokens_per_minute: int = 0,
+                 target_latency: float = 15.0, backoff_interval: float = 5.0):
+        self.logger = logger
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.target_latency = target_latency
+        self.backoff_interval = backoff_interval
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_backoff = 0.0
+        self.throttled = 0
+        self.timeouts = 0
+        self.completed = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, tokens: int = 0):
+        """Wait for rate budget and a concurrency slot for a call of `tokens` tokens.
+
+        Every successful acquire must be paired with a `release`.
+        """
+        self.waiting += 1
+        try:
+            while True:
+                # Check and take without awaiting in between, so concurrent
+                # waiters cannot spend the same budget
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    break
+                await asyncio.sleep(delay)
+            async with self.condition:
+                await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+
+    async def release(self, latency: float, outcome: str):
+        """Report a finished call: outcome is "ok", "throttled", "timeout" or "error"."""
+        now = time.monotonic()
+        if outcome in ("throttled", "timeout"):
+            if outcome == "throttled":
+                self.throttled += 1
+            else:
+                self.timeouts += 1
+            if now - self.last_backoff >= self.backoff_interval:
+                self.last_backoff = now
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.logger.warning(f"LLM {outcome}, concurrency limit reduced to {int(self.limit)}")
+        elif outcome == "ok":
+            self.completed += 1
+            if latency <= self.target_latency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def snapshot(self) -> dict:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "completed": self.completed,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+        }
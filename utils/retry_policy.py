@@ -0,0 +1,165 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from utils.metrics import metrics
+from utils.rate_limiter import error_status, is_rate_limit_error, is_timeout_error
+
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+PARSE = "parse"
+FATAL = "fatal"
+TRANSIENT = "transient"
+
+# Errors that say the backend is overloaded or unreachable, as opposed to a bad request or answer
+UNHEALTHY_KINDS = (RATE_LIMIT, TIMEOUT, TRANSIENT)
+
+_PARSE_ERROR_NAMES = ("OutputParserException", "JSONDecodeError", "ValidationError", "MalformedResponseError")
+_FATAL_STATUS = (400, 401, 403, 404, 422)
+
+
+def classify_error(ex: Exception) -> str:
+    """Map an exception from an LLM call to one of the retry classes"""
+    # First, as their messages quote the model's answer
+    if type(ex).__name__ in _PARSE_ERROR_NAMES:
+        return PARSE
+    if is_rate_limit_error(ex):
+        return RATE_LIMIT
+    if is_timeout_error(ex):
+        return TIMEOUT
+    text = str(ex).lower()
+    if error_status(ex) in _FATAL_STATUS or "invalid api key" in text or "unauthorized" in text:
+        return FATAL
+    return TRANSIENT
+
+def retry_after(ex: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if any"""
+    headers = getattr(getattr(ex, "response", None), "headers", None) or getattr(ex, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudgetExceeded(Exception):
+    """Raised instead of retrying once the run's retry budget is spent"""
+
+
+class CircuitBreaker:
+    """Pauses dispatch while the backend is unhealthy.
+
+    After `failure_threshold` consecutive unhealthy failures the breaker
+    opens and callers wait `cooldown` seconds; then a single probe call is let
+    through, closing the breaker on success and reopening it on failure.
+    """
+
+    def __init__(self, logger, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.logger = logger
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+    async def before_call(self):
+        while self.state != "closed":
+            if self.state == "open":
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = "half_open"
+                self.logger.info("Circuit breaker half-open, probing the LLM backend")
+            if not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            # Another caller is probing, wait for its verdict
+            await asyncio.sleep(min(1.0, self.cooldown))
+
+    def record(self, error_kind: Optional[str]):
+        """Report a call's result: None on success, else its error class"""
+        self.probe_in_flight = False
+        if error_kind not in UNHEALTHY_KINDS:
+            # Any response, even an unusable one, means the backend is up
+            if self.state != "closed":
+                self.logger.info("Circuit breaker closed, LLM backend recovered")
+            self.state = "closed"
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            self.logger.warning(f"Circuit breaker open after {self.failures} failures, "
+                                f"pausing LLM calls for {self.cooldown}s")
+
+
+class RetryPolicy:
+    """Retries LLM calls by error class with capped exponential backoff and full jitter.
+
+    Rate limits honor Retry-After, fatal errors are not retried, and retries
+    across the whole run are capped at `budget_min + budget_ratio * calls` so a
+    degraded backend cannot multiply the load.
+    """
+
+    def __init__(self, logger, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 60.0,
+                 budget_ratio: float = 0.2, budget_min: int = 10):
+        self.logger = logger
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.calls = 0
+        self.retries = 0
+        self.budget_denied = 0
+
+    def backoff(self, attempt: int, ex: Exception) -> float:
+        hinted = retry_after(ex)
+        if hinted is not None:
+            return hinted
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def can_retry(self) -> bool:
+        return self.retries < self.budget_min + self.budget_ratio * self.calls
+
+    async def run(self, operation: Callable[[], Awaitable], description: str):
+        """Await `operation()` until it succeeds, then return its result or raise the last error"""
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            try:
+                return await operation()
+            except Exception as ex:
+                kind = classify_error(ex)
+                if kind == FATAL or attempt == self.max_attempts - 1:
+                    raise
+                if not self.can_retry():
+                    self.budget_denied += 1
+                    metrics.count("llm_retry_budget_denied_total", kind=kind)
+                    raise RetryBudgetExceeded(f"Retry budget exhausted ({kind}: {ex})") from ex
+                self.retries += 1
+                metrics.count("llm_retries_total", kind=kind)
+                delay = self.backoff(attempt, ex)
+                self.logger.debug(f"{description} failed ({kind}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "budget_denied": self.budget_denied,
+        }
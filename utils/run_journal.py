@@ -0,0 +1,127 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, Optional
+
+
+class RunJournal:
+    """Crash-safe SQLite (WAL) record of the files a run has fully analyzed.
+
+    Each completed file is committed in one transaction together with its
+    content hash and all of its class analyses, so after a crash or quota
+    stop a resumed run can reuse exactly the files whose content is unchanged.
+    """
+
+    def __init__(self, logger, exception_handler, path: str):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.path = path
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync survives process crashes; only an OS crash can drop the last commits
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " header TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " started_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS files ("
+            " run_id TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " completed_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, path));"
+            "CREATE TABLE IF NOT EXISTS components ("
+            " run_id TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " value TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, path, position));"
+        )
+        self.conn.commit()
+
+    def start_run(self, run_id: str, header: dict):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, header, status, started_at, updated_at) VALUES (?, ?, 'running', ?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET header = excluded.header, status = 'running', "
+                "updated_at = excluded.updated_at",
+                (run_id, json.dumps(header), now, now)
+            )
+
+    def get_header(self, run_id: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT header FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def completed_files(self, run_id: str) -> Dict[str, str]:
+        """Path -> content hash of every file the run has finished"""
+        return dict(self.conn.execute("SELECT path, content_hash FROM files WHERE run_id = ?", (run_id,)))
+
+    def record_file(self, run_id: str, path: str, content_hash: str, components: list):
+        """Atomically journal a finished file and its analyses"""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM components WHERE run_id = ? AND path = ?", (run_id, path))
+                self.conn.executemany(
+                    "INSERT INTO components (run_id, path, position, value) VALUES (?, ?, ?, ?)",
+                    [(run_id, path, i, json.dumps(c)) for i, c in enumerate(components)]
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (run_id, path, content_hash, completed_at) VALUES (?, ?, ?, ?)",
+                    (run_id, path, content_hash, time.time())
+                )
+                self.conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+        except Exception as ex:
+            # The file is simply redone on resume
+            self.logger.warning(f"Run journal write failed for {path}: {ex}")
+
+    def iter_components(self, run_id: str, path: str) -> Iterator[dict]:
+        for (value,) in self.conn.execute(
+            "SELECT value FROM components WHERE run_id = ? AND path = ? ORDER BY position", (run_id, path)
+        ):
+            yield json.loads(value)
+
+    def finish_run(self, run_id: str):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET status = 'complete', updated_at = ? WHERE run_id = ?", (time.time(), run_id)
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class FileProgress:
+    """Collects the class analyses of each file and journals the file once all are final.
+
+    A file with a class that was left unfinished by the deadline or that fell
+    back to its static skeleton after the LLM call failed is not journaled, so
+    a resumed run analyzes it again.
+    """
+
+    def __init__(self, journal: RunJournal, run_id: str):
+        self.journal = journal
+        self.run_id = run_id
+        self.files = {}  # path -> content hash, pending count, components, incomplete
+
+    def expect(self, path: str, content_hash: str, classes: int):
+        self.files[path] = {"hash": content_hash, "pending": classes, "components": [], "incomplete": False}
+
+    def record(self, analysis: dict):
+        progress = self.files.get(analysis.get("source_file"))
+        if progress is None:
+            return
+        progress["incomplete"] |= bool(analysis.get("unfinished") or analysis.get("failed"))
+        progress["components"].append(analysis)
+        progress["pending"] -= 1
+        if progress["pending"] == 0:
+            del self.files[analysis["source_file"]]
+            if not progress["incomplete"]:
+                self.journal.record_file(self.run_id, analysis["source_file"], progress["hash"], progress["components"])
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+# Largest IN (...) list per lookup query
+_LOOKUP_BATCH = 500
+
+
+class ScoreCache:
+    """SQLite store of per-pair evaluation metric scores.
+
+    A score is keyed on everything that determines it: question, ground
+    truth, answer, contexts, metric and judge model. Re-evaluating after an
+    incremental analysis run therefore only scores the pairs whose answer
+    (or gold entry) actually changed.
+    """
+
+    def __init__(self, logger, exception_handler, path: str):
+        self.logger = logger
+        self.exception_handler = exception_handler
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared with the streaming evaluation stage's worker threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY,"
+            " metric TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(question: str, ground_truth: str, answer: str, contexts: List[str],
+                 metric: str, judge_model: str) -> str:
+        digest = hashlib.sha256()
+        for part in (question, ground_truth, answer, json.dumps(list(contexts)), metric, judge_model):
+            digest.update((part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, float]:
+        found = {}
+        try:
+            with self.lock:
+                for start in range(0, len(keys), _LOOKUP_BATCH):
+                    batch = keys[start:start + _LOOKUP_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    found.update(self.conn.execute(
+                        f"SELECT key, score FROM scores WHERE key IN ({placeholders})", batch
+                    ).fetchall())
+        except Exception as ex:
+            self.logger.warning(f"Score cache read failed: {ex}")
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, str, float]]):
+        """Store (key, metric, score) entries; failed (NaN) scores are left out so they are retried"""
+        now = time.time()
+        rows = [(key, metric, float(score), now) for key, metric, score in entries
+                if score is not None and not math.isnan(score)]
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO scores (key, metric, score, created_at) VALUES (?, ?, ?, ?)", rows
+                )
+        except Exception as ex:
+            self.logger.warning(f"Score cache write failed: {ex}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+    def close(self):
+        self.conn.close()